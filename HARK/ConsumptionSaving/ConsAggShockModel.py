@@ -11,10 +11,11 @@ from builtins import range
 import numpy as np
 import scipy.stats as stats
 from HARK.interpolation import LinearInterp, LinearInterpOnInterp1D, ConstantFunction, IdentityFunction,\
-                               VariableLowerBoundFunc2D, BilinearInterp, LowerEnvelope2D, UpperEnvelope
+                               VariableLowerBoundFunc2D, BilinearInterp, LowerEnvelope2D, UpperEnvelope,\
+                               cachedInterpolator
 from HARK.utilities import CRRAutility, CRRAutilityP, CRRAutilityPP, CRRAutilityP_inv,\
                            CRRAutility_invP, CRRAutility_inv, combineIndepDstns,\
-                           approxMeanOneLognormal
+                           approxMeanOneLognormal, getGroupIndices
 from HARK.simulation import drawDiscrete, drawUniform
 from HARK.ConsumptionSaving.ConsIndShockModel import ConsumerSolution, IndShockConsumerType
 from HARK import HARKobject, Market, AgentType
@@ -76,6 +77,8 @@ class AggShockConsumerType(IndShockConsumerType):
     evolves over time and take aggregate shocks into account when making their
     decision about how much to consume.
     '''
+    histogram_method_ = False # Consumption also depends on aggregate market resources
+
     def __init__(self, time_flow=True, **kwds):
         '''
         Make a new instance of AggShockConsumerType, an extension of
@@ -297,8 +300,9 @@ class AggShockConsumerType(IndShockConsumerType):
         cNrmNow = np.zeros(self.AgentCount) + np.nan
         MPCnow = np.zeros(self.AgentCount) + np.nan
         MaggNow = self.getMaggNow()
-        for t in range(self.T_cycle):
-            these = t == self.t_cycle
+        for t, these in enumerate(getGroupIndices(self.t_cycle, self.T_cycle)):
+            if these.size == 0:
+                continue
             cNrmNow[these] = self.solution[t].cFunc(self.mNrmNow[these], MaggNow[these])
             MPCnow[these] = self.solution[t].cFunc.derivativeX(self.mNrmNow[these],
                                                                MaggNow[these])  # Marginal propensity to consume
@@ -453,7 +457,7 @@ class AggShockMarkovConsumerType(AggShockConsumerType):
                 Indices = np.arange(IncomeDstnNow[0].size)    # just a list of integers
                 # Get random draws of income shocks from the discrete distribution
                 EventDraws = drawDiscrete(N, X=Indices, P=IncomeDstnNow[0],
-                                          exact_match=True, seed=self.RNG.randint(0, 2**31-1))
+                                          exact_match=True, seed=self.drawSeed())
                 # permanent "shock" includes expected growth
                 PermShkNow[these] = IncomeDstnNow[1][EventDraws]*PermGroFacNow
                 TranShkNow[these] = IncomeDstnNow[2][EventDraws]
@@ -468,7 +472,7 @@ class AggShockMarkovConsumerType(AggShockConsumerType):
             Indices = np.arange(IncomeDstnNow[0].size)        # just a list of integers
             # Get random draws of income shocks from the discrete distribution
             EventDraws = drawDiscrete(N, X=Indices, P=IncomeDstnNow[0],
-                                      exact_match=False, seed=self.RNG.randint(0, 2**31-1))
+                                      exact_match=False, seed=self.drawSeed())
             # permanent "shock" includes expected growth
             PermShkNow[these] = IncomeDstnNow[1][EventDraws]*PermGroFacNow
             TranShkNow[these] = IncomeDstnNow[2][EventDraws]
@@ -501,15 +505,14 @@ class AggShockMarkovConsumerType(AggShockConsumerType):
         MaggNow = self.getMaggNow()
         MrkvNow = self.getMrkvNow()
 
+        # Group agents by (period of cycle, Markov state) with a single sort
         StateCount = self.MrkvArray.shape[0]
-        MrkvBoolArray = np.zeros((StateCount, self.AgentCount), dtype=bool)
-        for i in range(StateCount):
-            MrkvBoolArray[i, :] = i == MrkvNow
-
+        groups = getGroupIndices(self.t_cycle*StateCount + MrkvNow, self.T_cycle*StateCount)
         for t in range(self.T_cycle):
-            these = t == self.t_cycle
             for i in range(StateCount):
-                those = np.logical_and(these, MrkvBoolArray[i, :])
+                those = groups[t*StateCount + i]
+                if those.size == 0:
+                    continue
                 cNrmNow[those] = self.solution[t].cFunc[i](self.mNrmNow[those], MaggNow[those])
                 # Marginal propensity to consume
                 MPCnow[those] = self.solution[t].cFunc[i].derivativeX(self.mNrmNow[those], MaggNow[those])
@@ -652,8 +655,8 @@ def solveConsAggShock(solution_next, IncomeDstn, LivPrb, DiscFac, CRRA, PermGroF
     cFuncUnc = VariableLowerBoundFunc2D(cFuncBase, BoroCnstNat)
 
     # Make the constrained consumption function and combine it with the unconstrained component
-    cFuncCnst = BilinearInterp(np.array([[0.0, 0.0], [1.0, 1.0]]),
-                               np.array([BoroCnstArt, BoroCnstArt+1.0]), np.array([0.0, 1.0]))
+    cFuncCnst = cachedInterpolator(BilinearInterp, np.array([[0.0, 0.0], [1.0, 1.0]]),
+                                   np.array([BoroCnstArt, BoroCnstArt+1.0]), np.array([0.0, 1.0]))
     cFuncNow = LowerEnvelope2D(cFuncUnc, cFuncCnst)
 
     # Make the minimum m function as the greater of the natural and artificial constraints
@@ -818,8 +821,8 @@ def solveConsAggMarkov(solution_next, IncomeDstn, LivPrb, DiscFac, CRRA, MrkvArr
 
     # Prepare some objects that are the same across all current states
     aXtra_tiled = np.tile(np.reshape(aXtraGrid, (1, aCount)), (Mcount, 1))
-    cFuncCnst = BilinearInterp(np.array([[0.0, 0.0], [1.0, 1.0]]),
-                               np.array([BoroCnstArt, BoroCnstArt+1.0]), np.array([0.0, 1.0]))
+    cFuncCnst = cachedInterpolator(BilinearInterp, np.array([[0.0, 0.0], [1.0, 1.0]]),
+                                   np.array([BoroCnstArt, BoroCnstArt+1.0]), np.array([0.0, 1.0]))
 
     # Now loop through *this* period's discrete states, calculating end-of-period
     # marginal value (weighting across state transitions), then construct consumption
@@ -10,12 +10,13 @@ from builtins import str
 from builtins import range
 from copy import deepcopy
 import numpy as np
-from HARK import AgentType, HARKobject
+from HARK import AgentType, HARKobject, profileStage
 from HARK.interpolation import LowerEnvelope2D, BilinearInterp, VariableLowerBoundFunc2D, \
-                               LinearInterpOnInterp1D, LinearInterp, CubicInterp, UpperEnvelope
+                               LinearInterpOnInterp1D, LinearInterp, CubicInterp, UpperEnvelope, \
+                               cachedInterpolator
 from HARK.utilities import CRRAutility, CRRAutilityP, CRRAutilityPP, CRRAutilityP_inv, \
                            CRRAutility_invP, CRRAutility_inv, CRRAutilityP_invP,\
-                           getPercentiles
+                           getPercentiles, getGroupIndices
 from HARK.simulation import drawLognormal, drawDiscrete, drawUniform
 from HARK.ConsumptionSaving.ConsIndShockModel import ConsIndShockSetup, ConsumerSolution, IndShockConsumerType
 import HARK.ConsumptionSaving.ConsumerParameters as Params
@@ -442,8 +443,8 @@ class ConsGenIncProcessSolver(ConsIndShockSetup):
             self.mLvlMinNow = self.BoroCnstNat
 
         # Define the constrained consumption function as "consume all" shifted by mLvlMin
-        cFuncNowCnstBase = BilinearInterp(np.array([[0., 0.], [1., 1.]]),
-                                          np.array([0.0, 1.0]), np.array([0.0, 1.0]))
+        cFuncNowCnstBase = cachedInterpolator(BilinearInterp, np.array([[0., 0.], [1., 1.]]),
+                                              np.array([0.0, 1.0]), np.array([0.0, 1.0]))
         self.cFuncNowCnst = VariableLowerBoundFunc2D(cFuncNowCnstBase, self.mLvlMinNow)
 
     def prepareToCalcEndOfPrdvP(self):
@@ -878,20 +879,27 @@ class ConsGenIncProcessSolver(ConsIndShockSetup):
             tion of persistent income.  Might also include a value function and
             marginal marginal value function, depending on options selected.
         '''
-        aLvl, pLvl = self.prepareToCalcEndOfPrdvP()
-        EndOfPrdvP = self.calcEndOfPrdvP()
+        with profileStage('prepareToCalcEndOfPrdvP'):
+            aLvl, pLvl = self.prepareToCalcEndOfPrdvP()
+        with profileStage('calcEndOfPrdvP'):
+            EndOfPrdvP = self.calcEndOfPrdvP()
         if self.vFuncBool:
-            self.makeEndOfPrdvFunc(EndOfPrdvP)
+            with profileStage('makeEndOfPrdvFunc'):
+                self.makeEndOfPrdvFunc(EndOfPrdvP)
         if self.CubicBool:
             interpolator = self.makeCubiccFunc
         else:
             interpolator = self.makeLinearcFunc
-        solution = self.makeBasicSolution(EndOfPrdvP, aLvl, pLvl, interpolator)
-        solution = self.addMPCandHumanWealth(solution)
+        with profileStage('makeBasicSolution'):
+            solution = self.makeBasicSolution(EndOfPrdvP, aLvl, pLvl, interpolator)
+        with profileStage('addMPCandHumanWealth'):
+            solution = self.addMPCandHumanWealth(solution)
         if self.vFuncBool:
-            solution.vFunc = self.makevFunc(solution)
+            with profileStage('addvFunc'):
+                solution.vFunc = self.makevFunc(solution)
         if self.CubicBool:
-            solution = self.addvPPfunc(solution)
+            with profileStage('addvPPfunc'):
+                solution = self.addvPPfunc(solution)
         return solution
 
 
@@ -965,6 +973,7 @@ class GenIncProcessConsumerType(IndShockConsumerType):
     cFunc_terminal_ = BilinearInterp(np.array([[0.0, 0.0], [1.0, 1.0]]), np.array([0.0, 1.0]), np.array([0.0, 1.0]))
     solution_terminal_ = ConsumerSolution(cFunc=cFunc_terminal_, mNrmMin=0.0, hNrm=0.0, MPCmin=1.0, MPCmax=1.0)
     poststate_vars_ = ['aLvlNow', 'pLvlNow']
+    histogram_method_ = False # Consumption also depends on persistent income
 
     def __init__(self, cycles=0, time_flow=True, **kwds):
         '''
@@ -1161,9 +1170,9 @@ class GenIncProcessConsumerType(IndShockConsumerType):
         # Get and store states for newly born agents
         N = np.sum(which_agents)  # Number of new consumers to make
         aNrmNow_new = drawLognormal(N, mu=self.aNrmInitMean, sigma=self.aNrmInitStd,
-                                    seed=self.RNG.randint(0, 2**31-1))
+                                    seed=self.drawSeed())
         self.pLvlNow[which_agents] = drawLognormal(N, mu=self.pLvlInitMean, sigma=self.pLvlInitStd,
-                                                   seed=self.RNG.randint(0, 2**31-1))
+                                                   seed=self.drawSeed())
         self.aLvlNow[which_agents] = aNrmNow_new*self.pLvlNow[which_agents]
         self.t_age[which_agents] = 0  # How many periods since each agent was born
         self.t_cycle[which_agents] = 0  # Which period of the cycle each agent is currently in
@@ -1207,8 +1216,9 @@ class GenIncProcessConsumerType(IndShockConsumerType):
         '''
         cLvlNow = np.zeros(self.AgentCount) + np.nan
         MPCnow = np.zeros(self.AgentCount) + np.nan
-        for t in range(self.T_cycle):
-            these = t == self.t_cycle
+        for t, these in enumerate(getGroupIndices(self.t_cycle, self.T_cycle)):
+            if these.size == 0:
+                continue
             cLvlNow[these] = self.solution[t].cFunc(self.mLvlNow[these], self.pLvlNow[these])
             MPCnow[these] = self.solution[t].cFunc.derivativeX(self.mLvlNow[these], self.pLvlNow[these])
         self.cLvlNow = cLvlNow
@@ -19,17 +19,20 @@ from builtins import str
 from builtins import range
 from builtins import object
 from copy import copy, deepcopy
+from time import time
 import numpy as np
 from scipy.optimize import newton
-from HARK import AgentType, Solution, NullFunc, HARKobject
+from HARK import AgentType, Solution, NullFunc, HARKobject, profileStage
 import HARK.ConsumptionSaving.ConsumerParameters as Params
 from HARK.utilities import warnings  # Because of "patch" to warnings modules
-from HARK.interpolation import CubicInterp, LowerEnvelope, LinearInterp
-from HARK.simulation import drawDiscrete, drawLognormal, drawUniform
+from HARK.interpolation import CubicInterp, LowerEnvelope, LinearInterp, LinearInterpPack, \
+                               searchsortedPacked, PackedSearch, cachedInterpolator
+from HARK.simulation import drawLognormal, drawUniform, AliasSampler, stackRows
 from HARK.utilities import approxMeanOneLognormal, addDiscreteOutcomeConstantMean,\
                            combineIndepDstns, makeGridExpMult, CRRAutility, CRRAutilityP, \
                            CRRAutilityPP, CRRAutilityP_inv, CRRAutility_invP, CRRAutility_inv, \
-                           CRRAutilityP_invP
+                           CRRAutilityP_invP, getGroupIndices, approxLognormal, getPercentiles, \
+                           getLorenzShares, makeLotteryMatrix, findErgodicDist
 
 utility       = CRRAutility
 utilityP      = CRRAutilityP
@@ -847,8 +850,9 @@ class ConsIndShockSetup(ConsPerfForesightSolver):
             self.MPCmaxEff = self.MPCmaxNow
 
         # Define the borrowing constraint (limiting consumption function)
-        self.cFuncNowCnst = LinearInterp(np.array([self.mNrmMinNow, self.mNrmMinNow+1]),
-                                         np.array([0.0, 1.0]))
+        self.cFuncNowCnst = cachedInterpolator(LinearInterp,
+                                               np.array([self.mNrmMinNow, self.mNrmMinNow+1]),
+                                               np.array([0.0, 1.0]))
 
 
     def prepareToSolve(self):
@@ -1092,10 +1096,14 @@ class ConsIndShockSolverBasic(ConsIndShockSetup):
         solution : ConsumerSolution
             The solution to the one period problem.
         '''
-        aNrm       = self.prepareToCalcEndOfPrdvP()
-        EndOfPrdvP = self.calcEndOfPrdvP()
-        solution   = self.makeBasicSolution(EndOfPrdvP,aNrm,self.makeLinearcFunc)
-        solution   = self.addMPCandHumanWealth(solution)
+        with profileStage('prepareToCalcEndOfPrdvP'):
+            aNrm       = self.prepareToCalcEndOfPrdvP()
+        with profileStage('calcEndOfPrdvP'):
+            EndOfPrdvP = self.calcEndOfPrdvP()
+        with profileStage('makeBasicSolution'):
+            solution   = self.makeBasicSolution(EndOfPrdvP,aNrm,self.makeLinearcFunc)
+        with profileStage('addMPCandHumanWealth'):
+            solution   = self.addMPCandHumanWealth(solution)
         return solution
 
 
@@ -1265,23 +1273,30 @@ class ConsIndShockSolver(ConsIndShockSolverBasic):
             The solution to the single period consumption-saving problem.
         '''
         # Make arrays of end-of-period assets and end-of-period marginal value
-        aNrm         = self.prepareToCalcEndOfPrdvP()
-        EndOfPrdvP   = self.calcEndOfPrdvP()
+        with profileStage('prepareToCalcEndOfPrdvP'):
+            aNrm         = self.prepareToCalcEndOfPrdvP()
+        with profileStage('calcEndOfPrdvP'):
+            EndOfPrdvP   = self.calcEndOfPrdvP()
 
         # Construct a basic solution for this period
-        if self.CubicBool:
-            solution   = self.makeBasicSolution(EndOfPrdvP,aNrm,interpolator=self.makeCubiccFunc)
-        else:
-            solution   = self.makeBasicSolution(EndOfPrdvP,aNrm,interpolator=self.makeLinearcFunc)
-        solution       = self.addMPCandHumanWealth(solution) # add a few things
-        solution       = self.addSSmNrm(solution) # find steady state m
+        with profileStage('makeBasicSolution'):
+            if self.CubicBool:
+                solution   = self.makeBasicSolution(EndOfPrdvP,aNrm,interpolator=self.makeCubiccFunc)
+            else:
+                solution   = self.makeBasicSolution(EndOfPrdvP,aNrm,interpolator=self.makeLinearcFunc)
+        with profileStage('addMPCandHumanWealth'):
+            solution       = self.addMPCandHumanWealth(solution) # add a few things
+        with profileStage('addSSmNrm'):
+            solution       = self.addSSmNrm(solution) # find steady state m
 
         # Add the value function if requested, as well as the marginal marginal
         # value function if cubic splines were used (to prepare for next period)
         if self.vFuncBool:
-            solution = self.addvFunc(solution,EndOfPrdvP)
+            with profileStage('addvFunc'):
+                solution = self.addvFunc(solution,EndOfPrdvP)
         if self.CubicBool:
-            solution = self.addvPPfunc(solution)
+            with profileStage('addvPPfunc'):
+                solution = self.addvPPfunc(solution)
         return solution
 
 
@@ -1349,6 +1364,463 @@ def solveConsIndShock(solution_next,IncomeDstn,LivPrb,DiscFac,CRRA,Rfree,PermGro
     return solution_now
 
 
+class ConsIndShockBatchSolution(HARKobject):
+    '''
+    A compact representation of K solutions to the same one period consumption-
+    saving problem with idiosyncratic shocks, differing only in their preference
+    parameters.  The unconstrained consumption functions are stored as a (K,N)
+    array of knots rather than as K separate interpolator objects, so that a
+    batch of solutions can be evaluated in one array pass.  Used by
+    ConsIndShockBatchSolver and IndShockConsumerType.solveBatch.
+    '''
+    distance_criteria = ['mNrm','cNrm','mNrmMin']
+
+    def __init__(self,mNrm,cNrm,mNrmMin,hNrm,MPCmin,MPCmax,
+                 cFuncLimitIntercept=None,cFuncLimitSlope=None):
+        '''
+        Make a new batch solution from stacked consumption function knots.
+
+        Parameters
+        ----------
+        mNrm : np.array
+            A (K,N) array of market resource knots of the unconstrained
+            consumption function for each of the K solutions.
+        cNrm : np.array
+            A (K,N) array of consumption values at the knots in mNrm.
+        mNrmMin : np.array
+            Array of size K with the minimum acceptable market resources.
+        hNrm : np.array
+            Array of size K with normalized human wealth.
+        MPCmin : np.array
+            Array of size K with the minimum marginal propensity to consume.
+        MPCmax : np.array
+            Array of size K with the maximum marginal propensity to consume.
+        cFuncLimitIntercept : np.array or None
+            Array of size K with the intercept of the limiting linear consumption
+            function; None indicates linear extrapolation above the top knot.
+        cFuncLimitSlope : np.array or None
+            Array of size K with the slope of the limiting linear consumption
+            function; None indicates linear extrapolation above the top knot.
+
+        Returns
+        -------
+        None
+        '''
+        self.mNrm    = mNrm
+        self.cNrm    = cNrm
+        self.mNrmMin = mNrmMin
+        self.hNrm    = hNrm
+        self.MPCmin  = MPCmin
+        self.MPCmax  = MPCmax
+        self.cFuncLimitIntercept = cFuncLimitIntercept
+        self.cFuncLimitSlope     = cFuncLimitSlope
+        self.decay_extrap        = (cFuncLimitIntercept is not None) and (cFuncLimitSlope is not None)
+        if self.decay_extrap: # Same decay extrapolation as LinearInterp
+            slope_at_top  = (cNrm[:,-1] - cNrm[:,-2])/(mNrm[:,-1] - mNrm[:,-2])
+            level_diff    = cFuncLimitIntercept + cFuncLimitSlope*mNrm[:,-1] - cNrm[:,-1]
+            slope_diff    = cFuncLimitSlope - slope_at_top
+            self.decay_extrap_A = level_diff
+            self.decay_extrap_B = -slope_diff/level_diff
+
+    def cFunc(self,m):
+        '''
+        Evaluate all K consumption functions, each on its own set of points.
+
+        Parameters
+        ----------
+        m : np.array
+            Array of market resources whose first dimension has size K; row k
+            is evaluated with the k-th consumption function.
+
+        Returns
+        -------
+        c : np.array
+            Consumption at each point in m, with the same shape as m.
+        '''
+        K, N  = self.mNrm.shape
+        shape = m.shape
+        x     = m.reshape((K,-1))
+        M     = x.shape[1]
+        x     = x.flatten()
+        row   = np.repeat(np.arange(K),M)
+        mFlat = self.mNrm.flatten()
+        cFlat = self.cNrm.flatten()
+
+        # Find the bracketing knots for each point within its own row
+        lo    = row*N
+        i     = np.maximum(searchsortedPacked(mFlat,lo,lo+N-1,x),lo+1)
+        alpha = (x - mFlat[i-1])/(mFlat[i] - mFlat[i-1])
+        cUnc  = (1.-alpha)*cFlat[i-1] + alpha*cFlat[i]
+        cUnc[x < mFlat[lo]] = np.nan
+        if self.decay_extrap:
+            top   = x > mFlat[lo+N-1]
+            rtop  = row[top]
+            cUnc[top] = self.cFuncLimitIntercept[rtop] + self.cFuncLimitSlope[rtop]*x[top] - \
+                        self.decay_extrap_A[rtop]*np.exp(-self.decay_extrap_B[rtop]*(x[top] - mFlat[lo[top]+N-1]))
+
+        # Take the lower envelope with the borrowing constraint
+        mNrmMin = self.mNrmMin[row]
+        alpha   = (x - mNrmMin)/((mNrmMin + 1.) - mNrmMin)
+        cCnst   = (1.-alpha)*0. + alpha*1.
+        cCnst[x < mNrmMin] = np.nan
+        c = np.fmin(cUnc,cCnst)
+        return c.reshape(shape)
+
+    def select(self,which):
+        '''
+        Make a new batch solution with only some of the K solutions in this one.
+
+        Parameters
+        ----------
+        which : np.array
+            Integer or boolean array indicating which solutions to keep.
+
+        Returns
+        -------
+        batch_solution : ConsIndShockBatchSolution
+            A batch solution containing only the selected solutions.
+        '''
+        if self.decay_extrap:
+            intercept = self.cFuncLimitIntercept[which]
+            slope     = self.cFuncLimitSlope[which]
+        else:
+            intercept = None
+            slope     = None
+        return ConsIndShockBatchSolution(self.mNrm[which],self.cNrm[which],self.mNrmMin[which],
+                                         self.hNrm[which],self.MPCmin[which],self.MPCmax[which],
+                                         intercept,slope)
+
+    def distanceEach(self,other):
+        '''
+        Calculate the distance between each of the K solutions in this batch and
+        the corresponding solution in another batch, by the same criteria that
+        ConsumerSolution.distance uses for the solutions they represent.
+
+        Parameters
+        ----------
+        other : ConsIndShockBatchSolution
+            Another batch solution with the same number of solutions.
+
+        Returns
+        -------
+        distance : np.array
+            Array of size K with the distance for each solution.
+        '''
+        if self.mNrm.shape != other.mNrm.shape:
+            return np.zeros(self.mNrm.shape[0]) + float(abs(self.mNrm.shape[1] - other.mNrm.shape[1]))
+        distance = np.maximum(np.max(np.abs(self.mNrm - other.mNrm),axis=1),
+                              np.max(np.abs(self.cNrm - other.cNrm),axis=1))
+        return np.maximum(distance,np.abs(self.mNrmMin - other.mNrmMin))
+
+    def makeConsumerSolution(self,k,CRRA):
+        '''
+        Construct an ordinary ConsumerSolution for the k-th solution in this batch.
+
+        Parameters
+        ----------
+        k : int
+            Index of the solution to be unpacked.
+        CRRA : float
+            Coefficient of relative risk aversion for this solution.
+
+        Returns
+        -------
+        solution : ConsumerSolution
+            The k-th solution, represented with the usual interpolator objects.
+        '''
+        if self.decay_extrap:
+            cFuncUnc = LinearInterp(self.mNrm[k],self.cNrm[k],
+                                    self.cFuncLimitIntercept[k],self.cFuncLimitSlope[k])
+        else:
+            cFuncUnc = LinearInterp(self.mNrm[k],self.cNrm[k])
+        mNrmMin  = self.mNrmMin[k]
+        cFuncCnst = LinearInterp(np.array([mNrmMin, mNrmMin+1]),np.array([0.0, 1.0]))
+        cFunc    = LowerEnvelope(cFuncUnc,cFuncCnst)
+        solution = ConsumerSolution(cFunc=cFunc, vPfunc=MargValueFunc(cFunc,CRRA), mNrmMin=mNrmMin,
+                                    hNrm=self.hNrm[k], MPCmin=self.MPCmin[k], MPCmax=self.MPCmax[k])
+        return solution
+
+
+class ConsIndShockBatchSolver(object):
+    '''
+    A class for solving a single period of the consumption-saving problem with
+    idiosyncratic shocks for K parameterizations at once, differing only in
+    DiscFac and CRRA.  Follows the same steps as ConsIndShockSolverBasic, but
+    every array carries a leading dimension of size K, so the endogenous grid
+    step runs as stacked (K,shock,grid) array operations.  Only linear interpo-
+    lation without the value function is supported.
+    '''
+    def __init__(self,solution_next,IncomeDstn,LivPrb,DiscFac,CRRA,Rfree,
+                 PermGroFac,BoroCnstArt,aXtraGrid):
+        '''
+        Constructor for a new batch solver for the one period problem.
+
+        Parameters
+        ----------
+        solution_next : ConsIndShockBatchSolution
+            The solutions to next period's one period problem.
+        IncomeDstn : [np.array]
+            A list containing three arrays of floats, representing a discrete
+            approximation to the income process between the period being solved
+            and the one immediately following (in solution_next). Order: event
+            probabilities, permanent shocks, transitory shocks.
+        LivPrb : float
+            Survival probability; likelihood of being alive at the beginning of
+            the succeeding period.
+        DiscFac : np.array
+            Array of size K with intertemporal discount factors.
+        CRRA : np.array
+            Array of size K with coefficients of relative risk aversion.
+        Rfree : float
+            Risk free interest factor on end-of-period assets.
+        PermGroFac : float
+            Expected permanent income growth factor at the end of this period.
+        BoroCnstArt: float or None
+            Borrowing constraint for the minimum allowable assets to end the
+            period with.  BoroCnstArt=None indicates no artificial constraint.
+        aXtraGrid: np.array
+            Array of "extra" end-of-period asset values-- assets above the
+            absolute minimum acceptable level.
+
+        Returns
+        -------
+        None
+        '''
+        self.solution_next  = solution_next
+        self.IncomeDstn     = IncomeDstn
+        self.LivPrb         = LivPrb
+        self.DiscFac        = DiscFac
+        self.CRRA           = CRRA
+        self.Rfree          = Rfree
+        self.PermGroFac     = PermGroFac
+        self.BoroCnstArt    = BoroCnstArt
+        self.aXtraGrid      = aXtraGrid
+
+    def setAndUpdateValues(self,solution_next,IncomeDstn,LivPrb,DiscFac):
+        '''
+        Unpacks some of the inputs (and calculates simple objects based on them),
+        storing the results in self for use by other methods.  See the method
+        of the same name in ConsIndShockSetup; here, each result that depends
+        on preferences is an array of size K.
+
+        Parameters
+        ----------
+        solution_next : ConsIndShockBatchSolution
+            The solutions to next period's one period problem.
+        IncomeDstn : [np.array]
+            A list containing three arrays of floats, representing a discrete
+            approximation to the income process.
+        LivPrb : float
+            Survival probability; likelihood of being alive at the beginning of
+            the succeeding period.
+        DiscFac : np.array
+            Array of size K with intertemporal discount factors.
+
+        Returns
+        -------
+        None
+        '''
+        self.DiscFacEff       = DiscFac*LivPrb # "effective" discount factor
+        self.ShkPrbsNext      = IncomeDstn[0]
+        self.PermShkValsNext  = IncomeDstn[1]
+        self.TranShkValsNext  = IncomeDstn[2]
+        self.PermShkMinNext   = np.min(self.PermShkValsNext)
+        self.TranShkMinNext   = np.min(self.TranShkValsNext)
+        self.WorstIncPrb      = np.sum(self.ShkPrbsNext[
+                                (self.PermShkValsNext*self.TranShkValsNext)==
+                                (self.PermShkMinNext*self.TranShkMinNext)])
+
+        # Update the bounding MPCs and PDV of human wealth:
+        self.PatFac       = ((self.Rfree*self.DiscFacEff)**(1.0/self.CRRA))/self.Rfree
+        self.MPCminNow    = 1.0/(1.0 + self.PatFac/solution_next.MPCmin)
+        self.ExIncNext    = np.dot(self.ShkPrbsNext,self.TranShkValsNext*self.PermShkValsNext)
+        self.hNrmNow      = self.PermGroFac/self.Rfree*(self.ExIncNext + solution_next.hNrm)
+        self.MPCmaxNow    = 1.0/(1.0 + (self.WorstIncPrb**(1.0/self.CRRA))*
+                                        self.PatFac/solution_next.MPCmax)
+
+        self.cFuncLimitIntercept = self.MPCminNow*self.hNrmNow
+        self.cFuncLimitSlope = self.MPCminNow
+
+    def defBoroCnst(self,BoroCnstArt):
+        '''
+        Finds the natural borrowing constraint and the minimum acceptable market
+        resources for each of the K problems.
+
+        Parameters
+        ----------
+        BoroCnstArt : float or None
+            Borrowing constraint for the minimum allowable assets to end the
+            period with.  BoroCnstArt=None indicates no artificial constraint.
+
+        Returns
+        -------
+        none
+        '''
+        self.BoroCnstNat = (self.solution_next.mNrmMin - self.TranShkMinNext)*\
+                           (self.PermGroFac*self.PermShkMinNext)/self.Rfree
+        if BoroCnstArt is None:
+            self.mNrmMinNow = self.BoroCnstNat
+        else:
+            self.mNrmMinNow = np.maximum(self.BoroCnstNat,BoroCnstArt)
+        self.MPCmaxEff = np.where(self.BoroCnstNat < self.mNrmMinNow,1.0,self.MPCmaxNow)
+
+    def prepareToSolve(self):
+        '''
+        Perform preparatory work before calculating the unconstrained consumption
+        functions.
+
+        Parameters
+        ----------
+        none
+
+        Returns
+        -------
+        none
+        '''
+        self.setAndUpdateValues(self.solution_next,self.IncomeDstn,self.LivPrb,self.DiscFac)
+        self.defBoroCnst(self.BoroCnstArt)
+
+    def prepareToCalcEndOfPrdvP(self):
+        '''
+        Prepare to calculate end-of-period marginal value by creating a (K,shock,
+        grid) array of market resources that the agent could have next period.
+
+        Parameters
+        ----------
+        none
+
+        Returns
+        -------
+        aNrmNow : np.array
+            A (K,grid) array of end-of-period assets; also stored as attribute of self.
+        '''
+        aNrmNow  = np.asarray(self.aXtraGrid)[np.newaxis,:] + self.BoroCnstNat[:,np.newaxis]
+        PermShkVals_temp = self.PermShkValsNext[np.newaxis,:,np.newaxis]
+        TranShkVals_temp = self.TranShkValsNext[np.newaxis,:,np.newaxis]
+        mNrmNext = self.Rfree/(self.PermGroFac*PermShkVals_temp)*aNrmNow[:,np.newaxis,:] + TranShkVals_temp
+
+        # Store and report the results
+        self.PermShkVals_temp  = PermShkVals_temp
+        self.ShkPrbs_temp      = self.ShkPrbsNext[np.newaxis,:,np.newaxis]
+        self.mNrmNext          = mNrmNext
+        self.aNrmNow           = aNrmNow
+        return aNrmNow
+
+    def calcEndOfPrdvP(self):
+        '''
+        Calculate end-of-period marginal value of assets at each point in aNrmNow,
+        for each of the K problems.
+
+        Parameters
+        ----------
+        none
+
+        Returns
+        -------
+        EndOfPrdvP : np.array
+            A (K,grid) array of end-of-period marginal value of assets.
+        '''
+        CRRA_temp  = self.CRRA[:,np.newaxis,np.newaxis]
+        vPnext     = self.solution_next.cFunc(self.mNrmNext)**(-CRRA_temp)
+        EndOfPrdvP = (self.DiscFacEff*self.Rfree*self.PermGroFac**(-self.CRRA))[:,np.newaxis]*np.sum(
+                      self.PermShkVals_temp**(-CRRA_temp)*vPnext*self.ShkPrbs_temp,axis=1)
+        return EndOfPrdvP
+
+    def getPointsForInterpolation(self,EndOfPrdvP,aNrmNow):
+        '''
+        Finds interpolation points (c,m) for the consumption functions.
+
+        Parameters
+        ----------
+        EndOfPrdvP : np.array
+            A (K,grid) array of end-of-period marginal values.
+        aNrmNow : np.array
+            A (K,grid) array of end-of-period asset values that yield the
+            marginal values in EndOfPrdvP.
+
+        Returns
+        -------
+        c_for_interpolation : np.array
+            A (K,grid+1) array of consumption points for interpolation.
+        m_for_interpolation : np.array
+            A (K,grid+1) array of corresponding market resource points.
+        '''
+        cNrmNow = EndOfPrdvP**(-1.0/self.CRRA[:,np.newaxis])
+        mNrmNow = cNrmNow + aNrmNow
+
+        # Limiting consumption is zero as m approaches mNrmMin
+        c_for_interpolation = np.insert(cNrmNow,0,0.,axis=-1)
+        m_for_interpolation = np.concatenate((self.BoroCnstNat[:,np.newaxis],mNrmNow),axis=-1)
+        return c_for_interpolation,m_for_interpolation
+
+    def solve(self):
+        '''
+        Solves the K one period problems by the method of endogenous gridpoints.
+
+        Parameters
+        ----------
+        none
+
+        Returns
+        -------
+        solution : ConsIndShockBatchSolution
+            The solutions to the K single period consumption-saving problems.
+        '''
+        aNrm       = self.prepareToCalcEndOfPrdvP()
+        EndOfPrdvP = self.calcEndOfPrdvP()
+        cNrm,mNrm  = self.getPointsForInterpolation(EndOfPrdvP,aNrm)
+        solution   = ConsIndShockBatchSolution(mNrm,cNrm,self.mNrmMinNow,self.hNrmNow,
+                                               self.MPCminNow,self.MPCmaxEff,
+                                               self.cFuncLimitIntercept,self.cFuncLimitSlope)
+        return solution
+
+
+def solveConsIndShockBatch(solution_next,IncomeDstn,LivPrb,DiscFac,CRRA,Rfree,PermGroFac,
+                           BoroCnstArt,aXtraGrid):
+    '''
+    Solves a single period consumption-saving problem with CRRA utility and risky
+    income for K values of DiscFac and CRRA at once, using linear interpolation.
+    The batch counterpart of solveConsIndShock with CubicBool=vFuncBool=False.
+
+    Parameters
+    ----------
+    solution_next : ConsIndShockBatchSolution
+        The solutions to next period's one period problem.
+    IncomeDstn : [np.array]
+        A list containing three arrays of floats, representing a discrete
+        approximation to the income process between the period being solved
+        and the one immediately following (in solution_next). Order: event
+        probabilities, permanent shocks, transitory shocks.
+    LivPrb : float
+        Survival probability; likelihood of being alive at the beginning of
+        the succeeding period.
+    DiscFac : np.array
+        Array of size K with intertemporal discount factors.
+    CRRA : np.array
+        Array of size K with coefficients of relative risk aversion.
+    Rfree : float
+        Risk free interest factor on end-of-period assets.
+    PermGroFac : float
+        Expected permanent income growth factor at the end of this period.
+    BoroCnstArt: float or None
+        Borrowing constraint for the minimum allowable assets to end the
+        period with.  BoroCnstArt=None indicates no artificial constraint.
+    aXtraGrid: np.array
+        Array of "extra" end-of-period asset values-- assets above the
+        absolute minimum acceptable level.
+
+    Returns
+    -------
+    solution_now : ConsIndShockBatchSolution
+        The solutions to the K single period consumption-saving problems.
+    '''
+    solver = ConsIndShockBatchSolver(solution_next,IncomeDstn,LivPrb,DiscFac,CRRA,Rfree,
+                                     PermGroFac,BoroCnstArt,aXtraGrid)
+    solver.prepareToSolve()
+    solution_now = solver.solve()
+    return solution_now
+
+
 ####################################################################################################
 ####################################################################################################
 
@@ -1636,6 +2108,7 @@ class PerfForesightConsumerType(AgentType):
         self.verbose        = verbose
         self.quiet          = quiet
         self.solveOnePeriod = solvePerfForesight # solver for perfect foresight model
+        self.cFuncPack      = None # compact copy of the consumption functions, see packSolution
 
 
     def preSolve(self):
@@ -1680,6 +2153,50 @@ class PerfForesightConsumerType(AgentType):
         self.solution_terminal.vPfunc  = MargValueFunc(self.cFunc_terminal_,self.CRRA)
         self.solution_terminal.vPPfunc = MargMargValueFunc(self.cFunc_terminal_,self.CRRA)
 
+    def postSolve(self):
+        '''
+        Discards the packed consumption functions made from any previous solution,
+        and packs the new solution if the attribute pack_solution is True.
+
+        Parameters
+        ----------
+        none
+
+        Returns
+        -------
+        none
+        '''
+        self.cFuncPack = None
+        if getattr(self,'pack_solution',False):
+            self.packSolution()
+
+    def packSolution(self):
+        '''
+        Stores the consumption functions of every period in self.solution in the
+        attribute cFuncPack, a LinearInterpPack holding all of their knots in
+        contiguous arrays.  When it exists, getControls evaluates consumption
+        for all agents in one pass over cFuncPack rather than period by period.
+        This saves the per-period overhead, so it is faster for populations of
+        up to tens of thousands of agents; for much larger ones, each agent's
+        search over all periods' knots costs about as much as is saved, and
+        packing gives no speedup.  The original interpolators can be recovered
+        with cFuncPack.unpack().  Only works when each cFunc is piecewise linear
+        (CubicBool = False).
+
+        Parameters
+        ----------
+        none
+
+        Returns
+        -------
+        none
+        '''
+        original_time = self.time_flow
+        self.timeFwd()
+        self.cFuncPack = LinearInterpPack([solution_t.cFunc for solution_t in self.solution])
+        if not original_time:
+            self.timeRev()
+
     def unpackcFunc(self):
         '''
         "Unpacks" the consumption functions into their own field for easier access.
@@ -1724,9 +2241,9 @@ class PerfForesightConsumerType(AgentType):
         '''
         # Get and store states for newly born agents
         N = np.sum(which_agents) # Number of new consumers to make
-        self.aNrmNow[which_agents] = drawLognormal(N,mu=self.aNrmInitMean,sigma=self.aNrmInitStd,seed=self.RNG.randint(0,2**31-1))
+        self.aNrmNow[which_agents] = drawLognormal(N,mu=self.aNrmInitMean,sigma=self.aNrmInitStd,seed=self.drawSeed(),dtype=self.sim_dtype)
         pLvlInitMeanNow = self.pLvlInitMean + np.log(self.PlvlAggNow) # Account for newer cohorts having higher permanent income
-        self.pLvlNow[which_agents] = drawLognormal(N,mu=pLvlInitMeanNow,sigma=self.pLvlInitStd,seed=self.RNG.randint(0,2**31-1))
+        self.pLvlNow[which_agents] = drawLognormal(N,mu=pLvlInitMeanNow,sigma=self.pLvlInitStd,seed=self.drawSeed(),dtype=self.sim_dtype)
         self.t_age[which_agents]   = 0 # How many periods since each agent was born
         self.t_cycle[which_agents] = 0 # Which period of the cycle each agent is currently in
         return None
@@ -1748,7 +2265,7 @@ class PerfForesightConsumerType(AgentType):
         # Determine who dies
         DiePrb_by_t_cycle = 1.0 - np.asarray(self.LivPrb)
         DiePrb = DiePrb_by_t_cycle[self.t_cycle-1] # Time has already advanced, so look back one
-        DeathShks = drawUniform(N=self.AgentCount,seed=self.RNG.randint(0,2**31-1))
+        DeathShks = drawUniform(N=self.AgentCount,seed=self.drawSeed())
         which_agents = DeathShks < DiePrb
         if self.T_age is not None: # Kill agents that have lived for too many periods
             too_old = self.t_age >= self.T_age
@@ -1770,8 +2287,8 @@ class PerfForesightConsumerType(AgentType):
         None
         '''
         PermGroFac = np.array(self.PermGroFac)
-        self.PermShkNow = PermGroFac[self.t_cycle-1] # cycle time has already been advanced
-        self.TranShkNow = np.ones(self.AgentCount)
+        self.PermShkNow = PermGroFac[self.t_cycle-1].astype(self.sim_dtype) # cycle time has already been advanced
+        self.TranShkNow = np.ones(self.AgentCount,dtype=self.sim_dtype)
 
     def getRfree(self):
         '''
@@ -1786,7 +2303,7 @@ class PerfForesightConsumerType(AgentType):
         RfreeNow : np.array
              Array of size self.AgentCount with risk free interest rate for each agent.
         '''
-        RfreeNow = self.Rfree*np.ones(self.AgentCount)
+        RfreeNow = self.Rfree*np.ones(self.AgentCount,dtype=self.sim_dtype)
         return RfreeNow
 
     def getStates(self):
@@ -1826,11 +2343,15 @@ class PerfForesightConsumerType(AgentType):
         -------
         None
         '''
-        cNrmNow = np.zeros(self.AgentCount) + np.nan
-        MPCnow  = np.zeros(self.AgentCount) + np.nan
-        for t in range(self.T_cycle):
-            these = t == self.t_cycle
-            cNrmNow[these], MPCnow[these] = self.solution[t].cFunc.eval_with_derivative(self.mNrmNow[these])
+        if getattr(self,'cFuncPack',None) is not None: # Evaluate all periods' cFuncs at once if possible
+            self.cNrmNow, self.MPCnow = self.cFuncPack.eval_with_derivative(self.t_cycle,self.mNrmNow)
+            return None
+
+        cNrmNow = np.zeros(self.AgentCount,dtype=self.sim_dtype) + np.nan
+        MPCnow  = np.zeros(self.AgentCount,dtype=self.sim_dtype) + np.nan
+        for t, these in enumerate(getGroupIndices(self.t_cycle,self.T_cycle)):
+            if these.size > 0:
+                cNrmNow[these], MPCnow[these] = self.solution[t].cFunc.eval_with_derivative(self.mNrmNow[these])
         self.cNrmNow = cNrmNow
         self.MPCnow = MPCnow
         return None
@@ -1979,6 +2500,7 @@ class IndShockConsumerType(PerfForesightConsumerType):
     time_inv_ = PerfForesightConsumerType.time_inv_ + ['BoroCnstArt','vFuncBool','CubicBool']
     time_inv_.remove('MaxKinks') # This is in the PerfForesight model but not ConsIndShock
     shock_vars_ = ['PermShkNow','TranShkNow']
+    histogram_method_ = True # Whether makeTransitionMatrix applies; see there
 
     def __init__(self,
                  cycles=1,
@@ -2039,9 +2561,112 @@ class IndShockConsumerType(PerfForesightConsumerType):
         self.PermShkDstn = PermShkDstn
         self.TranShkDstn = TranShkDstn
         self.addToTimeVary('IncomeDstn','PermShkDstn','TranShkDstn')
+        self.updateIncomeSampler(IncomeRows=IncomeDstn)
         if not original_time:
             self.timeRev()
 
+    def getIncomeRows(self):
+        '''
+        Returns the income distributions that make up the rows of the income
+        sampler's tables: one per period of the cycle, in forward time order.
+
+        Parameters
+        ----------
+        none
+
+        Returns
+        -------
+        IncomeRows : [[np.array]]
+            List of income distributions, each a list of probabilities,
+            permanent shocks and transitory shocks.
+        '''
+        return self.IncomeDstn if self.time_flow else self.IncomeDstn[::-1]
+
+    def updateIncomeSampler(self,IncomeRows=None):
+        '''
+        Makes padded tables of each income shock event's permanent and transitory
+        shocks, with one row per period of the cycle, a PackedSearch over the
+        cumulative distributions, and alias tables for drawing events.  Used by
+        getShocks, which draws every agent's event in one gather on t_cycle: from
+        the alias tables in 'generator' rng_mode, and by inverting the cumulative
+        distributions otherwise.  The tables are built when updateIncomeProcess
+        sets IncomeDstn, and getShocks rebuilds them if any distribution in
+        IncomeDstn has since been replaced; after editing an array of IncomeDstn
+        in place, call this method directly.  The alias tables are only rebuilt
+        when the probabilities have changed.
+
+        Parameters
+        ----------
+        IncomeRows : [[np.array]] or None
+            Income distributions for the rows of the tables; getIncomeRows() if None.
+
+        Returns
+        -------
+        none
+        '''
+        if IncomeRows is None:
+            IncomeRows = self.getIncomeRows()
+        ShkPrbs = [np.array(IncomeDstn_t[0],dtype=float).flatten() for IncomeDstn_t in IncomeRows]
+        self.IncomePermShkTable = stackRows([IncomeDstn_t[1] for IncomeDstn_t in IncomeRows], fill=1.0)
+        self.IncomeTranShkTable = stackRows([IncomeDstn_t[2] for IncomeDstn_t in IncomeRows], fill=1.0)
+        self.IncomeCutoffSearch = PackedSearch(np.concatenate([np.cumsum(P_t) for P_t in ShkPrbs]),
+                                               np.cumsum([0] + [P_t.size for P_t in ShkPrbs]),
+                                               buckets=4*self.IncomePermShkTable.shape[1])
+        self.IncomeSamplerRows = [[IncomeDstn_t] + list(IncomeDstn_t) for IncomeDstn_t in IncomeRows]
+        ShkPrbsOld = getattr(self,'IncomeShkPrbs',None)
+        if ShkPrbsOld is None or len(ShkPrbsOld) != len(ShkPrbs) or \
+                not all(np.array_equal(P_old,P_new) for P_old, P_new in zip(ShkPrbsOld,ShkPrbs)):
+            self.IncomeSampler = AliasSampler(ShkPrbs)
+            self.IncomeShkPrbs = ShkPrbs
+
+    def checkIncomeSampler(self):
+        '''
+        Rebuilds the income sampler's tables with updateIncomeSampler if IncomeDstn
+        has been reassigned, or any of its distributions or their arrays replaced,
+        since they were built.  Only compares object identities, so it is cheap
+        enough to call every simulated period.
+
+        Parameters
+        ----------
+        none
+
+        Returns
+        -------
+        none
+        '''
+        IncomeRows = self.getIncomeRows()
+        SamplerRows = getattr(self,'IncomeSamplerRows',None)
+        current = SamplerRows is not None and len(SamplerRows) == len(IncomeRows)
+        if current:
+            for Row, IncomeDstn_t in zip(SamplerRows,IncomeRows):
+                if Row[0] is not IncomeDstn_t or len(Row) != len(IncomeDstn_t) + 1 or \
+                        any(a is not b for a, b in zip(Row[1:],IncomeDstn_t)):
+                    current = False
+                    break
+        if not current:
+            self.updateIncomeSampler(IncomeRows)
+
+    def getIncomeEvents(self,rows,base_draws):
+        '''
+        Maps uniform draws to income shock events by inverting the cumulative
+        distribution in the given rows of the income sampler's tables, all at
+        once.  Gives the same events as drawDiscrete on each row separately.
+
+        Parameters
+        ----------
+        rows : np.array
+            Integer array with the row of each draw, as laid out by updateIncomeSampler.
+        base_draws : np.array
+            Uniform draws on [0,1), the same size as rows.
+
+        Returns
+        -------
+        EventDraws : np.array
+            Event index of each draw within its row.
+        '''
+        pos = self.IncomeCutoffSearch(rows,base_draws) - self.IncomeCutoffSearch.bounds[rows]
+        return np.minimum(pos,self.IncomeSampler.size[rows]-1)
+
     def updateAssetsGrid(self):
         '''
         Updates this agent's end-of-period assets grid by constructing a multi-
@@ -2075,6 +2700,118 @@ class IndShockConsumerType(PerfForesightConsumerType):
         self.updateAssetsGrid()
         self.updateSolutionTerminal()
 
+    def solveBatch(self,DiscFac=None,CRRA=None,verbose=False):
+        '''
+        Solves this type's model for many values of DiscFac and/or CRRA at once,
+        without changing self.solution.  All K parameterizations are solved
+        together by ConsIndShockBatchSolver, so each period's endogenous grid
+        step is a single stacked array operation rather than K separate solves.
+        In an infinite horizon model, each parameterization stops iterating as
+        soon as it meets the convergence criterion, exactly as in solve().
+
+        Only available for linear interpolation without the value function
+        (CubicBool = vFuncBool = False).
+
+        Parameters
+        ----------
+        DiscFac : float or np.array
+            Intertemporal discount factor(s) to solve for; defaults to self.DiscFac.
+        CRRA : float or np.array
+            Coefficient(s) of relative risk aversion to solve for; defaults to self.CRRA.
+            Broadcast against DiscFac to make K parameterizations.
+        verbose : boolean
+            If True, solution progress is printed to screen.
+
+        Returns
+        -------
+        solutions : [[ConsumerSolution]]
+            A list of length K, each element of which is a list of one period
+            solutions in the same order and format as self.solution after solve().
+        '''
+        if self.CubicBool or self.vFuncBool:
+            raise Exception('solveBatch only supports linear interpolation without the value ' +
+                            'function; set CubicBool and vFuncBool to False.')
+        DiscFac, CRRA = np.broadcast_arrays(
+                np.atleast_1d(np.array(self.DiscFac if DiscFac is None else DiscFac, dtype=float)),
+                np.atleast_1d(np.array(self.CRRA if CRRA is None else CRRA, dtype=float)))
+        K = DiscFac.size
+
+        # Make the terminal solution, both compactly and as ConsumerSolutions
+        terminal = self.solution_terminal
+        solution_terminal = ConsIndShockBatchSolution(np.tile(self.cFunc_terminal_.x_list,(K,1)),
+                                                      np.tile(self.cFunc_terminal_.y_list,(K,1)),
+                                                      np.zeros(K) + terminal.mNrmMin,
+                                                      np.zeros(K) + terminal.hNrm,
+                                                      np.zeros(K) + terminal.MPCmin,
+                                                      np.zeros(K) + terminal.MPCmax)
+        solutions = [[] for k in range(K)]
+        if not self.pseudo_terminal:
+            for k in range(K):
+                solution_k = deepcopy(terminal)
+                solution_k.vPfunc  = MargValueFunc(self.cFunc_terminal_,CRRA[k])
+                solution_k.vPPfunc = MargMargValueFunc(self.cFunc_terminal_,CRRA[k])
+                solution_k.vFunc   = ValueFunc(self.cFunc_terminal_,CRRA[k])
+                solutions[k].append(solution_k)
+
+        original_time_flow = self.time_flow
+        self.timeRev()
+        T                = len(self.IncomeDstn)
+        cycles_left      = self.cycles
+        infinite_horizon = cycles_left == 0
+        max_cycles       = 5000 # escape clause, as in solveAgent
+        active           = np.arange(K) # parameterizations still being iterated
+        solution_last    = solution_terminal
+        completed_cycles = 0
+        go               = True
+        if verbose:
+            t_last = time()
+        with np.errstate(divide='ignore', over='ignore', under='ignore', invalid='ignore'):
+            while go:
+                # Solve a cycle of the model for all active parameterizations
+                solution_cycle = []
+                solution_next  = solution_last
+                for t in range(T):
+                    solution_next = solveConsIndShockBatch(solution_next,self.IncomeDstn[t],
+                                        self.LivPrb[t],DiscFac[active],CRRA[active],self.Rfree,
+                                        self.PermGroFac[t],self.BoroCnstArt,self.aXtraGrid)
+                    solution_cycle.append(solution_next)
+                solution_now = solution_cycle[-1]
+
+                # Record solutions, dropping parameterizations that have converged
+                if infinite_horizon:
+                    if completed_cycles > 0:
+                        distance = solution_now.distanceEach(solution_last)
+                        done = np.logical_or(distance <= self.tolerance,completed_cycles >= max_cycles)
+                    else: # Assume solution does not converge after only one cycle
+                        done = np.zeros(active.size,dtype=bool)
+                    for j in np.where(done)[0]:
+                        k = active[j]
+                        solutions[k] = [solution_t.makeConsumerSolution(j,CRRA[k]) for solution_t in solution_cycle]
+                    active        = active[np.logical_not(done)]
+                    solution_last = solution_now.select(np.logical_not(done))
+                    go            = active.size > 0
+                else:
+                    for j in range(active.size):
+                        k = active[j]
+                        solutions[k] += [solution_t.makeConsumerSolution(j,CRRA[k]) for solution_t in solution_cycle]
+                    solution_last = solution_now
+                    cycles_left  += -1
+                    go            = cycles_left > 0
+                completed_cycles += 1
+
+                if verbose:
+                    t_now = time()
+                    print('Finished cycle #' + str(completed_cycles) + ' in ' + str(t_now-t_last) +
+                          ' seconds, ' + str(active.size) + ' of ' + str(K) + ' parameterizations still active.')
+                    t_last = t_now
+
+        # Restore the direction of time and put the solutions in the same order
+        if original_time_flow:
+            self.timeFwd()
+            for solution_k in solutions:
+                solution_k.reverse()
+        return solutions
+
     def getShocks(self):
         '''
         Gets permanent and transitory income shocks for this period.  Samples from IncomeDstn for
@@ -2088,33 +2825,32 @@ class IndShockConsumerType(PerfForesightConsumerType):
         -------
         None
         '''
-        PermShkNow = np.zeros(self.AgentCount) # Initialize shock arrays
-        TranShkNow = np.zeros(self.AgentCount)
+        PermShkNow = np.zeros(self.AgentCount,dtype=self.sim_dtype) # Initialize shock arrays
+        TranShkNow = np.zeros(self.AgentCount,dtype=self.sim_dtype)
         newborn = self.t_age == 0
-        for t in range(self.T_cycle):
-            these = t == self.t_cycle
-            N = np.sum(these)
+        # Each agent draws from the previous period of the cycle, except newborns,
+        # who use the first period in the sequence.  Approximation.
+        rows = (self.t_cycle - 1) % self.T_cycle
+        rows[newborn] = 0
+        self.checkIncomeSampler()
+        if self.rng_mode == 'generator':
+            # Draw every agent's income event from the alias tables in one pass
+            EventDraws = self.IncomeSampler.draw(rows=rows,seed=self.drawSeed())
+        else:
+            # Draw one vector of uniforms per period of the cycle, in the same order
+            # and with the same seeds as drawing period by period, then redraw for
+            # newborns; map every agent's draw through its own period's cumulative
+            # distribution in one pass
+            base_draws = np.zeros(self.AgentCount)
+            for these in getGroupIndices(self.t_cycle,self.T_cycle):
+                if these.size > 0:
+                    base_draws[these] = drawUniform(these.size,seed=self.drawSeed())
+            N = np.sum(newborn)
             if N > 0:
-                IncomeDstnNow    = self.IncomeDstn[t-1] # set current income distribution
-                PermGroFacNow    = self.PermGroFac[t-1] # and permanent growth factor
-                Indices          = np.arange(IncomeDstnNow[0].size) # just a list of integers
-                # Get random draws of income shocks from the discrete distribution
-                EventDraws       = drawDiscrete(N,X=Indices,P=IncomeDstnNow[0],exact_match=False,seed=self.RNG.randint(0,2**31-1))
-                PermShkNow[these] = IncomeDstnNow[1][EventDraws]*PermGroFacNow # permanent "shock" includes expected growth
-                TranShkNow[these] = IncomeDstnNow[2][EventDraws]
-
-        # That procedure used the *last* period in the sequence for newborns, but that's not right
-        # Redraw shocks for newborns, using the *first* period in the sequence.  Approximation.
-        N = np.sum(newborn)
-        if N > 0:
-            these = newborn
-            IncomeDstnNow    = self.IncomeDstn[0] # set current income distribution
-            PermGroFacNow    = self.PermGroFac[0] # and permanent growth factor
-            Indices          = np.arange(IncomeDstnNow[0].size) # just a list of integers
-            # Get random draws of income shocks from the discrete distribution
-            EventDraws       = drawDiscrete(N,X=Indices,P=IncomeDstnNow[0],exact_match=False,seed=self.RNG.randint(0,2**31-1))
-            PermShkNow[these] = IncomeDstnNow[1][EventDraws]*PermGroFacNow # permanent "shock" includes expected growth
-            TranShkNow[these] = IncomeDstnNow[2][EventDraws]
+                base_draws[newborn] = drawUniform(N,seed=self.drawSeed())
+            EventDraws = self.getIncomeEvents(rows,base_draws)
+        PermShkNow[:] = self.IncomePermShkTable[rows,EventDraws]*np.asarray(self.PermGroFac)[rows] # permanent "shock" includes expected growth
+        TranShkNow[:] = self.IncomeTranShkTable[rows,EventDraws]
 #        PermShkNow[newborn] = 1.0
         TranShkNow[newborn] = 1.0
 
@@ -2125,6 +2861,154 @@ class IndShockConsumerType(PerfForesightConsumerType):
         self.TranShkNow = TranShkNow
 
 
+    def makeInitAssetsDstn(self,N=7):
+        '''
+        Makes a discrete approximation to the distribution of normalized assets
+        that agents are born with, given by aNrmInitMean and aNrmInitStd.
+
+        Parameters
+        ----------
+        N : int
+            Number of points in the approximation.
+
+        Returns
+        -------
+        aInitPrbs : np.array
+            Probability of each point.
+        aInitVals : np.array
+            Normalized assets at each point.
+        '''
+        if self.aNrmInitStd > 0.0:
+            aInitPrbs, aInitVals = approxLognormal(N,mu=self.aNrmInitMean,sigma=self.aNrmInitStd)
+        else:
+            aInitPrbs, aInitVals = np.array([1.0]), np.array([np.exp(self.aNrmInitMean)])
+        return aInitPrbs, aInitVals
+
+    def getRfreeFromAssets(self,aNrm):
+        '''
+        Returns the interest factor earned on each given level of end-of-period
+        normalized assets, for the histogram method (see makeTransitionMatrix).
+
+        Parameters
+        ----------
+        aNrm : np.array
+            End-of-period normalized assets.
+
+        Returns
+        -------
+        RfreeNow : np.array
+            Interest factor on each element of aNrm.
+        '''
+        return self.Rfree*np.ones_like(aNrm)
+
+    def makeTransitionMatrix(self,mXtraGrid=None,mCount=500):
+        '''
+        Builds the sparse matrix of transitions between the points of a grid of
+        normalized market resources, for finding the ergodic distribution with
+        the histogram method rather than by simulation.  From each gridpoint,
+        end-of-period assets follow from the solved consumption function, and
+        next period's market resources for each income shock in IncomeDstn are
+        split between the two nearest gridpoints.  Also makes the distribution
+        of newborns over the grid.  Only for infinite horizon models with one
+        period in the cycle; T_age is ignored.  The interest factor on assets
+        comes from getRfreeFromAssets.  Subclasses whose consumption function
+        depends on more than market resources set histogram_method_ to False.
+
+        Parameters
+        ----------
+        mXtraGrid : np.array or None
+            Grid of market resources above the minimum mNrmMin.  If None, it is
+            multi-exponentially spaced from 0 to aXtraMax.
+        mCount : int
+            Number of gridpoints when mXtraGrid is None.
+
+        Returns
+        -------
+        None
+        '''
+        if not self.histogram_method_:
+            raise ValueError('The histogram method is not implemented for ' + self.__class__.__name__ + '!')
+        if self.cycles != 0 or self.T_cycle != 1:
+            raise ValueError('The histogram method is only implemented for infinite horizon models with one period in the cycle!')
+        if mXtraGrid is None:
+            mXtraGrid = makeGridExpMult(0.0,self.aXtraMax,mCount,timestonest=3)
+        solution = self.solution[0]
+        mGrid = solution.mNrmMin + mXtraGrid
+        cNrm = solution.cFunc(mGrid)
+        aNrm = mGrid - cNrm
+        n = mGrid.size
+
+        # Next period's market resources from each gridpoint for each shock
+        ShkPrbs, PermShkVals, TranShkVals = self.IncomeDstn[0][0:3]
+        PermShkVals = PermShkVals*self.PermGroFac[0] # permanent "shock" includes expected growth
+        mNext = aNrm[:,np.newaxis]*self.getRfreeFromAssets(aNrm)[:,np.newaxis]/PermShkVals + TranShkVals
+        source = np.repeat(np.arange(n),ShkPrbs.size)
+        self.TranMatrix = makeLotteryMatrix(mXtraGrid,mNext.flatten()-solution.mNrmMin,
+                                            np.tile(ShkPrbs,n),source,n)
+
+        # Newborns get a permanent shock but no transitory shock, as in getShocks
+        aInitPrbs, aInitVals = self.makeInitAssetsDstn()
+        mBirth = aInitVals[:,np.newaxis]*self.getRfreeFromAssets(aInitVals)[:,np.newaxis]/PermShkVals + 1.0
+        BirthMatrix = makeLotteryMatrix(mXtraGrid,mBirth.flatten()-solution.mNrmMin,
+                                        np.outer(aInitPrbs,ShkPrbs).flatten(),np.zeros(mBirth.size,dtype=int),1)
+        self.BirthDist = BirthMatrix.toarray().flatten()
+        self.dist_mGrid = mGrid
+        self.dist_cNrm = cNrm
+        self.dist_LivPrb = self.LivPrb[0]*np.ones(n)
+
+    def calcErgodicDist(self,mXtraGrid=None,mCount=500):
+        '''
+        Finds the ergodic distribution of normalized market resources with the
+        histogram method: makes the transition matrix with makeTransitionMatrix,
+        then solves for its fixed point with findErgodicDist.  There is no
+        sampling noise, so unlike a simulation, a small change in parameters
+        gives a smooth change in the distribution.
+
+        Parameters
+        ----------
+        mXtraGrid : np.array or None
+            Grid of market resources above the minimum; see makeTransitionMatrix.
+        mCount : int
+            Number of gridpoints when mXtraGrid is None.
+
+        Returns
+        -------
+        ergodic_dist : np.array
+            Probability mass at each point of self.dist_mGrid.
+        '''
+        self.makeTransitionMatrix(mXtraGrid,mCount)
+        self.ergodic_dist = findErgodicDist(self.TranMatrix,LivPrb=self.dist_LivPrb,birth_dist=self.BirthDist)
+        return self.ergodic_dist
+
+    def getErgodicStats(self,percentiles=[0.2,0.4,0.6,0.8]):
+        '''
+        Calculates aggregates of the ergodic distribution found by calcErgodicDist
+        (which is run first if needed): the means of normalized market resources,
+        consumption and assets, and percentiles and Lorenz shares of normalized
+        assets.
+
+        Parameters
+        ----------
+        percentiles : [float]
+            Points in (0,1) at which to report percentiles and Lorenz shares.
+
+        Returns
+        -------
+        stats : dict
+            Dictionary with keys 'mNrm', 'cNrm' and 'aNrm' (means), 'aNrmPctl'
+            and 'aNrmLorenz'.
+        '''
+        if not hasattr(self,'ergodic_dist'):
+            self.calcErgodicDist()
+        dist = self.ergodic_dist
+        aNrm = self.dist_mGrid - self.dist_cNrm
+        order = np.argsort(aNrm,kind='stable')
+        return {'mNrm': np.dot(dist,self.dist_mGrid),
+                'cNrm': np.dot(dist,self.dist_cNrm),
+                'aNrm': np.dot(dist,aNrm),
+                'aNrmPctl': getPercentiles(aNrm[order],weights=dist[order],percentiles=percentiles,presorted=True),
+                'aNrmLorenz': getLorenzShares(aNrm[order],weights=dist[order],percentiles=percentiles,presorted=True)}
+
     def calcBoundingValues(self):
         '''
         Calculate human wealth plus minimum and maximum MPC in an infinite
@@ -2250,6 +3134,74 @@ class IndShockConsumerType(PerfForesightConsumerType):
         if not self.quiet:
             self.checkConditions(verbose=self.verbose,public_call=False)
 
+    def getSolutionVector(self,solution):
+        '''
+        Returns the knots of the unconstrained consumption function together with
+        human wealth, the bounding MPCs and the minimum market resources, which are
+        all that next period's solution contributes to this period's solution when
+        the consumption function is linear and there is no value function.  Used
+        to accelerate infinite horizon convergence (see HARK.core.solveAgent).
+
+        Parameters
+        ----------
+        solution : ConsumerSolution
+            A one period solution.
+
+        Returns
+        -------
+        vector : np.array or None
+            The array [mNrm knots, cNrm knots, hNrm, MPCmin, MPCmax, mNrmMin], or
+            None if the solution does not have this form.
+        '''
+        if self.CubicBool or self.vFuncBool:
+            return None
+        cFunc = getattr(solution,'cFunc',None)
+        if not isinstance(cFunc,LowerEnvelope) or len(cFunc.functions) != 2:
+            return None
+        cFuncUnc, cFuncCnst = cFunc.functions
+        if not (isinstance(cFuncUnc,LinearInterp) and isinstance(cFuncCnst,LinearInterp)) or cFuncCnst.x_n != 2:
+            return None
+        return np.concatenate((cFuncUnc.x_list, cFuncUnc.y_list,
+                               [solution.hNrm, solution.MPCmin, solution.MPCmax, solution.mNrmMin]))
+
+    def makeSolutionFromVector(self,solution,vector):
+        '''
+        Makes a solution from an array in the form returned by getSolutionVector,
+        to be used as next period's solution.
+
+        Parameters
+        ----------
+        solution : ConsumerSolution
+            A one period solution of the same form; its unconstrained consumption
+            function tells whether the new one should have decay extrapolation.
+        vector : np.array
+            The array representation of the new solution.
+
+        Returns
+        -------
+        solution_new : ConsumerSolution or None
+            The new solution, or None if vector is not a valid solution: the
+            knots must be increasing in market resources, consumption must be
+            positive above the first knot, and the MPC bounds must be in (0,1].
+        '''
+        N = (vector.size - 4)//2
+        mNrm = vector[:N]
+        cNrm = vector[N:(2*N)]
+        hNrm, MPCmin, MPCmax, mNrmMin = vector[(2*N):]
+        if np.any(np.diff(mNrm) <= 0.) or np.any(cNrm[1:] <= 0.) or not (0. < MPCmin <= MPCmax <= 1.):
+            return None
+        if solution.cFunc.functions[0].decay_extrap:
+            intercept_limit = MPCmin*hNrm
+            if intercept_limit + MPCmin*mNrm[-1] - cNrm[-1] <= 0.:
+                return None
+            cFuncUnc = LinearInterp(mNrm,cNrm,intercept_limit,MPCmin)
+        else:
+            cFuncUnc = LinearInterp(mNrm,cNrm)
+        cFuncCnst = LinearInterp(np.array([mNrmMin, mNrmMin+1]),np.array([0.0, 1.0]))
+        cFunc = LowerEnvelope(cFuncUnc,cFuncCnst)
+        return ConsumerSolution(cFunc=cFunc, vPfunc=MargValueFunc(cFunc,self.CRRA), mNrmMin=mNrmMin,
+                                hNrm=hNrm, MPCmin=MPCmin, MPCmax=MPCmax)
+
     def checkConditions(self,verbose=False,public_call=True):
         '''
         This method checks whether the instance's type satisfies the Growth Impatience Condition
@@ -2474,6 +3426,25 @@ class KinkedRconsumerType(IndShockConsumerType):
         RfreeNow[self.aNrmNow > 0] = self.Rsave
         return RfreeNow
 
+    def getRfreeFromAssets(self,aNrm):
+        '''
+        Returns Rboro or Rsave for each given level of end-of-period normalized
+        assets, based on whether it is >< 0, for the histogram method.
+
+        Parameters
+        ----------
+        aNrm : np.array
+            End-of-period normalized assets.
+
+        Returns
+        -------
+        RfreeNow : np.array
+            Interest factor on each element of aNrm.
+        '''
+        RfreeNow = self.Rboro*np.ones_like(aNrm)
+        RfreeNow[aNrm > 0] = self.Rsave
+        return RfreeNow
+
     def checkConditions(self,verbose=False):
         '''
         This method checks whether the instance's type satisfies the Growth Impatience Condition
@@ -12,10 +12,11 @@ import numpy as np
 from HARK import AgentType
 from HARK.ConsumptionSaving.ConsIndShockModel import ConsIndShockSolver, ValueFunc, \
                              MargValueFunc, ConsumerSolution, IndShockConsumerType
-from HARK.simulation import drawDiscrete, drawUniform
-from HARK.interpolation import CubicInterp, LowerEnvelope, LinearInterp
+from HARK.simulation import drawUniform
+from HARK.interpolation import CubicInterp, LowerEnvelope, LinearInterp, LinearInterpPack, PackedSearch
 from HARK.utilities import CRRAutility, CRRAutilityP, CRRAutilityPP, CRRAutilityP_inv, \
-                           CRRAutility_invP, CRRAutility_inv, CRRAutilityP_invP
+                           CRRAutility_invP, CRRAutility_inv, CRRAutilityP_invP, getGroupIndices, \
+                           makeGridExpMult, makeLotteryMatrix
 
 utility       = CRRAutility
 utilityP      = CRRAutilityP
@@ -764,10 +765,29 @@ class MarkovConsumerType(IndShockConsumerType):
         self.solution_terminal.MPCmax  = np.ones(StateCount)
         self.solution_terminal.MPCmin  = np.ones(StateCount)
 
+    def getIncomeRows(self):
+        '''
+        Returns the income distributions that make up the rows of the income
+        sampler's tables: one per (period, Markov state) pair, so that the row
+        for period t and state j is t*StateCount + j.
+
+        Parameters
+        ----------
+        none
+
+        Returns
+        -------
+        IncomeRows : [[np.array]]
+            List of income distributions, each a list of probabilities,
+            permanent shocks and transitory shocks.
+        '''
+        IncomeDstn = self.IncomeDstn if self.time_flow else self.IncomeDstn[::-1]
+        return [IncomeDstn_tj for IncomeDstn_t in IncomeDstn for IncomeDstn_tj in IncomeDstn_t]
+
     def initializeSim(self):
         IndShockConsumerType.initializeSim(self)
         if self.global_markov:  #Need to initialize markov state to be the same for all agents
-            base_draw = drawUniform(1,seed=self.RNG.randint(0,2**31-1))
+            base_draw = drawUniform(1,seed=self.drawSeed())
             Cutoffs = np.cumsum(np.array(self.MrkvPrbsInit))
             self.MrkvNow = np.ones(self.AgentCount)*np.searchsorted(Cutoffs,base_draw).astype(int)
         self.MrkvNow = self.MrkvNow.astype(int)
@@ -789,7 +809,7 @@ class MarkovConsumerType(IndShockConsumerType):
         # Determine who dies
         LivPrb = np.array(self.LivPrb)[self.t_cycle-1,self.MrkvNow] # Time has already advanced, so look back one
         DiePrb = 1.0 - LivPrb
-        DeathShks = drawUniform(N=self.AgentCount,seed=self.RNG.randint(0,2**31-1))
+        DeathShks = drawUniform(N=self.AgentCount,seed=self.drawSeed())
         which_agents = DeathShks < DiePrb
         if self.T_age is not None: # Kill agents that have lived for too many periods
             too_old = self.t_age >= self.T_age
@@ -813,7 +833,7 @@ class MarkovConsumerType(IndShockConsumerType):
         IndShockConsumerType.simBirth(self,which_agents) # Get initial assets and permanent income
         if not self.global_markov:  #Markov state is not changed if it is set at the global level
             N = np.sum(which_agents)
-            base_draws = drawUniform(N,seed=self.RNG.randint(0,2**31-1))
+            base_draws = drawUniform(N,seed=self.drawSeed())
             Cutoffs = np.cumsum(np.array(self.MrkvPrbsInit))
             self.MrkvNow[which_agents] = np.searchsorted(Cutoffs,base_draws).astype(int)
 
@@ -832,36 +852,43 @@ class MarkovConsumerType(IndShockConsumerType):
         '''
         # Get new Markov states for each agent
         if self.global_markov:
-            base_draws = np.ones(self.AgentCount)*drawUniform(1,seed=self.RNG.randint(0,2**31-1))
+            base_draws = np.ones(self.AgentCount)*drawUniform(1,seed=self.drawSeed())
         else:
             base_draws = self.RNG.permutation(np.arange(self.AgentCount,dtype=float)/self.AgentCount + 1.0/(2*self.AgentCount))
         newborn = self.t_age == 0 # Don't change Markov state for those who were just born (unless global_markov)
         MrkvPrev = self.MrkvNow
-        MrkvNow = np.zeros(self.AgentCount,dtype=int)
-        for t in range(self.T_cycle):
-            Cutoffs = np.cumsum(self.MrkvArray[t],axis=1)
-            for j in range(self.MrkvArray[t].shape[0]):
-                these = np.logical_and(self.t_cycle == t,MrkvPrev == j)
-                MrkvNow[these] = np.searchsorted(Cutoffs[j,:],base_draws[these]).astype(int)
+        StateCount = self.MrkvArray[0].shape[0]
+        # Stack the cumulative transition probabilities into a (T_cycle,StateCount,StateCount)
+        # table and find every agent's next state in its own row of the table at once
+        Cutoffs = np.cumsum(np.array(self.MrkvArray),axis=2).flatten()
+        CutoffSearch = PackedSearch(Cutoffs,StateCount*np.arange(Cutoffs.size//StateCount + 1),buckets=4*StateCount)
+        rows = self.t_cycle*StateCount + MrkvPrev
+        MrkvNow = CutoffSearch(rows,base_draws) - rows*StateCount
         if not self.global_markov:
                 MrkvNow[newborn] = MrkvPrev[newborn]
         self.MrkvNow = MrkvNow.astype(int)
 
         # Now get income shocks for each consumer, by cycle-time and discrete state
-        PermShkNow = np.zeros(self.AgentCount) # Initialize shock arrays
-        TranShkNow = np.zeros(self.AgentCount)
-        for t in range(self.T_cycle):
-            for j in range(self.MrkvArray[t].shape[0]):
-                these = np.logical_and(t == self.t_cycle, j == MrkvNow)
-                N = np.sum(these)
-                if N > 0:
-                    IncomeDstnNow    = self.IncomeDstn[t-1][j] # set current income distribution
-                    PermGroFacNow    = self.PermGroFac[t-1][j] # and permanent growth factor
-                    Indices          = np.arange(IncomeDstnNow[0].size) # just a list of integers
-                    # Get random draws of income shocks from the discrete distribution
-                    EventDraws       = drawDiscrete(N,X=Indices,P=IncomeDstnNow[0],exact_match=False,seed=self.RNG.randint(0,2**31-1))
-                    PermShkNow[these] = IncomeDstnNow[1][EventDraws]*PermGroFacNow # permanent "shock" includes expected growth
-                    TranShkNow[these] = IncomeDstnNow[2][EventDraws]
+        PermShkNow = np.zeros(self.AgentCount,dtype=self.sim_dtype) # Initialize shock arrays
+        TranShkNow = np.zeros(self.AgentCount,dtype=self.sim_dtype)
+        t_prev = self.t_cycle - 1
+        t_prev[t_prev < 0] = self.T_cycle - 1
+        rows = t_prev*StateCount + MrkvNow
+        self.checkIncomeSampler()
+        if self.rng_mode == 'generator':
+            # Draw every agent's income event from the alias tables in one pass
+            EventDraws = self.IncomeSampler.draw(rows=rows,seed=self.drawSeed())
+        else:
+            # Draw one vector of uniforms per (period, state) pair, in the same order and
+            # with the same seeds as drawing pair by pair, then map every agent's draw
+            # through its own pair's cumulative distribution in one pass
+            base_draws = np.zeros(self.AgentCount)
+            for these in getGroupIndices(self.t_cycle*StateCount + MrkvNow,self.T_cycle*StateCount):
+                if these.size > 0:
+                    base_draws[these] = drawUniform(these.size,seed=self.drawSeed())
+            EventDraws = self.getIncomeEvents(rows,base_draws)
+        PermShkNow[:] = self.IncomePermShkTable[rows,EventDraws]*np.array(self.PermGroFac).flatten()[rows] # permanent "shock" includes expected growth
+        TranShkNow[:] = self.IncomeTranShkTable[rows,EventDraws]
         newborn = self.t_age == 0
         PermShkNow[newborn] = 1.0
         TranShkNow[newborn] = 1.0
@@ -883,6 +910,78 @@ class MarkovConsumerType(IndShockConsumerType):
         IndShockConsumerType.readShocks(self)
         self.MrkvNow = self.MrkvNow.astype(int)
 
+    def makeTransitionMatrix(self,mXtraGrid=None,mCount=500):
+        '''
+        Builds the sparse matrix of transitions between (Markov state, market
+        resources) gridpoints for the histogram method; see the method of the
+        same name in IndShockConsumerType.  Each state has its own copy of the
+        grid, starting at that state's mNrmMin; the points for state j come
+        j-th in self.dist_mGrid.  Agents die with the survival probability of
+        their previous state, then move to a new state and draw income shocks
+        from that state's distribution.  Newborns draw their state from
+        MrkvPrbsInit and get no income shocks, as in the simulation.
+
+        Parameters
+        ----------
+        mXtraGrid : np.array or None
+            Grid of market resources above each state's minimum.  If None, it
+            is multi-exponentially spaced from 0 to aXtraMax.
+        mCount : int
+            Number of gridpoints per state when mXtraGrid is None.
+
+        Returns
+        -------
+        None
+        '''
+        if not self.histogram_method_:
+            raise ValueError('The histogram method is not implemented for ' + self.__class__.__name__ + '!')
+        if self.cycles != 0 or self.T_cycle != 1:
+            raise ValueError('The histogram method is only implemented for infinite horizon models with one period in the cycle!')
+        if self.global_markov:
+            raise ValueError('The histogram method does not apply when all agents share one Markov state!')
+        if mXtraGrid is None:
+            mXtraGrid = makeGridExpMult(0.0,self.aXtraMax,mCount,timestonest=3)
+        solution = self.solution[0]
+        MrkvArray = self.MrkvArray[0]
+        StateCount = MrkvArray.shape[0]
+        n = mXtraGrid.size
+        mGrid = [solution.mNrmMin[j] + mXtraGrid for j in range(StateCount)]
+        cNrm = [solution.cFunc[j](mGrid[j]) for j in range(StateCount)]
+
+        # Collect next period's market resources from each gridpoint for each
+        # (next state, income shock) pair, then place them all at once
+        mNext, prob, source, dest = [], [], [], []
+        for j in range(StateCount):
+            aNrm = mGrid[j] - cNrm[j]
+            for k in range(StateCount):
+                if MrkvArray[j,k] == 0.0:
+                    continue
+                ShkPrbs, PermShkVals, TranShkVals = self.IncomeDstn[0][k][0:3]
+                PermShkVals = PermShkVals*self.PermGroFac[0][k] # permanent "shock" includes expected growth
+                mNext_jk = aNrm[:,np.newaxis]*self.Rfree[k]/PermShkVals + TranShkVals
+                mNext.append(mNext_jk.flatten() - solution.mNrmMin[k])
+                prob.append(MrkvArray[j,k]*np.tile(ShkPrbs,n))
+                source.append(j*n + np.repeat(np.arange(n),ShkPrbs.size))
+                dest.append(k*n*np.ones(mNext_jk.size,dtype=int))
+        self.TranMatrix = makeLotteryMatrix(mXtraGrid,np.concatenate(mNext),np.concatenate(prob),
+                                            np.concatenate(source),StateCount*n,
+                                            dest_offset=np.concatenate(dest),dest_count=StateCount*n)
+
+        # Newborns' market resources are their initial assets plus income of 1
+        aInitPrbs, aInitVals = self.makeInitAssetsDstn()
+        MrkvPrbsInit = np.array(self.MrkvPrbsInit)
+        Rfree = np.asarray(self.Rfree)
+        mNrmMin = np.asarray(solution.mNrmMin)
+        mBirth = (aInitVals[np.newaxis,:]*Rfree[:,np.newaxis] + 1.0 - mNrmMin[:,np.newaxis]).flatten()
+        BirthMatrix = makeLotteryMatrix(mXtraGrid,mBirth,np.outer(MrkvPrbsInit,aInitPrbs).flatten(),
+                                        np.zeros(mBirth.size,dtype=int),1,
+                                        dest_offset=np.repeat(np.arange(StateCount)*n,aInitVals.size),
+                                        dest_count=StateCount*n)
+        self.BirthDist = BirthMatrix.toarray().flatten()
+        self.dist_mGrid = np.concatenate(mGrid)
+        self.dist_cNrm = np.concatenate(cNrm)
+        self.dist_LivPrb = np.repeat(self.LivPrb[0],n)
+
     def getRfree(self):
         '''
         Returns an array of size self.AgentCount with interest factor that varies with discrete state.
@@ -896,9 +995,37 @@ class MarkovConsumerType(IndShockConsumerType):
         RfreeNow : np.array
              Array of size self.AgentCount with risk free interest rate for each agent.
         '''
-        RfreeNow = self.Rfree[self.MrkvNow]
+        RfreeNow = np.asarray(self.Rfree,dtype=self.sim_dtype)[self.MrkvNow]
         return RfreeNow
 
+    def packSolution(self):
+        '''
+        Stores the state-conditional consumption functions of every period in
+        the attribute cFuncPack, a LinearInterpPack in which the function for
+        period t and Markov state j has index t*StateCount + j.  When it exists,
+        getControls evaluates consumption for all agents in one pass, which is
+        faster for populations of up to tens of thousands of agents but not for
+        much larger ones (see IndShockConsumerType.packSolution).  Only works
+        when each cFunc is piecewise linear (CubicBool = False).
+
+        Parameters
+        ----------
+        none
+
+        Returns
+        -------
+        none
+        '''
+        original_time = self.time_flow
+        self.timeFwd()
+        cFuncs = [solution_t.cFunc[j] for solution_t in self.solution[:self.T_cycle]
+                  for j in range(len(solution_t.cFunc))]
+        if len(cFuncs) != self.T_cycle*max([MrkvArray.shape[0] for MrkvArray in self.MrkvArray]):
+            raise Exception('packSolution requires the same number of Markov states in every period.')
+        self.cFuncPack = LinearInterpPack(cFuncs)
+        if not original_time:
+            self.timeRev()
+
     def getControls(self):
         '''
         Calculates consumption for each consumer of this type using the consumption functions.
@@ -911,11 +1038,20 @@ class MarkovConsumerType(IndShockConsumerType):
         -------
         None
         '''
-        cNrmNow = np.zeros(self.AgentCount) + np.nan
+        StateCount = max([MrkvArray.shape[0] for MrkvArray in self.MrkvArray])
+        if getattr(self,'cFuncPack',None) is not None: # Evaluate all (t,j) cFuncs at once if possible
+            self.cNrmNow = self.cFuncPack(self.t_cycle*StateCount + self.MrkvNow,self.mNrmNow)
+            return None
+
+        cNrmNow = np.zeros(self.AgentCount,dtype=self.sim_dtype) + np.nan
+
+        # Group agents by (period of cycle, Markov state) with a single sort
+        groups = getGroupIndices(self.t_cycle*StateCount + self.MrkvNow, self.T_cycle*StateCount)
         for t in range(self.T_cycle):
             for j in range(self.MrkvArray[t].shape[0]):
-                these = np.logical_and(t == self.t_cycle, j == self.MrkvNow)
-                cNrmNow[these] = self.solution[t].cFunc[j](self.mNrmNow[these])
+                these = groups[t*StateCount + j]
+                if these.size > 0:
+                    cNrmNow[these] = self.solution[t].cFunc[j](self.mNrmNow[these])
         self.cNrmNow = cNrmNow
         return None
 
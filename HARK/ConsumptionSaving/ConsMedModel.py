@@ -7,14 +7,14 @@ from builtins import str
 from builtins import range
 import numpy as np
 from scipy.optimize import brentq
-from HARK import HARKobject
+from HARK import HARKobject, profileStage
 from HARK.utilities import approxLognormal, addDiscreteOutcomeConstantMean, CRRAutilityP_inv,\
                            CRRAutility, CRRAutility_inv, CRRAutility_invP, CRRAutilityPP,\
-                           makeGridExpMult, NullFunc
+                           makeGridExpMult, NullFunc, getGroupIndices
 from HARK.ConsumptionSaving.ConsIndShockModel import ConsumerSolution
 from HARK.interpolation import BilinearInterpOnInterp1D, TrilinearInterp, BilinearInterp, CubicInterp,\
                                LinearInterp, LowerEnvelope3D, UpperEnvelope, LinearInterpOnInterp1D,\
-                               VariableLowerBoundFunc3D
+                               VariableLowerBoundFunc3D, cachedInterpolator
 from HARK.ConsumptionSaving.ConsGenIncProcessModel import ConsGenIncProcessSolver,\
                             PersistentShockConsumerType, ValueFunc2D, MargValueFunc2D,\
                             MargMargValueFunc2D, VariableLowerBoundFunc2D
@@ -738,9 +738,9 @@ class MedShockConsumerType(PersistentShockConsumerType):
         '''
         cLvlNow = np.zeros(self.AgentCount) + np.nan
         MedNow  = np.zeros(self.AgentCount) + np.nan
-        for t in range(self.T_cycle):
-            these = t == self.t_cycle
-            cLvlNow[these], MedNow[these] = self.solution[t].policyFunc(self.mLvlNow[these],self.pLvlNow[these],self.MedShkNow[these])
+        for t, these in enumerate(getGroupIndices(self.t_cycle,self.T_cycle)):
+            if these.size > 0:
+                cLvlNow[these], MedNow[these] = self.solution[t].policyFunc(self.mLvlNow[these],self.pLvlNow[these],self.MedShkNow[these])
         self.cLvlNow = cLvlNow
         self.MedNow  = MedNow
         return None
@@ -917,7 +917,7 @@ class ConsMedShockSolver(ConsGenIncProcessSolver):
 
         # Make the constrained total spending function: spend all market resources
         trivial_grid = np.array([0.0,1.0]) # Trivial grid
-        spendAllFunc = TrilinearInterp(np.array([[[0.0,0.0],[0.0,0.0]],[[1.0,1.0],[1.0,1.0]]]),\
+        spendAllFunc = cachedInterpolator(TrilinearInterp,np.array([[[0.0,0.0],[0.0,0.0]],[[1.0,1.0],[1.0,1.0]]]),\
                        trivial_grid,trivial_grid,trivial_grid)
         self.xFuncNowCnst = VariableLowerBoundFunc3D(spendAllFunc,self.mLvlMinNow)
 
@@ -1282,18 +1282,24 @@ class ConsMedShockSolver(ConsGenIncProcessSolver):
             tion (defined over market resources and permanent income), and human
             wealth as a function of permanent income.
         '''
-        aLvl,trash  = self.prepareToCalcEndOfPrdvP()
-        EndOfPrdvP = self.calcEndOfPrdvP()
+        with profileStage('prepareToCalcEndOfPrdvP'):
+            aLvl,trash  = self.prepareToCalcEndOfPrdvP()
+        with profileStage('calcEndOfPrdvP'):
+            EndOfPrdvP = self.calcEndOfPrdvP()
         if self.vFuncBool:
-            self.makeEndOfPrdvFunc(EndOfPrdvP)
+            with profileStage('makeEndOfPrdvFunc'):
+                self.makeEndOfPrdvFunc(EndOfPrdvP)
         if self.CubicBool:
             interpolator = self.makeCubicxFunc
         else:
             interpolator = self.makeLinearxFunc
-        solution   = self.makeBasicSolution(EndOfPrdvP,aLvl,interpolator)
-        solution   = self.addMPCandHumanWealth(solution)
+        with profileStage('makeBasicSolution'):
+            solution   = self.makeBasicSolution(EndOfPrdvP,aLvl,interpolator)
+        with profileStage('addMPCandHumanWealth'):
+            solution   = self.addMPCandHumanWealth(solution)
         if self.CubicBool:
-            solution = self.addvPPfunc(solution)
+            with profileStage('addvPPfunc'):
+                solution = self.addvPPfunc(solution)
         return solution
 
 
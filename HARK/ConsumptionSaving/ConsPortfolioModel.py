@@ -24,6 +24,7 @@ from HARK.ConsumptionSaving.ConsIndShockModel import (
 from HARK.utilities import (
     approxLognormal,   # for approximating the lognormal returns factor
     combineIndepDstns, # for combining the existing
+    getGroupIndices,   # for grouping agents by their period of the cycle
     )
 
 from HARK.simulation import drawLognormal # random draws for simulating agents
@@ -369,6 +370,7 @@ class PortfolioConsumerType(IndShockConsumerType):
     time_inv_ = time_inv_ + ['approxRiskyDstn', 'RiskyCount', 'RiskyShareCount']
     time_inv_ = time_inv_ + ['RiskyShareLimitFunc', 'PortfolioDomain']
     time_inv_ = time_inv_ + ['AdjustPrb', 'PortfolioGrid', 'AdjustCount']
+    histogram_method_ = False # Returns are risky and depend on the portfolio share
 
     def __init__(self,cycles=1,time_flow=True,verbose=False,quiet=False,**kwds):
 
@@ -583,9 +585,9 @@ class PortfolioConsumerType(IndShockConsumerType):
         '''
         # Get and store states for newly born agents
         N = np.sum(which_agents) # Number of new consumers to make
-        self.aNrmNow[which_agents] = drawLognormal(N,mu=self.aNrmInitMean,sigma=self.aNrmInitStd,seed=self.RNG.randint(0,2**31-1))
+        self.aNrmNow[which_agents] = drawLognormal(N,mu=self.aNrmInitMean,sigma=self.aNrmInitStd,seed=self.drawSeed())
         pLvlInitMeanNow = self.pLvlInitMean + np.log(self.PlvlAggNow) # Account for newer cohorts having higher permanent income
-        self.pLvlNow[which_agents] = drawLognormal(N,mu=pLvlInitMeanNow,sigma=self.pLvlInitStd,seed=self.RNG.randint(0,2**31-1))
+        self.pLvlNow[which_agents] = drawLognormal(N,mu=pLvlInitMeanNow,sigma=self.pLvlInitStd,seed=self.drawSeed())
 
         self.t_age[which_agents]   = 0 # How many periods since each agent was born
         self.t_cycle[which_agents] = 0 # Which period of the cycle each agent is currently in
@@ -610,15 +612,16 @@ class PortfolioConsumerType(IndShockConsumerType):
         these_cant_adjust = self.CantAdjust == 1
         these_can_adjust = self.CantAdjust == 0
 
-        for t in range(self.T_cycle):
-            these_t = t == self.t_cycle
-            these = np.logical_and(these_t, these_can_adjust)
+        for t, these_t in enumerate(getGroupIndices(self.t_cycle, self.T_cycle)):
+            if these_t.size == 0:
+                continue
+            these = these_t[these_can_adjust[these_t]]
             cNrmNow[these], MPCnow[these] = self.solution[t].cFunc[0][0].eval_with_derivative(self.mNrmNow[these])
 
             if any(these_cant_adjust):
+                RiskySharePrev_t = self.RiskySharePrev[these_t]
                 for portfolio_index, portfolio_value in enumerate(self.ShareNow):
-                    these_portfolio = np.equal(portfolio_value, self.RiskySharePrev)
-                    these = np.logical_and(these_t, these_portfolio)
+                    these = these_t[np.equal(portfolio_value, RiskySharePrev_t)]
 
                     cNrmNow[these], MPCnow[these] = self.solution[t].cFunc[1][portfolio_index].eval_with_derivative(self.mNrmNow[these])
 
@@ -627,7 +630,7 @@ class PortfolioConsumerType(IndShockConsumerType):
         return None
 
     def getRisky(self):
-        return self.drawRiskyFunc(self.RNG.randint(0,2**31-1))
+        return self.drawRiskyFunc(self.drawSeed())
 
 class ConsIndShockPortfolioSolver(ConsIndShockSolver):
     '''
@@ -11,7 +11,7 @@ from __future__ import absolute_import
 from builtins import str
 from builtins import range
 import numpy as np
-from HARK.utilities import approxMeanOneLognormal
+from HARK.utilities import approxMeanOneLognormal, getGroupIndices
 from HARK.ConsumptionSaving.ConsIndShockModel import IndShockConsumerType, ConsumerSolution, ConsIndShockSolver, \
                                    ValueFunc, MargValueFunc, KinkedRconsumerType, ConsKinkedRsolver
 from HARK.interpolation import LinearInterpOnInterp1D, LinearInterp, CubicInterp, LowerEnvelope
@@ -23,6 +23,7 @@ class PrefShockConsumerType(IndShockConsumerType):
     utility each period, specified as iid lognormal.
     '''
     shock_vars_ = IndShockConsumerType.shock_vars_ + ['PrefShkNow']
+    histogram_method_ = False # Consumption also depends on the preference shock
 
     def __init__(self,
                  cycles=1,
@@ -138,9 +139,9 @@ class PrefShockConsumerType(IndShockConsumerType):
         None
         '''
         cNrmNow = np.zeros(self.AgentCount) + np.nan
-        for t in range(self.T_cycle):
-            these = t == self.t_cycle
-            cNrmNow[these] = self.solution[t].cFunc(self.mNrmNow[these],self.PrefShkNow[these])
+        for t, these in enumerate(getGroupIndices(self.t_cycle,self.T_cycle)):
+            if these.size > 0:
+                cNrmNow[these] = self.solution[t].cFunc(self.mNrmNow[these],self.PrefShkNow[these])
         self.cNrmNow = cNrmNow
         return None
 
@@ -191,6 +191,7 @@ class RepAgentConsumerType(IndShockConsumerType):
     A class for representing representative agents with inelastic labor supply.
     '''
     time_inv_ = IndShockConsumerType.time_inv_ + ['CapShare','DeprFac']
+    histogram_method_ = False # A representative agent has no cross-sectional distribution
 
     def __init__(self,time_flow=True,**kwds):
         '''
@@ -299,7 +300,7 @@ class RepAgentMarkovConsumerType(RepAgentConsumerType):
         None
         '''
         cutoffs = np.cumsum(self.MrkvArray[self.MrkvNow,:])
-        MrkvDraw = drawUniform(N=1,seed=self.RNG.randint(0,2**31-1))
+        MrkvDraw = drawUniform(N=1,seed=self.drawSeed())
         self.MrkvNow = np.searchsorted(cutoffs,MrkvDraw)
 
         t = self.t_cycle[0]
@@ -308,7 +309,7 @@ class RepAgentMarkovConsumerType(RepAgentConsumerType):
         PermGroFacNow    = self.PermGroFac[t-1][i] # and permanent growth factor
         Indices          = np.arange(IncomeDstnNow[0].size) # just a list of integers
         # Get random draws of income shocks from the discrete distribution
-        EventDraw        = drawDiscrete(N=1,X=Indices,P=IncomeDstnNow[0],exact_match=False,seed=self.RNG.randint(0,2**31-1))
+        EventDraw        = drawDiscrete(N=1,X=Indices,P=IncomeDstnNow[0],exact_match=False,seed=self.drawSeed())
         PermShkNow = IncomeDstnNow[1][EventDraw]*PermGroFacNow # permanent "shock" includes expected growth
         TranShkNow = IncomeDstnNow[2][EventDraw]
         self.PermShkNow = np.array(PermShkNow)
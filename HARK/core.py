@@ -15,11 +15,15 @@ from builtins import object
 import sys
 import os
 from distutils.dir_util import copy_tree
-from .utilities import getArgNames, NullFunc
+from .utilities import getArgNames, NullFunc, getPercentiles, getLorenzShares
 from copy import copy, deepcopy
+from contextlib import contextmanager
 import numpy as np
+import tracemalloc
 from time import time
-from .parallel import multiThreadCommands, multiThreadCommandsFake
+from operator import attrgetter
+from .parallel import multiThreadCommands, multiThreadCommandsFake, AgentPool
+from .simulation import makeRNG
 
 
 def distanceMetric(thing_A, thing_B):
@@ -76,6 +80,116 @@ def distanceMetric(thing_A, thing_B):
     return distance
 
 
+class DistanceFallback(Exception):
+    '''
+    Raised by flattenForDistance for objects it cannot flatten.
+    '''
+    pass
+
+
+def _flattenInto(thing, signature, arrays):
+    '''
+    Appends the structure of thing to signature and its numbers to arrays,
+    following the same traversal as distanceMetric.  Only called internally by
+    flattenForDistance.
+    '''
+    if type(thing) is list:
+        signature.append(('list', len(thing)))
+        for element in thing:
+            _flattenInto(element, signature, arrays)
+    elif isinstance(thing, (int, float)):
+        signature.append(())
+        arrays.append(np.array([thing], dtype=float))
+    elif hasattr(thing, 'shape'):
+        values = np.asarray(thing, dtype=float)
+        if values.size == 0:
+            raise DistanceFallback()
+        signature.append(values.shape)
+        arrays.append(values.ravel())
+    elif thing.__class__.__name__ == 'function':
+        signature.append('function')
+    elif isinstance(thing, HARKobject) and type(thing).distance is HARKobject.distance:
+        signature.append(thing.__class__.__name__)
+        for attr_name in thing.distance_criteria:
+            if not hasattr(thing, attr_name):
+                raise DistanceFallback()
+            _flattenInto(getattr(thing, attr_name), signature, arrays)
+    else:
+        raise DistanceFallback()
+
+
+def flattenForDistance(thing, cache=None):
+    '''
+    Flattens an object into one array of all the numbers that distanceMetric would
+    compare, along with a signature of its structure.  Two objects with the same
+    signature are at the distance given by the largest absolute difference of their
+    arrays.
+
+    Parameters
+    ----------
+    thing : object
+        A generic object.
+    cache : dict or None
+        If not None, a dictionary of flattened objects keyed by id(), in which the
+        result is looked up and stored.  It belongs to the caller (such as one run
+        of solveAgent), which should only keep objects in it that do not change.
+
+    Returns
+    -------
+    signature : tuple
+        The structure of the object: list lengths, array shapes and class names.
+    values : np.array
+        All the numbers in the object, in the order of the signature.
+    '''
+    if cache is not None:
+        entry = cache.get(id(thing))
+        if entry is not None and entry[0] is thing:
+            return entry[1]
+    signature = []
+    arrays = []
+    _flattenInto(thing, signature, arrays)
+    flat = (tuple(signature), np.concatenate(arrays) if len(arrays) > 0 else np.zeros(0))
+    if cache is not None:
+        cache[id(thing)] = (thing, flat)  # keep thing so that its id is not reused
+    return flat
+
+
+def fastDistance(thing_A, thing_B, cache=None):
+    '''
+    Returns the same distance as distanceMetric, by comparing the flattened arrays
+    of the two objects in one vectorized step.  Falls back to distanceMetric when
+    the objects have different structures or contain something that cannot be
+    flattened.
+
+    Parameters
+    ----------
+    thing_A : object
+        A generic object.
+    thing_B : object
+        Another generic object.
+    cache : dict or None
+        Optional dictionary of flattened objects; see flattenForDistance.  Lets a
+        loop that compares each new object with the previous one flatten every
+        object only once.
+
+    Returns
+    -------
+    distance : float
+        The "distance" between thing_A and thing_B.
+    '''
+    try:
+        signature_A, values_A = flattenForDistance(thing_A, cache)
+        signature_B, values_B = flattenForDistance(thing_B, cache)
+    except DistanceFallback:
+        return distanceMetric(thing_A, thing_B)
+    if signature_A != signature_B:
+        return distanceMetric(thing_A, thing_B)
+    if values_A.size == 0:
+        return 0.0
+    # fmax ignores NaNs, much as the max() of distanceMetric's lists usually does
+    return max(0.0, np.fmax.reduce(np.abs(values_A - values_B)))
+
+
 class HARKobject(object):
     '''
     A superclass for object classes in HARK.  Comes with two useful methods:
@@ -163,6 +277,685 @@ class Solution(HARKobject):
     '''
 
 
+class HistoryRecorder(HARKobject):
+    '''
+    Preallocated storage for the simulated history of named attributes of an
+    AgentType, such as the variables in track_vars.  A getter for each variable
+    is built once, so recording a period is a plain loop of array copies.  The
+    history can be stored in any dtype, can keep only a subset of agents and/or
+    every k-th period, or can keep only cross-sectional summary statistics for
+    each period rather than the full T x AgentCount panel.  Full histories can
+    be kept in memory-mapped .npy files on disk, for panels larger than memory.
+    '''
+    def __init__(self, var_names, T, N, dtype=float, agents=None, every=1, summary=False, path=None):
+        '''
+        Make a new history recorder with blank (NaN) histories.
+
+        Parameters
+        ----------
+        var_names : [string]
+            Names of the attributes whose history should be recorded.
+        T : int
+            Number of periods that might be recorded.
+        N : int
+            Number of agents in each recorded period.
+        dtype : np.dtype
+            Data type of the stored histories; e.g. np.float32 to halve memory.
+        agents : np.array or None
+            Indices of the agents whose values are stored; None stores all agents.
+        every : int
+            Store only every k-th period, starting with the first.
+        summary : boolean
+            If True, store only the mean, standard deviation, minimum, maximum
+            and count of non-NaN values across agents in each recorded period.
+        path : string or None
+            If not None, full histories are stored as memory-mapped files named
+            var_name.npy in this directory, which is made if it does not exist.
+            Existing files with those names are overwritten.
+
+        Returns
+        -------
+        None
+        '''
+        self.var_names = list(var_names)
+        self.path      = path
+        self.dtype     = np.dtype(dtype)
+        self.agents    = None if agents is None else np.asarray(agents)
+        self.every     = int(every)
+        self.summary   = summary
+        self.T         = (T + self.every - 1) // self.every  # Number of stored periods
+        self.N         = N if self.agents is None else self.agents.size
+        getters        = [attrgetter(var_name) for var_name in self.var_names]
+
+        self.hist = {}
+        if summary:
+            for var_name in self.var_names:
+                self.hist[var_name] = {stat: np.zeros(self.T) + np.nan for stat in ['mean', 'std', 'min', 'max']}
+                self.hist[var_name]['count'] = np.zeros(self.T, dtype=int)
+        else:
+            for var_name in self.var_names:
+                self.hist[var_name] = self.blankArray((self.T, self.N), var_name)
+        self.setters = [(getter, self.hist[var_name]) for getter, var_name in zip(getters, self.var_names)]
+
+    def blankArray(self, shape, var_name):
+        '''
+        Make an array of the given shape in this recorder's dtype, filled with
+        NaN (or zeros for dtypes without NaN).  If self.path is not None, the
+        array is a memory-mapped file in that directory.
+
+        Parameters
+        ----------
+        shape : tuple
+            Shape of the array.
+        var_name : string
+            Name of the variable whose history will be stored in the array.
+
+        Returns
+        -------
+        blank : np.array
+            The blank array.
+        '''
+        if self.path is None:
+            blank = np.empty(shape, dtype=self.dtype)
+        else:
+            if not os.path.isdir(self.path):
+                os.makedirs(self.path)
+            blank = np.lib.format.open_memmap(os.path.join(self.path, var_name + '.npy'),
+                                              mode='w+', dtype=self.dtype, shape=shape)
+        if np.issubdtype(self.dtype, np.inexact):
+            blank[:] = np.nan
+        else:
+            blank[:] = 0
+        return blank
+
+    def flush(self):
+        '''
+        Writes any changes to memory-mapped histories to disk.  Does nothing if
+        the histories are stored in memory.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        '''
+        for var_name in self.var_names:
+            if isinstance(self.hist[var_name], np.memmap):
+                self.hist[var_name].flush()
+
+    def record(self, source, t):
+        '''
+        Store the current values of the recorded attributes of source as period t.
+        Does nothing if t is a period skipped by thinning.
+
+        Parameters
+        ----------
+        source : object
+            The object (usually an AgentType) whose attributes are recorded.
+        t : int
+            The period of the simulation being recorded.
+
+        Returns
+        -------
+        None
+        '''
+        if t % self.every:
+            return None
+        row = t // self.every
+        for getter, hist in self.setters:
+            values = getter(source)
+            if self.agents is not None:
+                values = np.asarray(values)[self.agents]
+            if self.summary:
+                values = np.asarray(values, dtype=float)
+                values = values[np.logical_not(np.isnan(values))]
+                hist['count'][row] = values.size
+                if values.size > 0:
+                    hist['mean'][row] = np.mean(values)
+                    hist['std'][row] = np.std(values)
+                    hist['min'][row] = np.min(values)
+                    hist['max'][row] = np.max(values)
+            else:
+                hist[row] = values
+        return None
+
+    def getSummary(self, var_name):
+        '''
+        Returns the per-period cross-sectional summary statistics of a recorded
+        variable.  If full histories are stored, the statistics are computed
+        from them.
+
+        Parameters
+        ----------
+        var_name : string
+            Name of the recorded variable.
+
+        Returns
+        -------
+        summary : dict
+            Dictionary with keys 'mean', 'std', 'min', 'max' and 'count', each an
+            array with one element per stored period.
+        '''
+        if self.summary:
+            return self.hist[var_name]
+        hist = self.hist[var_name].astype(float)
+        valid = np.logical_not(np.isnan(hist))
+        count = np.sum(valid, axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(valid, hist, 0.0).sum(axis=1)/count
+            var = np.where(valid, (hist - mean[:, np.newaxis])**2, 0.0).sum(axis=1)/count
+        return {'mean': mean,
+                'std': np.sqrt(var),
+                'min': np.where(count > 0, np.min(np.where(valid, hist, np.inf), axis=1), np.nan),
+                'max': np.where(count > 0, np.max(np.where(valid, hist, -np.inf), axis=1), np.nan),
+                'count': count}
+
+
+def loadHistory(path, var_names, mode='r'):
+    '''
+    Opens histories saved by a HistoryRecorder with a path, without reading
+    them into memory.
+
+    Parameters
+    ----------
+    path : string
+        Directory in which the histories were stored.
+    var_names : [string]
+        Names of the variables whose histories should be opened.
+    mode : string
+        Memory-map mode passed to np.load; 'r' for read-only access.
+
+    Returns
+    -------
+    history : dict
+        Dictionary mapping each variable name to a memory-mapped array of its
+        history, with one row per stored period.
+    '''
+    return {var_name: np.load(os.path.join(path, var_name + '.npy'), mmap_mode=mode) for var_name in var_names}
+
+
+class ShockTape(HARKobject):
+    '''
+    Compact storage for a pre-generated history of discrete shocks.  Rather than
+    a T x AgentCount float array, each shock variable is stored as a small table
+    of the distinct values it takes plus, for each agent-period, the index of its
+    value in that table (int8 if the table has at most 127 values, else int16).
+    A variable that takes more distinct values than fit in int16 (e.g. a shock
+    drawn from a continuous distribution) is stored in full instead.  Tapes can
+    be saved to disk and loaded elsewhere, so that several estimation workers
+    can share one set of common random numbers.
+    '''
+    max_codes = np.iinfo(np.int16).max
+
+    def __init__(self, var_names, T, N):
+        '''
+        Make a new, empty shock tape.
+
+        Parameters
+        ----------
+        var_names : [string]
+            Names of the shock variables to store.
+        T : int
+            Number of periods that might be recorded.
+        N : int
+            Number of agents in each recorded period.
+
+        Returns
+        -------
+        None
+        '''
+        self.var_names = list(var_names)
+        self.T         = T
+        self.N         = N
+        self.codes     = {var_name: np.zeros((T, N), dtype=np.int16) for var_name in self.var_names}
+        self.tables    = {var_name: None for var_name in self.var_names}
+        self.raw       = {}
+        self.lookup    = {var_name: {} for var_name in self.var_names}
+
+    def record(self, source, t):
+        '''
+        Store the current values of the shock variables of source as period t.
+
+        Parameters
+        ----------
+        source : object
+            The object (usually an AgentType) whose shocks are recorded.
+        t : int
+            The period of the simulation being recorded.
+
+        Returns
+        -------
+        None
+        '''
+        for var_name in self.var_names:
+            values = np.asarray(getattr(source, var_name))
+            if var_name in self.raw:
+                self.raw[var_name][t] = values
+                continue
+            uniques, inverse = np.unique(values, return_inverse=True)
+            lookup = self.lookup[var_name]
+            new = [value for value in uniques.tolist() if value not in lookup]
+            if len(lookup) + len(new) > self.max_codes:
+                self.storeRaw(var_name, values.dtype)
+                self.raw[var_name][t] = values
+                continue
+            if len(new) > 0:
+                for value in new:
+                    lookup[value] = len(lookup)
+                new = np.array(new, dtype=values.dtype)
+                table = self.tables[var_name]
+                self.tables[var_name] = new if table is None else np.concatenate((table, new))
+            codes = np.array([lookup[value] for value in uniques.tolist()], dtype=np.int16)
+            self.codes[var_name][t] = codes[inverse.flatten()]
+
+    def storeRaw(self, var_name, dtype):
+        '''
+        Switch a variable from coded to full storage, decoding the periods
+        already recorded.
+        '''
+        table = self.tables[var_name]
+        if table is None:
+            raw = np.zeros((self.T, self.N), dtype=dtype)
+        else:
+            raw = table[self.codes[var_name]].astype(np.result_type(table, dtype))
+        self.raw[var_name] = raw
+        del self.codes[var_name], self.lookup[var_name]
+        self.tables[var_name] = None
+
+    def shrink(self):
+        '''
+        Store codes as int8 for each variable whose table has at most 127 values.
+        Should only be called once recording is finished.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        '''
+        for var_name, codes in self.codes.items():
+            table = self.tables[var_name]
+            if table is None or table.size <= np.iinfo(np.int8).max:
+                self.codes[var_name] = codes.astype(np.int8)
+
+    def read(self, var_name, t):
+        '''
+        Returns the values of one shock variable in period t.
+
+        Parameters
+        ----------
+        var_name : string
+            Name of the shock variable.
+        t : int
+            Period of the tape to read.
+
+        Returns
+        -------
+        values : np.array
+            Array of size N with each agent's shock.
+        '''
+        if var_name in self.raw:
+            return self.raw[var_name][t]
+        return self.tables[var_name][self.codes[var_name][t]]
+
+    def decode(self, var_name):
+        '''
+        Returns the full T x N history of one shock variable.
+
+        Parameters
+        ----------
+        var_name : string
+            Name of the shock variable.
+
+        Returns
+        -------
+        hist : np.array
+            Array of shape (T,N) with each agent's shock in each period.
+        '''
+        if var_name in self.raw:
+            return self.raw[var_name]
+        return self.tables[var_name][self.codes[var_name]]
+
+    def save(self, path):
+        '''
+        Saves the tape to a .npz file, which can be read back with loadShockTape.
+
+        Parameters
+        ----------
+        path : string
+            Name of the file to write.
+
+        Returns
+        -------
+        None
+        '''
+        arrays = {'var_names': np.array(self.var_names), 'shape': np.array([self.T, self.N])}
+        for var_name in self.var_names:
+            if var_name in self.raw:
+                arrays['raw_' + var_name] = self.raw[var_name]
+            else:
+                arrays['codes_' + var_name] = self.codes[var_name]
+                table = self.tables[var_name]
+                arrays['table_' + var_name] = np.zeros(0) if table is None else table
+        np.savez(path, **arrays)
+
+
+def loadShockTape(path):
+    '''
+    Reads a shock tape saved by ShockTape.save.
+
+    Parameters
+    ----------
+    path : string
+        Name of the .npz file.
+
+    Returns
+    -------
+    tape : ShockTape
+        The shock tape, ready to be used with AgentType.useShockTape.
+    '''
+    with np.load(path) as data:
+        T, N = data['shape']
+        tape = ShockTape([str(name) for name in data['var_names']], int(T), int(N))
+        for var_name in tape.var_names:
+            if 'raw_' + var_name in data.files:
+                tape.raw[var_name] = data['raw_' + var_name]
+                del tape.codes[var_name], tape.lookup[var_name]
+            else:
+                tape.codes[var_name] = data['codes_' + var_name]
+                tape.tables[var_name] = data['table_' + var_name]
+                tape.lookup[var_name] = dict((value, j) for j, value in enumerate(tape.tables[var_name].tolist()))
+    return tape
+
+
+class CrossSectionReducer(HARKobject):
+    '''
+    A callback for AgentType.simulate (or a consumer of AgentType.simulateIter)
+    that reduces each period's cross-section of simulated variables to a few
+    statistics as the simulation runs: the mean, the requested percentiles and
+    the requested Lorenz shares.  Memory use does not grow with AgentCount.
+    '''
+    def __init__(self, var_names, percentiles=[], lorenz=[]):
+        '''
+        Make a new reducer with empty results.
+
+        Parameters
+        ----------
+        var_names : [string]
+            Names of the simulated variables to reduce; each must be in the
+            track_vars of the simulated AgentType.
+        percentiles : [float]
+            Percentiles to compute in each period, each in (0,1).
+        lorenz : [float]
+            Points of the Lorenz curve to compute in each period, each in (0,1).
+
+        Returns
+        -------
+        None
+        '''
+        self.var_names   = list(var_names)
+        self.percentiles = list(percentiles)
+        self.lorenz      = list(lorenz)
+        self.t_sim       = []
+        self.results     = {var_name: {'mean': [], 'pctl': [], 'lorenz': []} for var_name in self.var_names}
+
+    def __call__(self, t_sim, cross_section):
+        '''
+        Reduces one period's cross-section and appends the statistics to the results.
+
+        Parameters
+        ----------
+        t_sim : int
+            The simulated period.
+        cross_section : dict
+            Dictionary mapping variable names to their values for each agent.
+
+        Returns
+        -------
+        None
+        '''
+        self.t_sim.append(t_sim)
+        for var_name in self.var_names:
+            data = np.asarray(cross_section[var_name], dtype=float)
+            data = np.sort(data[np.logical_not(np.isnan(data))])
+            results = self.results[var_name]
+            results['mean'].append(np.mean(data) if data.size > 0 else np.nan)
+            if len(self.percentiles) > 0:
+                results['pctl'].append(getPercentiles(data, percentiles=self.percentiles, presorted=True))
+            if len(self.lorenz) > 0:
+                results['lorenz'].append(getLorenzShares(data, percentiles=self.lorenz, presorted=True))
+
+    def getResults(self, var_name):
+        '''
+        Returns the reduced statistics of one variable as arrays.
+
+        Parameters
+        ----------
+        var_name : string
+            Name of the reduced variable.
+
+        Returns
+        -------
+        results : dict
+            Dictionary with 'mean' (one element per period), 'pctl' and 'lorenz'
+            (one row per period, one column per requested point) and 't_sim'.
+        '''
+        results = {key: np.array(value) for key, value in self.results[var_name].items()}
+        results['t_sim'] = np.array(self.t_sim)
+        return results
+
+
+class StageProfiler(HARKobject):
+    '''
+    Records the number of calls and the time spent in named stages of solving or
+    simulating a model, and optionally the memory allocated during them (with
+    tracemalloc, which slows everything down).  Stages are marked in the code
+    with "with profiler.stage(name):" or, in solvers, "with profileStage(name):".
+    '''
+    def __init__(self, allocations=False):
+        '''
+        Make a new profiler with no recorded stages.
+
+        Parameters
+        ----------
+        allocations : boolean
+            Whether to also record the peak memory allocated during each stage.
+
+        Returns
+        -------
+        None
+        '''
+        self.allocations = allocations
+        self.stages = {}
+        self.open_peaks = []  # Running peak memory of each stage in progress, innermost last
+
+    @contextmanager
+    def stage(self, name):
+        '''
+        A context manager that records one call of the named stage.
+
+        Parameters
+        ----------
+        name : string
+            Name of the stage.
+
+        Returns
+        -------
+        None
+        '''
+        if self.allocations:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            mem_before, peak_before = tracemalloc.get_traced_memory()
+            # Stages can be nested, so pass the peak so far to the stages in progress before resetting it
+            self.open_peaks = [max(open_peak, peak_before) for open_peak in self.open_peaks]
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            self.open_peaks.append(mem_before)
+        t_start = time()
+        try:
+            yield
+        finally:
+            t_end = time()
+            record = self.stages.setdefault(name, {'calls': 0, 'time': 0.0, 'peak_bytes': 0})
+            record['calls'] += 1
+            record['time'] += t_end - t_start
+            if self.allocations:
+                peak = max(self.open_peaks.pop(), tracemalloc.get_traced_memory()[1])
+                self.open_peaks = [max(open_peak, peak) for open_peak in self.open_peaks]
+                record['peak_bytes'] = max(record['peak_bytes'], peak - mem_before)
+                if started_tracing:
+                    tracemalloc.stop()
+
+    def getReport(self):
+        '''
+        Returns the recorded stages, from most to least total time.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        report : [dict]
+            One dictionary per stage, with its 'name', number of 'calls', total
+            'time' in seconds and 'mean_time' per call.  If allocations are
+            recorded, also the largest 'peak_bytes' allocated during any one call.
+            The time of a stage includes that of any stages run inside it, such
+            as the solver's stages inside solveOnePeriod.
+        '''
+        report = []
+        for name, record in self.stages.items():
+            entry = {'name': name,
+                     'calls': record['calls'],
+                     'time': record['time'],
+                     'mean_time': record['time']/record['calls']}
+            if self.allocations:
+                entry['peak_bytes'] = record['peak_bytes']
+            report.append(entry)
+        report.sort(key=lambda entry: entry['time'], reverse=True)
+        return report
+
+
+# Profilers of the AgentTypes currently being solved, innermost last; see profileStage
+active_profilers = []
+
+
+@contextmanager
+def profileStage(name):
+    '''
+    A context manager that marks a stage of a one period solver.  If the agent
+    being solved has a profiler (see AgentType.startProfiling), a call of the
+    stage is recorded in it; otherwise this does nothing.
+
+    Parameters
+    ----------
+    name : string
+        Name of the stage.
+
+    Returns
+    -------
+    None
+    '''
+    if len(active_profilers) == 0:
+        yield
+    else:
+        with active_profilers[-1].stage(name):
+            yield
+
+
+class AndersonMixer(HARKobject):
+    '''
+    Anderson acceleration of a fixed point iteration x = G(x) on vectors.  Each
+    step combines the last few iterates so as to minimize the linearized
+    residual G(x) - x.  As a safeguard, the history is discarded and a plain
+    iteration step is taken whenever the residual grows.
+    '''
+    def __init__(self, memory=5):
+        '''
+        Make a new mixer with an empty history.
+
+        Parameters
+        ----------
+        memory : int
+            Maximum number of past iterates used in each step.
+
+        Returns
+        -------
+        None
+        '''
+        self.memory = memory
+        self.steps = 0     # Number of accelerated steps taken
+        self.restarts = 0  # Number of times the safeguard discarded the history
+        self.reset()
+
+    def reset(self):
+        '''
+        Discards the history of iterates.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        '''
+        self.x_hist = []
+        self.g_hist = []
+
+    def step(self, x, g):
+        '''
+        Returns the next input to the fixed point map, given its last input x
+        and output g = G(x).  Returns g itself (a plain iteration step) when
+        there is too little history or the safeguard is triggered.
+
+        Parameters
+        ----------
+        x : np.array
+            The last input to the fixed point map.
+        g : np.array
+            The output of the fixed point map at x.
+
+        Returns
+        -------
+        x_next : np.array
+            The next input to the fixed point map.
+        '''
+        f = g - x
+        if len(self.x_hist) > 0:
+            f_last = self.g_hist[-1] - self.x_hist[-1]
+            if f.size != f_last.size or np.max(np.abs(f)) > np.max(np.abs(f_last)):
+                self.restarts += 1
+                self.reset()
+        self.x_hist.append(x)
+        self.g_hist.append(g)
+        if len(self.x_hist) > self.memory + 1:
+            del self.x_hist[0]
+            del self.g_hist[0]
+        if len(self.x_hist) < 2:
+            return g
+
+        # Solve the least squares problem in the differences of residuals
+        F = np.array(self.g_hist) - np.array(self.x_hist)
+        G = np.array(self.g_hist)
+        dF = np.diff(F, axis=0).T
+        dG = np.diff(G, axis=0).T
+        gamma = np.linalg.lstsq(dF, f, rcond=None)[0]
+        x_next = g - dG.dot(gamma)
+        if not np.all(np.isfinite(x_next)):
+            self.restarts += 1
+            self.reset()
+            return g
+        self.steps += 1
+        return x_next
+
+
 class AgentType(HARKobject):
     '''
     A superclass for economic agents in the HARK framework.  Each model should
@@ -223,9 +1016,27 @@ class AgentType(HARKobject):
         self.solveOnePeriod     = NullFunc() # NOQA
         self.tolerance          = tolerance # NOQA
         self.seed               = seed # NOQA
+        self.rng_mode           = 'legacy' # NOQA  - or 'generator'; see resetRNG
+        self.rng_bit_generator  = 'PCG64' # NOQA
+        self.seed_seq           = None # NOQA  - SeedSequence for this type's stream in 'generator' mode
         self.track_vars         = [] # NOQA
+        self.track_dtype        = float # NOQA  - options for the history recorder, see clearHistory
+        self.sim_dtype          = float # NOQA  - precision of simulated states, e.g. np.float32
+        self.track_agents       = None # NOQA
+        self.track_every        = 1 # NOQA
+        self.track_summary      = False # NOQA
+        self.track_path         = None # NOQA
+        self.stream_vars        = [] # NOQA  - variables yielded by simulateIter if not track_vars
         self.poststate_vars     = [] # NOQA
         self.read_shocks        = False # NOQA
+        self.shock_tape         = None # NOQA  - if not None, readShocks decodes shocks from this ShockTape
+        self.profiler           = None # NOQA
+        self.accelerate         = False # NOQA  - Anderson acceleration of infinite horizon solution, see solveAgent
+        self.accel_memory       = 5 # NOQA
+        self.warm_start         = False # NOQA  - default for solve(warm_start)
+        self.convergence_log    = [] # NOQA  - one entry per infinite horizon solve
+        self.distance_grid      = None # NOQA  - if not None, see solutionDistance
+        self.distance_func      = 'cFunc' # NOQA
         self.assignParameters(**kwds) # NOQA
         self.resetRNG() # NOQA
 
@@ -361,36 +1172,121 @@ class AgentType(HARKobject):
             if param in self.time_inv:
                 self.time_inv.remove(param)
 
-    def solve(self, verbose=False):
+    def solve(self, verbose=False, warm_start=None):
         '''
         Solve the model for this instance of an agent type by backward induction.
         Loops through the sequence of one period problems, passing the solution
         from period t+1 to the problem for period t.
 
+        For infinite horizon models, each solve appends a dictionary to
+        self.convergence_log with the number of 'cycles' it took, whether it
+        was warm started ('warm_start') and the final 'distance'.
+
         Parameters
         ----------
         verbose : boolean
             If True, solution progress is printed to screen.
+        warm_start : boolean or Solution or None
+            Only used for infinite horizon models.  If True, the fixed point
+            iteration starts from the first period's solution of this agent's
+            current solution (if it has one) instead of from solution_terminal;
+            this is much faster when parameters have changed only slightly.  A
+            one period Solution (e.g. from an agent with nearby parameters) can
+            also be passed to start from.  Defaults to self.warm_start.
 
         Returns
         -------
         none
         '''
+        if warm_start is None:
+            warm_start = self.warm_start
+        solution_start = None
+        if self.cycles == 0 and warm_start is not None and warm_start is not False:
+            if warm_start is True:
+                if hasattr(self, 'solution') and len(self.solution) > 0:
+                    solution_start = self.solution[0] if self.time_flow else self.solution[-1]
+            else:
+                solution_start = warm_start
+
 
         # Ignore floating point "errors". Numpy calls it "errors", but really it's excep-
         # tions with well-defined answers such as 1.0/0.0 that is np.inf, -1.0/0.0 that is
         # -np.inf, np.inf/np.inf is np.nan and so on.
         with np.errstate(divide='ignore', over='ignore', under='ignore', invalid='ignore'):
-            self.preSolve()  # Do pre-solution stuff
-            self.solution = solveAgent(self, verbose)  # Solve the model by backward induction
-            if self.time_flow:  # Put the solution in chronological order if this instance's time flow runs that way
-                self.solution.reverse()
-            self.addToTimeVary('solution')  # Add solution to the list of time-varying attributes
-            self.postSolve()  # Do post-solution stuff
+            if self.profiler is not None:  # Solver stages are recorded by this agent's profiler
+                active_profilers.append(self.profiler)
+            try:
+                self.preSolve()  # Do pre-solution stuff
+                self.solution = solveAgent(self, verbose, solution_start)  # Solve the model by backward induction
+                if self.time_flow:  # Put the solution in chronological order if this instance's time flow runs that way
+                    self.solution.reverse()
+                self.addToTimeVary('solution')  # Add solution to the list of time-varying attributes
+                self.postSolve()  # Do post-solution stuff
+            finally:
+                if self.profiler is not None:
+                    active_profilers.remove(self.profiler)
+
+    def startProfiling(self, allocations=False):
+        '''
+        Starts recording the time spent in each stage of solve() and simulate() in
+        a new StageProfiler in self.profiler.  The simulation stages are getMortality,
+        getShocks (or readShocks), getStates, getControls and getPostStates; the
+        solver stages are solveOnePeriod and whatever stages the solver marks.
+
+        Parameters
+        ----------
+        allocations : boolean
+            Whether to also record the peak memory allocated during each stage.
+
+        Returns
+        -------
+        None
+        '''
+        self.profiler = StageProfiler(allocations)
+
+    def stopProfiling(self):
+        '''
+        Stops recording stages, returning what was recorded.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        report : [dict]
+            The report of the profiler; see StageProfiler.getReport.
+        '''
+        report = self.getProfileReport()
+        self.profiler = None
+        return report
+
+    def getProfileReport(self):
+        '''
+        Returns the time (and perhaps memory) spent so far in each profiled stage.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        report : [dict]
+            The report of the profiler; see StageProfiler.getReport.  Empty if
+            profiling was not started.
+        '''
+        if self.profiler is None:
+            return []
+        return self.profiler.getReport()
 
     def resetRNG(self):
         '''
-        Reset the random number generator for this type.
+        Reset the random number generator for this type.  In the default
+        'legacy' rng_mode this is a RandomState seeded with self.seed, and every
+        draw is made by a new RandomState seeded from it, reproducing earlier
+        versions of HARK exactly.  In 'generator' mode it is a np.random.Generator
+        (of the kind named in rng_bit_generator) made from self.seed_seq, or from
+        self.seed if seed_seq is None, and draws are made from it directly.
 
         Parameters
         ----------
@@ -400,7 +1296,32 @@ class AgentType(HARKobject):
         -------
         none
         '''
-        self.RNG = np.random.RandomState(self.seed)
+        if self.rng_mode == 'generator':
+            self.RNG = makeRNG(self.seed if self.seed_seq is None else self.seed_seq,
+                               self.rng_bit_generator)
+        elif self.rng_mode == 'legacy':
+            self.RNG = np.random.RandomState(self.seed)
+        else:
+            raise ValueError('rng_mode must be \'legacy\' or \'generator\', not ' + str(self.rng_mode) + '!')
+
+    def drawSeed(self):
+        '''
+        Returns the seed argument for the next call to a draw function in
+        HARK.simulation: a new integer seed from self.RNG in 'legacy' rng_mode,
+        or the generator self.RNG itself in 'generator' mode.
+
+        Parameters
+        ----------
+        none
+
+        Returns
+        -------
+        seed : int or np.random.Generator
+            The seed to pass to the draw function.
+        '''
+        if isinstance(self.RNG, np.random.Generator):
+            return self.RNG
+        return self.RNG.randint(0, 2**31-1)
 
     def checkElementsOfTimeVaryAreLists(self):
         """
@@ -448,6 +1369,46 @@ class AgentType(HARKobject):
         '''
         return None
 
+    def getSolutionVector(self, solution):
+        '''
+        Returns the numbers that determine how a one period solution affects the
+        solution of the preceding period, as one array, so that the convergence
+        of an infinite horizon solution can be accelerated (see solveAgent).
+        Returns None here, meaning that acceleration is not available; subclasses
+        that support it should overwrite this and makeSolutionFromVector.
+
+        Parameters
+        ----------
+        solution : Solution
+            A one period solution.
+
+        Returns
+        -------
+        vector : np.array or None
+            The array representation of the solution, or None.
+        '''
+        return None
+
+    def makeSolutionFromVector(self, solution, vector):
+        '''
+        Makes a one period solution from an array in the form returned by
+        getSolutionVector, to be used as the next period's solution in the
+        following cycle.  Returns None here; see getSolutionVector.
+
+        Parameters
+        ----------
+        solution : Solution
+            A one period solution whose array representation is similar to vector.
+        vector : np.array
+            The array representation of the new solution.
+
+        Returns
+        -------
+        solution_new : Solution or None
+            The new solution, or None if vector does not represent a valid solution.
+        '''
+        return None
+
     def initializeSim(self):
         '''
         Prepares this AgentType for a new simulation.  Resets the internal random number generator,
@@ -472,7 +1433,7 @@ class AgentType(HARKobject):
         self.resetRNG()
         self.t_sim = 0
         all_agents = np.ones(self.AgentCount, dtype=bool)
-        blank_array = np.zeros(self.AgentCount)
+        blank_array = np.zeros(self.AgentCount, dtype=self.sim_dtype)
         for var_name in self.poststate_vars:
             setattr(self, var_name, copy(blank_array))
             # exec('self.' + var_name + ' = copy(blank_array)')
@@ -501,21 +1462,99 @@ class AgentType(HARKobject):
             raise Exception('Model instance does not have a solution stored. To simulate, it is necessary'
                             ' to run the `solve()` method of the class first.')
 
-        self.getMortality()  # Replace some agents with "newborns"
-        if self.read_shocks:  # If shock histories have been pre-specified, use those
-            self.readShocks()
-        else:                # Otherwise, draw shocks as usual according to subclass-specific method
-            self.getShocks()
-        self.getStates()  # Determine each agent's state at decision time
-        self.getControls()   # Determine each agent's choice or control variables based on states
-        self.getPostStates()  # Determine each agent's post-decision / end-of-period states using states and controls
+        if self.profiler is not None:
+            self.simOnePeriodProfiled()
+        else:
+            self.getMortality()  # Replace some agents with "newborns"
+            if self.read_shocks:  # If shock histories have been pre-specified, use those
+                self.readShocks()
+            else:                # Otherwise, draw shocks as usual according to subclass-specific method
+                self.getShocks()
+            self.getStates()  # Determine each agent's state at decision time
+            self.getControls()   # Determine each agent's choice or control variables based on states
+            self.getPostStates()  # Determine each agent's post-decision / end-of-period states using states and controls
 
         # Advance time for all agents
         self.t_age = self.t_age + 1  # Age all consumers by one period
         self.t_cycle = self.t_cycle + 1  # Age all consumers within their cycle
         self.t_cycle[self.t_cycle == self.T_cycle] = 0  # Resetting to zero for those who have reached the end
 
-    def makeShockHistory(self):
+    def simOnePeriodProfiled(self):
+        '''
+        Runs the stages of simOnePeriod, recording each of them in self.profiler.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        '''
+        with self.profiler.stage('getMortality'):
+            self.getMortality()
+        if self.read_shocks:
+            with self.profiler.stage('readShocks'):
+                self.readShocks()
+        else:
+            with self.profiler.stage('getShocks'):
+                self.getShocks()
+        with self.profiler.stage('getStates'):
+            self.getStates()
+        with self.profiler.stage('getControls'):
+            self.getControls()
+        with self.profiler.stage('getPostStates'):
+            self.getPostStates()
+
+    def checkSimPrecision(self, var_names, dtype=np.float32, sim_periods=None):
+        '''
+        Simulates copies of this type in float64 and in a lower precision dtype,
+        with the same seed, and reports how far the final cross-sectional moments
+        of each named variable are from their float64 values.
+
+        Parameters
+        ----------
+        var_names : [str]
+            Names of the simulated variables to compare, e.g. ['aLvlNow'].
+        dtype : type
+            The lower precision to check, usually np.float32.
+        sim_periods : int
+            Number of periods to simulate; defaults to T_sim.
+
+        Returns
+        -------
+        report : dict
+            For each name in var_names, a dict of the relative deviations of the
+            mean, standard deviation and 10th/50th/90th percentiles, and of the
+            largest relative deviation of any one agent's value.
+        '''
+        sims = {}
+        for this_dtype in [np.float64, dtype]:
+            agent = deepcopy(self)
+            agent.sim_dtype = this_dtype
+            agent.track_vars = []
+            agent.initializeSim()
+            agent.simulate(sim_periods, record=False)
+            sims[this_dtype] = dict((name, np.asarray(getattr(agent, name), dtype=np.float64)) for name in var_names)
+
+        def relDev(low, high):
+            return np.abs(low - high)/np.maximum(np.abs(high), 1e-12)
+
+        report = {}
+        for name in var_names:
+            high = sims[np.float64][name]
+            low = sims[dtype][name]
+            report[name] = {
+                'mean': relDev(np.nanmean(low), np.nanmean(high)),
+                'std': relDev(np.nanstd(low), np.nanstd(high)),
+                'p10': relDev(np.nanpercentile(low, 10), np.nanpercentile(high, 10)),
+                'p50': relDev(np.nanpercentile(low, 50), np.nanpercentile(high, 50)),
+                'p90': relDev(np.nanpercentile(low, 90), np.nanpercentile(high, 90)),
+                'max_agent': np.nanmax(relDev(low, high)) if high.size > 0 else 0.0,
+            }
+        return report
+
+    def makeShockHistory(self, compact=False):
         '''
         Makes a pre-specified history of shocks for the simulation.  Shock variables should be named
         in self.shock_vars, a list of strings that is subclass-specific.  This method runs a subset
@@ -526,7 +1565,10 @@ class AgentType(HARKobject):
 
         Parameters
         ----------
-        None
+        compact : boolean
+            If True, the shocks are instead stored as event indices in a ShockTape in the attribute
+            shock_tape (see ShockTape), which can be saved with shock_tape.save(), and no X_hist
+            attributes are made.
 
         Returns
         -------
@@ -537,22 +1579,30 @@ class AgentType(HARKobject):
         self.timeFwd()
         self.initializeSim()
 
-        # Make blank history arrays for each shock variable
-        for var_name in self.shock_vars:
-            setattr(self, var_name+'_hist', np.zeros((self.T_sim, self.AgentCount)) + np.nan)
+        # Make blank history arrays for each shock variable, or a blank tape
+        if compact:
+            shock_history = ShockTape(self.shock_vars, self.T_sim, self.AgentCount)
+        else:
+            shock_history = HistoryRecorder(self.shock_vars, self.T_sim, self.AgentCount)
+            for var_name in self.shock_vars:
+                setattr(self, var_name+'_hist', shock_history.hist[var_name])
 
         # Make and store the history of shocks for each period
         for t in range(self.T_sim):
             self.getMortality()
             self.getShocks()
-            for var_name in self.shock_vars:
-                exec('self.' + var_name + '_hist[self.t_sim,:] = self.' + var_name)
+            shock_history.record(self, self.t_sim)
             self.t_sim += 1
             self.t_age = self.t_age + 1  # Age all consumers by one period
             self.t_cycle = self.t_cycle + 1  # Age all consumers within their cycle
             self.t_cycle[self.t_cycle == self.T_cycle] = 0  # Resetting to zero for those who have reached the end
 
         # Restore the flow of time and flag that shocks can be read rather than simulated
+        if compact:
+            shock_history.shrink()
+            self.shock_tape = shock_history
+        else:
+            self.shock_tape = None
         self.read_shocks = True
         if not orig_time:
             self.timeRev()
@@ -633,6 +1683,8 @@ class AgentType(HARKobject):
         Reads values of shock variables for the current period from history arrays.  For each var-
         iable X named in self.shock_vars, this attribute of self is set to self.X_hist[self.t_sim,:].
 
+        If self.shock_tape is not None, the shocks are decoded from that tape instead.
+
         This method is only ever called if self.read_shocks is True.  This can be achieved by using
         the method makeShockHistory() (or manually after storing a "handcrafted" shock history).
 
@@ -644,9 +1696,38 @@ class AgentType(HARKobject):
         -------
         None
         '''
+        if self.shock_tape is not None:
+            for var_name in self.shock_vars:
+                setattr(self, var_name, self.shock_tape.read(var_name, self.t_sim))
+            return
         for var_name in self.shock_vars:
             setattr(self, var_name, getattr(self, var_name + '_hist')[self.t_sim, :])
 
+    def useShockTape(self, tape):
+        '''
+        Use a shock tape, e.g. one made by another instance with makeShockHistory(compact=True) and
+        saved to disk, as the pre-specified history of shocks for all subsequent calls to simulate().
+
+        Parameters
+        ----------
+        tape : ShockTape or string
+            The shock tape, or the name of a file it was saved to.
+
+        Returns
+        -------
+        None
+        '''
+        if not isinstance(tape, ShockTape):
+            tape = loadShockTape(tape)
+        if tape.N != self.AgentCount or tape.T < self.T_sim:
+            raise ValueError('Shock tape is ' + str(tape.T) + ' x ' + str(tape.N) + ', but this type simulates ' +
+                             str(self.T_sim) + ' periods of ' + str(self.AgentCount) + ' agents!')
+        missing = [var_name for var_name in self.shock_vars if var_name not in tape.var_names]
+        if len(missing) > 0:
+            raise ValueError('Shock tape has no history of ' + ', '.join(missing) + '!')
+        self.shock_tape = tape
+        self.read_shocks = True
+
     def getStates(self):
         '''
         Gets values of state variables for the current period, probably by using post-decision states
@@ -694,19 +1775,57 @@ class AgentType(HARKobject):
         '''
         return None
 
-    def simulate(self, sim_periods=None):
+    def simulate(self, sim_periods=None, callback=None, record=True):
         '''
         Simulates this agent type for a given number of periods. Defaults to self.T_sim if no input.
-        Records histories of attributes named in self.track_vars in attributes named varname_hist.
+        Records histories of attributes named in self.track_vars in self.history, and in attributes
+        named varname_hist (see clearHistory).
 
         Parameters
         ----------
-        None
+        sim_periods : int or None
+            Number of periods to simulate; defaults to self.T_sim.
+        callback : function or None
+            If not None, called as callback(t_sim, cross_section) after each period,
+            where cross_section is a dictionary with the current values of the
+            attributes named in self.track_vars.  See CrossSectionReducer.
+        record : boolean
+            Whether to record the histories of the tracked variables in self.history.
 
         Returns
         -------
         None
         '''
+        for t_sim, cross_section in self.simulateIter(sim_periods, record):
+            if callback is not None:
+                callback(t_sim, cross_section)
+
+    def simulateIter(self, sim_periods=None, record=False):
+        '''
+        Simulates this agent type for a given number of periods, as a generator that
+        yields the cross-section of tracked variables after each period.  With
+        record=False nothing is stored, so moments can be accumulated by the caller
+        in memory that does not grow with the number of periods.  The values in
+        each cross-section may be replaced in the next period, so copy any that
+        need to be kept.  To also avoid allocating full histories in initializeSim,
+        set track_summary=True, or leave track_vars empty and name the variables
+        to yield in stream_vars.
+
+        Parameters
+        ----------
+        sim_periods : int or None
+            Number of periods to simulate; defaults to self.T_sim.
+        record : boolean
+            Whether to also record the histories of the tracked variables in self.history.
+
+        Yields
+        ------
+        t_sim : int
+            The period just simulated.
+        cross_section : dict
+            Dictionary mapping the names in self.track_vars (or self.stream_vars
+            if it is not empty) to their current values.
+        '''
         if not hasattr(self, 't_sim'):
             raise Exception('It seems that the simulation variables were not initialize before calling ' +
                             'simulate(). Call initializeSim() to initialize the variables before calling simulate() again.')
@@ -722,27 +1841,45 @@ class AgentType(HARKobject):
                              'and call the initializeSim() method again, or set sim_periods <= T_sim.')
 
 
-        # Ignore floating point "errors". Numpy calls it "errors", but really it's excep-
-        # tions with well-defined answers such as 1.0/0.0 that is np.inf, -1.0/0.0 that is
-        # -np.inf, np.inf/np.inf is np.nan and so on.
-        with np.errstate(divide='ignore', over='ignore', under='ignore', invalid='ignore'):
-            orig_time = self.time_flow
-            self.timeFwd()
-            if sim_periods is None:
-                sim_periods = self.T_sim
+        orig_time = self.time_flow
+        self.timeFwd()
+        if sim_periods is None:
+            sim_periods = self.T_sim
 
+        stream_vars = self.stream_vars if len(self.stream_vars) > 0 else self.track_vars
+        try:
             for t in range(sim_periods):
-                self.simOnePeriod()
-                for var_name in self.track_vars:
-                    exec('self.' + var_name + '_hist[self.t_sim,:] = self.' + var_name)
+                # Ignore floating point "errors". Numpy calls it "errors", but really it's excep-
+                # tions with well-defined answers such as 1.0/0.0 that is np.inf, -1.0/0.0 that is
+                # -np.inf, np.inf/np.inf is np.nan and so on.  The error state is only changed
+                # while simulating, not while the caller handles the yielded cross-section.
+                with np.errstate(divide='ignore', over='ignore', under='ignore', invalid='ignore'):
+                    self.simOnePeriod()
+                if record:
+                    self.history.record(self, self.t_sim)
+                cross_section = {var_name: getattr(self, var_name) for var_name in stream_vars}
                 self.t_sim += 1
-
+                yield self.t_sim - 1, cross_section
+        finally:
+            if record:
+                self.history.flush()
             if not orig_time:
                 self.timeRev()
 
     def clearHistory(self):
         '''
-        Clears the histories of the attributes named in self.track_vars.
+        Clears the histories of the attributes named in self.track_vars by making
+        a new HistoryRecorder in self.history.  Unless only summaries are kept,
+        the history of each variable X is also available as the attribute X_hist.
+        How histories are stored is set by these attributes:
+
+        track_dtype : data type of the stored histories (default float).
+        track_agents : indices of the agents to store, or None for all agents.
+        track_every : store only every k-th simulated period (default 1).
+        track_summary : if True, store only per-period summary statistics,
+            available from self.history.getSummary(var_name).
+        track_path : if not None, a directory in which the histories are kept
+            as memory-mapped var_name.npy files (see loadHistory).
 
         Parameters
         ----------
@@ -752,22 +1889,36 @@ class AgentType(HARKobject):
         -------
         None
         '''
-        for var_name in self.track_vars:
-            exec('self.' + var_name + '_hist = np.zeros((self.T_sim,self.AgentCount)) + np.nan')
+        self.history = HistoryRecorder(self.track_vars, self.T_sim, self.AgentCount,
+                                       dtype=self.track_dtype, agents=self.track_agents,
+                                       every=self.track_every, summary=self.track_summary,
+                                       path=self.track_path)
+        if not self.track_summary:
+            for var_name in self.track_vars:
+                setattr(self, var_name + '_hist', self.history.hist[var_name])
 
 
-def solveAgent(agent, verbose):
+def solveAgent(agent, verbose, solution_start=None):
     '''
     Solve the dynamic model for one agent type.  This function iterates on "cycles"
     of an agent's model either a given number of times or until solution convergence
     if an infinite horizon model is used (with agent.cycles = 0).
 
+    If agent.accelerate is True, convergence of an infinite horizon model is sped
+    up with Anderson acceleration (see AndersonMixer) on the array representation
+    of the solution from agent.getSolutionVector, using agent.accel_memory past
+    cycles.  Convergence is still judged by the distance between a cycle's input
+    and its output, and the returned solution is always the output of a cycle.
+
     Parameters
     ----------
     agent : AgentType
         The microeconomic AgentType whose dynamic problem is to be solved.
     verbose : boolean
         If True, solution progress is printed to screen (when cycles != 1).
+    solution_start : Solution or None
+        For infinite horizon models, the solution to start the iteration from
+        (a "warm start"); if None, starts from agent.solution_terminal.
 
     Returns
     -------
@@ -789,10 +1940,15 @@ def solveAgent(agent, verbose):
 
 
     # Initialize the process, then loop over cycles
-    solution_last    = agent.solution_terminal # NOQA
+    warm_started     = infinite_horizon and solution_start is not None # NOQA
+    solution_last    = solution_start if warm_started else agent.solution_terminal # NOQA
     go               = True # NOQA
     completed_cycles = 0 # NOQA
     max_cycles       = 5000 # NOQA  - escape clause
+    distance_cache   = {} # NOQA  - flattened solutions for fastDistance, only while solving
+    accelerate       = infinite_horizon and getattr(agent, 'accelerate', False) # NOQA
+    if accelerate:
+        mixer = AndersonMixer(agent.accel_memory)
     if verbose:
         t_last = time()
     while go:
@@ -804,8 +1960,8 @@ def solveAgent(agent, verbose):
         # Check for termination: identical solutions across cycle iterations or run out of cycles
         solution_now = solution_cycle[-1]
         if infinite_horizon:
-            if completed_cycles > 0:
-                solution_distance = solution_now.distance(solution_last)
+            if completed_cycles > 0 or warm_started:  # A warm start may already be converged
+                solution_distance = solutionDistance(agent, solution_now, solution_last, distance_cache)
                 agent.solution_distance = solution_distance  # Add these attributes so users can 
                 agent.completed_cycles  = completed_cycles   # query them to see if solution is ready
                 go = (solution_distance > agent.tolerance and completed_cycles < max_cycles)
@@ -816,8 +1972,12 @@ def solveAgent(agent, verbose):
             cycles_left += -1
             go = cycles_left > 0
 
-        # Update the "last period solution"
-        solution_last = solution_now
+        # Update the "last period solution", extrapolating from past cycles if requested
+        if accelerate and go:
+            solution_last = accelerateSolution(agent, mixer, solution_last, solution_now)
+        else:
+            solution_last = solution_now
+        distance_cache = {key: entry for key, entry in distance_cache.items() if entry[0] is solution_last}
         completed_cycles += 1
 
         # Display progress if requested
@@ -834,6 +1994,14 @@ def solveAgent(agent, verbose):
     # Record the last cycle if horizon is infinite (solution is still empty!)
     if infinite_horizon:
         solution = solution_cycle  # PseudoTerminal=False impossible for infinite horizon
+        if accelerate:
+            agent.accel_steps = mixer.steps
+            agent.accel_restarts = mixer.restarts
+        agent.convergence_log.append({'cycles': completed_cycles, 'warm_start': warm_started,
+                                      'distance': solution_distance})
+        if verbose:
+            print('Converged in ' + str(completed_cycles) + ' cycles' +
+                  (' from a warm start.' if warm_started else '.'))
 
     # Restore the direction of time to its original orientation, then return the solution
     if original_time_flow:
@@ -841,6 +2009,89 @@ def solveAgent(agent, verbose):
     return solution
 
 
+def solutionDistance(agent, solution_A, solution_B, cache=None):
+    '''
+    Returns the distance between two one period solutions of an agent, used to
+    check convergence of an infinite horizon solution.  By default this is the
+    usual distance metric, computed with fastDistance.  If agent.distance_grid
+    is not None, it is instead the largest absolute difference between the two
+    solutions' functions named agent.distance_func (e.g. 'cFunc'), evaluated
+    at the points in distance_grid (an array, or a tuple of arrays for
+    functions of several variables).  If that attribute is a list of functions,
+    the largest difference over all of them is used.
+
+    Parameters
+    ----------
+    agent : AgentType
+        The agent whose solutions are compared.
+    solution_A : Solution
+        A one period solution.
+    solution_B : Solution
+        Another one period solution.
+    cache : dict or None
+        Optional dictionary of flattened solutions; see flattenForDistance.
+
+    Returns
+    -------
+    distance : float
+        The distance between the solutions.
+    '''
+    grid = getattr(agent, 'distance_grid', None)
+    if grid is None:
+        return fastDistance(solution_A, solution_B, cache)
+
+    if not isinstance(grid, tuple):
+        grid = (grid,)
+    funcs_A = getattr(solution_A, agent.distance_func)
+    funcs_B = getattr(solution_B, agent.distance_func)
+    if type(funcs_A) is not list:
+        funcs_A = [funcs_A]
+        funcs_B = [funcs_B]
+    distance = 0.0
+    for func_A, func_B in zip(funcs_A, funcs_B):
+        distance = max(distance, np.fmax.reduce(np.abs(func_A(*grid) - func_B(*grid)), axis=None))
+    return distance
+
+
+def accelerateSolution(agent, mixer, solution_last, solution_now):
+    '''
+    Makes the next period's solution for the next cycle of an accelerated
+    infinite horizon solution.  Falls back to solution_now (a plain iteration
+    step) if the solutions have no array representation or the extrapolated
+    one is not a valid solution.
+
+    Parameters
+    ----------
+    agent : AgentType
+        The AgentType being solved.
+    mixer : AndersonMixer
+        The accelerator, holding the history of past cycles.
+    solution_last : Solution
+        The next period's solution used as the input of the last cycle.
+    solution_now : Solution
+        The first period's solution produced by the last cycle.
+
+    Returns
+    -------
+    solution_next : Solution
+        The next period's solution to use in the next cycle.
+    '''
+    x = agent.getSolutionVector(solution_last)
+    g = agent.getSolutionVector(solution_now)
+    if x is None or g is None or x.size != g.size:
+        mixer.reset()
+        return solution_now
+    x_next = mixer.step(x, g)
+    if x_next is g:
+        return solution_now
+    solution_next = agent.makeSolutionFromVector(solution_now, x_next)
+    if solution_next is None:
+        mixer.restarts += 1
+        mixer.reset()
+        return solution_now
+    return solution_next
+
+
 def solveOneCycle(agent, solution_last):
     '''
     Solve one "cycle" of the dynamic model for one agent type.  This function
@@ -908,7 +2159,8 @@ def solveOneCycle(agent, solution_last):
         temp_dict = {name: solve_dict[name] for name in these_args}
 
         # Solve one period, add it to the solution, and move to the next period
-        solution_t = solveOnePeriod(**temp_dict)
+        with profileStage('solveOnePeriod'):
+            solution_t = solveOnePeriod(**temp_dict)
         solution_cycle.append(solution_t)
         solution_next = solution_t
 
@@ -984,6 +2236,9 @@ class Market(HARKobject):
         self.act_T     = act_T # NOQA
         self.tolerance = tolerance # NOQA
         self.max_loops = 1000 # NOQA
+        self.use_pool  = False # NOQA  - whether solve keeps the agents on an AgentPool
+        self.pool_return_vars = [] # NOQA  - attributes sent back by pool workers after solving
+        self.agent_pool = None # NOQA
 
         self.print_parallel_error_once = True
         # Print the error associated with calling the parallel method
@@ -1002,6 +2257,14 @@ class Market(HARKobject):
         -------
         None
         '''
+        if self.agent_pool is not None:
+            # Agents are resident on the pool's workers; only bring back what is needed here
+            returns = self.agent_pool.runCommands(['solve()'], self.pool_return_vars)
+            for this_type, this_return in zip(self.agents, returns):
+                for var_name in this_return:
+                    setattr(this_type, var_name, this_return[var_name])
+            return None
+
         # for this_type in self.agents:
         # this_type.solve()
         try:
@@ -1020,7 +2283,13 @@ class Market(HARKobject):
         '''
         "Solves" the market by finding a "dynamic rule" that governs the aggregate
         market state such that when agents believe in these dynamics, their actions
-        collectively generate the same dynamic rule.
+        collectively generate the same dynamic rule.  If self.use_pool is True,
+        the agents are sent once to an AgentPool of persistent workers, which
+        solve and simulate them on each loop; only the new dynamic rule and the
+        sown variables are sent to the workers, and only the reaped variables
+        (and any attributes named in self.pool_return_vars) are sent back.  The
+        agents in self.agents are then updated in place to their final state on
+        the workers, so other references to them see the solution.
 
         Parameters
         ----------
@@ -1034,22 +2303,35 @@ class Market(HARKobject):
         max_loops = self.max_loops  # Failsafe against infinite solution loop
         completed_loops = 0
         old_dynamics = None
+        distance_cache = {}  # flattened dynamic rules for fastDistance
+        if self.use_pool:
+            self.agent_pool = AgentPool(self.agents)
 
-        while go:  # Loop until the dynamic process converges or we hit the loop cap
-            self.solveAgents()  # Solve each AgentType's micro problem
-            self.makeHistory()  # "Run" the model while tracking aggregate variables
-            new_dynamics = self.updateDynamics()  # Find a new aggregate dynamic rule
-
-            # Check to see if the dynamic rule has converged (if this is not the first loop)
-            if completed_loops > 0:
-                distance = new_dynamics.distance(old_dynamics)
-            else:
-                distance = 1000000.0
-
-            # Move to the next loop if the terminal conditions are not met
-            old_dynamics = new_dynamics
-            completed_loops += 1
-            go = distance >= self.tolerance and completed_loops < max_loops
+        try:
+            while go:  # Loop until the dynamic process converges or we hit the loop cap
+                self.solveAgents()  # Solve each AgentType's micro problem
+                self.makeHistory()  # "Run" the model while tracking aggregate variables
+                new_dynamics = self.updateDynamics()  # Find a new aggregate dynamic rule
+
+                # Check to see if the dynamic rule has converged (if this is not the first loop)
+                if completed_loops > 0:
+                    distance = fastDistance(new_dynamics, old_dynamics, distance_cache)
+                else:
+                    distance = 1000000.0
+
+                # Move to the next loop if the terminal conditions are not met
+                old_dynamics = new_dynamics
+                distance_cache = {key: entry for key, entry in distance_cache.items() if entry[0] is old_dynamics}
+                completed_loops += 1
+                go = distance >= self.tolerance and completed_loops < max_loops
+            if self.agent_pool is not None:  # Bring back the solved and simulated agents
+                agents_out = self.agent_pool.getAgents()
+                for j in range(len(self.agents)):  # Update in place, so references stay valid
+                    self.agents[j].__dict__.update(agents_out[j].__dict__)
+        finally:
+            if self.agent_pool is not None:
+                self.agent_pool.close()
+                self.agent_pool = None
 
         self.dynamics = new_dynamics  # Store the final dynamic rule in self
 
@@ -1066,6 +2348,11 @@ class Market(HARKobject):
         -------
         none
         '''
+        if self.agent_pool is not None:  # Values were sent back by the workers in cultivate
+            for var_name in self.reap_vars:
+                setattr(self, var_name, [this_return[var_name] for this_return in self.pool_harvest])
+            return None
+
         for var_name in self.reap_vars:
             harvest = []
             for this_type in self.agents:
@@ -1085,6 +2372,10 @@ class Market(HARKobject):
         -------
         none
         '''
+        if self.agent_pool is not None:
+            self.agent_pool.setAttrs(dict((var_name, getattr(self, var_name)) for var_name in self.sow_vars))
+            return None
+
         for var_name in self.sow_vars:
             this_seed = getattr(self, var_name)
             for this_type in self.agents:
@@ -1124,7 +2415,9 @@ class Market(HARKobject):
         Has each AgentType in agents perform their marketAction method, using
         variables sown from the market (and maybe also "private" variables).
         The marketAction method should store new results in attributes named in
-        reap_vars to be reaped later.
+        reap_vars to be reaped later.  If the agents are on an AgentPool, each
+        worker runs marketAction for its agents in parallel and sends back the
+        attributes named in reap_vars, stored in self.pool_harvest.
 
         Parameters
         ----------
@@ -1134,6 +2427,10 @@ class Market(HARKobject):
         -------
         none
         '''
+        if self.agent_pool is not None:
+            self.pool_harvest = self.agent_pool.runCommands(['marketAction()'], self.reap_vars)
+            return None
+
         for this_type in self.agents:
             this_type.marketAction()
 
@@ -1155,8 +2452,11 @@ class Market(HARKobject):
         for var_name in self.sow_vars:  # Set the sow variables to their initial levels
             initial_val = getattr(self, var_name + '_init')
             setattr(self, var_name, initial_val)
-        for this_type in self.agents:  # Reset each AgentType in the market
-            this_type.reset()
+        if self.agent_pool is not None:  # Reset each AgentType in the market
+            self.agent_pool.runCommands(['reset()'])
+        else:
+            for this_type in self.agents:
+                this_type.reset()
 
     def store(self):
         '''
@@ -1226,6 +2526,8 @@ class Market(HARKobject):
             this_obj = getattr(dynamics, var_name)
             for this_type in self.agents:
                 setattr(this_type, var_name, this_obj)
+        if self.agent_pool is not None:
+            self.agent_pool.setAttrs(dict((var_name, getattr(dynamics, var_name)) for var_name in self.dyn_vars))
         return dynamics
 
 
@@ -11,7 +11,10 @@ from __future__ import absolute_import
 from builtins import range
 import numpy as np
 from .core import HARKobject
+from .utilities import makeGridExpMult
 from copy import deepcopy
+from collections import OrderedDict
+import hashlib
 import warnings
 
 def _isscalar(x):
@@ -57,6 +60,316 @@ def _check_flatten(dimension, *args):
             return True
 
 
+def searchsortedPacked(grid, lo, hi, x):
+    '''
+    Vectorized version of np.searchsorted (side='left') for many sorted segments
+    of one packed array at once.  Query point x[j] is located in the segment
+    grid[lo[j]:hi[j]] by a bisection that runs simultaneously for all queries,
+    so that many small interpolators can share one array pass.
+
+    Parameters
+    ----------
+    grid : np.array
+        A 1D array containing any number of sorted segments back to back.
+    lo : np.array
+        Integer array of the (absolute) first index of each query's segment.
+    hi : np.array
+        Integer array of the (absolute) end index of each query's segment.
+    x : np.array
+        Query points, with the same shape as lo and hi.
+
+    Returns
+    -------
+    pos : np.array
+        Integer array of absolute insertion positions in grid, between lo and hi.
+    '''
+    lo = np.array(lo, dtype=int)
+    hi = np.array(hi, dtype=int)
+    if lo.size == 0:
+        return lo
+    top = grid.size - 1
+    for j in range(int(np.ceil(np.log2(np.max(hi - lo) + 1)))):
+        mid = (lo + hi) // 2
+        active = lo < hi
+        less = grid[np.minimum(mid, top)] < x
+        lo = np.where(np.logical_and(active, less), mid + 1, lo)
+        hi = np.where(np.logical_and(active, np.logical_not(less)), mid, hi)
+    return lo
+
+
+class PackedSearch(HARKobject):
+    '''
+    Locates query points in many sorted segments of one packed array at once,
+    for when the segments are known in advance.  Segment s is shifted up by
+    s*step, where step exceeds the range of all the gridpoints, so that the
+    shifted segments are increasing and disjoint; each query is clipped to just
+    outside that range and shifted by its own segment's offset, and all of them
+    are located with a single C-level np.searchsorted.  Gives the same positions
+    as searchsortedPacked on whole segments, up to rounding in the last bits of
+    the shifted values.
+
+    When the gridpoints are spread fairly evenly over their range (such as the
+    cumulative distribution of a discretized shock), a guide table of evenly
+    spaced buckets per segment can be used instead: each query starts from the
+    first gridpoint of its bucket and steps forward over the few gridpoints in
+    that bucket, which is faster than bisection for large numbers of queries in
+    random order.  This gives exactly the same positions as np.searchsorted.
+    '''
+    distance_criteria = ['grid','bounds']
+
+    def __init__(self,grid,bounds,buckets=0,max_steps=8):
+        '''
+        Make a new searcher for the segments grid[bounds[s]:bounds[s+1]].
+
+        Parameters
+        ----------
+        grid : np.array
+            A 1D array of finite values containing any number of sorted segments
+            back to back.
+        bounds : np.array
+            Integer array with the first index of each segment, followed by grid.size.
+        buckets : int
+            Number of evenly spaced buckets per segment in the guide table; if 0
+            (the default), no guide table is made.
+        max_steps : int
+            The guide table is only used if no bucket contains more than this
+            many gridpoints; otherwise the search falls back to np.searchsorted.
+
+        Returns
+        -------
+        new instance of PackedSearch
+        '''
+        self.grid = np.asarray(grid,dtype=float).flatten()
+        self.bounds = np.asarray(bounds,dtype=int)
+        sizes = np.diff(self.bounds)
+        if self.grid.size > 0:
+            gMin, gMax = np.min(self.grid), np.max(self.grid)
+        else:
+            gMin, gMax = 0.0, 0.0
+        self.xMin = gMin - 0.5
+        self.xMax = gMax + 0.5
+        self.step = gMax - gMin + 1.0
+        self.keys = self.grid + self.step*np.repeat(np.arange(sizes.size),sizes)
+
+        # Make the guide table: guide[s,k] is the position of the first gridpoint
+        # of segment s whose bucket is not below k.  Queries and gridpoints are put
+        # in buckets by the same monotone formula, so a query's position in its
+        # segment is between the guide entries for its bucket and the next one.
+        self.guide = None
+        if buckets > 0 and gMax > gMin:
+            self.gMin = gMin
+            self.bucketScale = buckets/(gMax - gMin)
+            self.buckets = buckets
+            counts = np.bincount(np.repeat(np.arange(sizes.size),sizes)*buckets + self._bucket(self.grid),
+                                 minlength=sizes.size*buckets).reshape((sizes.size,buckets))
+            if np.max(counts,initial=0) <= max_steps:
+                guide = np.zeros((sizes.size,buckets+1),dtype=int)
+                guide[:,1:] = np.cumsum(counts,axis=1)
+                self.guide = (guide + self.bounds[:-1,np.newaxis]).flatten()
+
+    def _bucket(self,x):
+        '''
+        Returns the guide table bucket of each value in x.
+        '''
+        return np.clip((x - self.gMin)*self.bucketScale,0,self.buckets-1).astype(int)
+
+    def __call__(self,seg,x):
+        '''
+        Finds the insertion position (side='left') of each query point in its
+        own segment.
+
+        Parameters
+        ----------
+        seg : np.array
+            Integer array with the segment of each query point.
+        x : np.array
+            Query points, with the same shape as seg.
+
+        Returns
+        -------
+        pos : np.array
+            Integer array of absolute insertion positions in grid, between
+            bounds[seg] and bounds[seg+1].
+        '''
+        if self.guide is None:
+            return np.searchsorted(self.keys,np.clip(x,self.xMin,self.xMax) + self.step*seg)
+
+        # Step forward from the start of each query's bucket while the gridpoint is below x
+        start = seg*(self.buckets+1) + self._bucket(x)
+        pos = self.guide[start]
+        end = self.guide[start+1]
+        active = np.nonzero(pos < end)[0]
+        while active.size > 0:
+            below = self.grid[pos[active]] < x[active]
+            active = active[below]
+            pos[active] += 1
+            active = active[pos[active] < end[active]]
+        return pos
+
+
+class UniformGrid(HARKobject):
+    '''
+    A grid of evenly spaced points, as made by np.linspace.  Interpolators that
+    are given a grid descriptor instead of an array of gridpoints use it to
+    locate query points in closed form rather than with np.searchsorted.
+    '''
+    distance_criteria = ['grid']
+
+    def __init__(self,ming,maxg,ng):
+        '''
+        Make a new uniform grid descriptor.
+
+        Parameters
+        ----------
+        ming : float
+            Minimum value of the grid.
+        maxg : float
+            Maximum value of the grid.
+        ng : int
+            The number of grid points.
+
+        Returns
+        -------
+        None
+        '''
+        self.ming = ming
+        self.maxg = maxg
+        self.ng = ng
+        self.grid = self.makeGrid()
+
+    def makeGrid(self):
+        '''
+        Returns the array of gridpoints described by this object.
+        '''
+        return np.linspace(self.ming,self.maxg,self.ng)
+
+    def transform(self,x):
+        '''
+        Maps values in [ming,maxg] to the space in which the grid is uniform.
+        '''
+        return x
+
+    def searchsorted(self,x_list,x):
+        '''
+        Returns the same indices as np.searchsorted(x_list,x) for this grid,
+        computed in closed form.  Has the signature of the xSearchFunc arguments
+        of the interpolators; x_list is ignored in favor of self.grid.
+
+        Parameters
+        ----------
+        x_list : np.array
+            Unused; present for compatibility with np.searchsorted.
+        x : np.array or float
+            Values to locate on the grid.
+
+        Returns
+        -------
+        pos : np.array or int
+            Insertion positions of x in the grid, with the same shape as x.
+        '''
+        grid = self.grid
+        n = grid.size
+        z = np.atleast_1d(np.asarray(x,dtype=float))
+        lo = self.transform(grid[0])
+        hi = self.transform(grid[-1])
+        u = self.transform(np.clip(z,grid[0],grid[-1]))
+        pos = np.ceil((u - lo)/(hi - lo)*(n - 1))
+        pos = np.clip(np.nan_to_num(pos),0,n).astype(int)
+
+        # Rounding can put the closed form one point off; fix it up exactly
+        pos -= np.logical_and(pos > 0, grid[np.maximum(pos-1,0)] >= z)
+        pos += np.logical_and(pos < n, grid[np.minimum(pos,n-1)] < z)
+        if np.ndim(x) == 0:
+            return int(pos[0])
+        return pos.reshape(np.shape(x))
+
+
+class LogUniformGrid(UniformGrid):
+    '''
+    A grid of points that are evenly spaced in logs, with a strictly positive
+    minimum value.
+    '''
+    def makeGrid(self):
+        '''
+        Returns the array of gridpoints described by this object.
+        '''
+        return np.exp(np.linspace(np.log(self.ming),np.log(self.maxg),self.ng))
+
+    def transform(self,x):
+        '''
+        Maps values in [ming,maxg] to the space in which the grid is uniform.
+        '''
+        return np.log(x)
+
+
+class ExpMultGrid(UniformGrid):
+    '''
+    A multi-exponentially spaced grid, as made by HARK.utilities.makeGridExpMult.
+    '''
+    def __init__(self,ming,maxg,ng,timestonest=20):
+        '''
+        Make a new multi-exponential grid descriptor.
+
+        Parameters
+        ----------
+        ming : float
+            Minimum value of the grid.
+        maxg : float
+            Maximum value of the grid.
+        ng : int
+            The number of grid points.
+        timestonest : int
+            The number of times to nest the exponentiation.
+
+        Returns
+        -------
+        None
+        '''
+        self.timestonest = timestonest
+        UniformGrid.__init__(self,ming,maxg,ng)
+
+    def makeGrid(self):
+        '''
+        Returns the array of gridpoints described by this object.
+        '''
+        return makeGridExpMult(self.ming,self.maxg,self.ng,self.timestonest)
+
+    def transform(self,x):
+        '''
+        Maps values in [ming,maxg] to the space in which the grid is uniform.
+        '''
+        if self.timestonest <= 0:
+            return np.log(x)
+        for j in range(self.timestonest):
+            x = np.log(x + 1)
+        return x
+
+
+def _gridAndSearch(grid,searchFunc):
+    '''
+    Returns the array of gridpoints and the search function an interpolator
+    should use for one dimension.  A grid descriptor supplies its own closed
+    form search unless a searchFunc was given explicitly.
+    '''
+    if isinstance(grid,UniformGrid):
+        if searchFunc is None:
+            searchFunc = grid.searchsorted
+        grid = grid.grid
+    if searchFunc is None:
+        searchFunc = np.searchsorted
+    return grid, searchFunc
+
+
+
+def _matchPrecision(val,z):
+    '''
+    Returns val in float32 if the input z was float32, so that simulations run
+    in single precision (see AgentType.sim_dtype) stay in it; otherwise val.
+    '''
+    if z.dtype == np.float32:
+        return val.astype(np.float32,copy=False)
+    return val
+
 
 class HARKinterpolator1D(HARKobject):
     '''
@@ -80,7 +393,7 @@ class HARKinterpolator1D(HARKobject):
             shape as x.
         '''
         z = np.asarray(x)
-        return (self._evaluate(z.flatten())).reshape(z.shape)
+        return _matchPrecision(self._evaluate(z.flatten()).reshape(z.shape),z)
 
     def derivative(self,x):
         '''
@@ -98,7 +411,7 @@ class HARKinterpolator1D(HARKobject):
             dydx = f'(x), with the same shape as x.
         '''
         z = np.asarray(x)
-        return (self._der(z.flatten())).reshape(z.shape)
+        return _matchPrecision(self._der(z.flatten()).reshape(z.shape),z)
 
     def eval_with_derivative(self,x):
         '''
@@ -120,7 +433,7 @@ class HARKinterpolator1D(HARKobject):
         '''
         z = np.asarray(x)
         y, dydx = self._evalAndDer(z.flatten())
-        return y.reshape(z.shape), dydx.reshape(z.shape)
+        return _matchPrecision(y.reshape(z.shape),z), _matchPrecision(dydx.reshape(z.shape),z)
 
     def _evaluate(self,x):
         '''
@@ -167,7 +480,7 @@ class HARKinterpolator2D(HARKobject):
         '''
         xa = np.asarray(x)
         ya = np.asarray(y)
-        return (self._evaluate(xa.flatten(),ya.flatten())).reshape(xa.shape)
+        return _matchPrecision(self._evaluate(xa.flatten(),ya.flatten()).reshape(xa.shape),xa)
 
     def derivativeX(self,x,y):
         '''
@@ -190,7 +503,7 @@ class HARKinterpolator2D(HARKobject):
         '''
         xa = np.asarray(x)
         ya = np.asarray(y)
-        return (self._derX(xa.flatten(),ya.flatten())).reshape(xa.shape)
+        return _matchPrecision(self._derX(xa.flatten(),ya.flatten()).reshape(xa.shape),xa)
 
     def derivativeY(self,x,y):
         '''
@@ -213,7 +526,7 @@ class HARKinterpolator2D(HARKobject):
         '''
         xa = np.asarray(x)
         ya = np.asarray(y)
-        return (self._derY(xa.flatten(),ya.flatten())).reshape(xa.shape)
+        return _matchPrecision(self._derY(xa.flatten(),ya.flatten()).reshape(xa.shape),xa)
 
     def _evaluate(self,x,y):
         '''
@@ -264,7 +577,7 @@ class HARKinterpolator3D(HARKobject):
         xa = np.asarray(x)
         ya = np.asarray(y)
         za = np.asarray(z)
-        return (self._evaluate(xa.flatten(),ya.flatten(),za.flatten())).reshape(xa.shape)
+        return _matchPrecision(self._evaluate(xa.flatten(),ya.flatten(),za.flatten()).reshape(xa.shape),xa)
 
     def derivativeX(self,x,y,z):
         '''
@@ -291,7 +604,7 @@ class HARKinterpolator3D(HARKobject):
         xa = np.asarray(x)
         ya = np.asarray(y)
         za = np.asarray(z)
-        return (self._derX(xa.flatten(),ya.flatten(),za.flatten())).reshape(xa.shape)
+        return _matchPrecision(self._derX(xa.flatten(),ya.flatten(),za.flatten()).reshape(xa.shape),xa)
 
     def derivativeY(self,x,y,z):
         '''
@@ -318,7 +631,7 @@ class HARKinterpolator3D(HARKobject):
         xa = np.asarray(x)
         ya = np.asarray(y)
         za = np.asarray(z)
-        return (self._derY(xa.flatten(),ya.flatten(),za.flatten())).reshape(xa.shape)
+        return _matchPrecision(self._derY(xa.flatten(),ya.flatten(),za.flatten()).reshape(xa.shape),xa)
 
     def derivativeZ(self,x,y,z):
         '''
@@ -345,7 +658,7 @@ class HARKinterpolator3D(HARKobject):
         xa = np.asarray(x)
         ya = np.asarray(y)
         za = np.asarray(z)
-        return (self._derZ(xa.flatten(),ya.flatten(),za.flatten())).reshape(xa.shape)
+        return _matchPrecision(self._derZ(xa.flatten(),ya.flatten(),za.flatten()).reshape(xa.shape),xa)
 
     def _evaluate(self,x,y,z):
         '''
@@ -406,7 +719,7 @@ class HARKinterpolator4D(HARKobject):
         xa = np.asarray(x)
         ya = np.asarray(y)
         za = np.asarray(z)
-        return (self._evaluate(wa.flatten(),xa.flatten(),ya.flatten(),za.flatten())).reshape(wa.shape)
+        return _matchPrecision(self._evaluate(wa.flatten(),xa.flatten(),ya.flatten(),za.flatten()).reshape(wa.shape),wa)
 
     def derivativeW(self,w,x,y,z):
         '''
@@ -437,7 +750,7 @@ class HARKinterpolator4D(HARKobject):
         xa = np.asarray(x)
         ya = np.asarray(y)
         za = np.asarray(z)
-        return (self._derW(wa.flatten(),xa.flatten(),ya.flatten(),za.flatten())).reshape(wa.shape)
+        return _matchPrecision(self._derW(wa.flatten(),xa.flatten(),ya.flatten(),za.flatten()).reshape(wa.shape),wa)
 
     def derivativeX(self,w,x,y,z):
         '''
@@ -468,7 +781,7 @@ class HARKinterpolator4D(HARKobject):
         xa = np.asarray(x)
         ya = np.asarray(y)
         za = np.asarray(z)
-        return (self._derX(wa.flatten(),xa.flatten(),ya.flatten(),za.flatten())).reshape(wa.shape)
+        return _matchPrecision(self._derX(wa.flatten(),xa.flatten(),ya.flatten(),za.flatten()).reshape(wa.shape),wa)
 
     def derivativeY(self,w,x,y,z):
         '''
@@ -499,7 +812,7 @@ class HARKinterpolator4D(HARKobject):
         xa = np.asarray(x)
         ya = np.asarray(y)
         za = np.asarray(z)
-        return (self._derY(wa.flatten(),xa.flatten(),ya.flatten(),za.flatten())).reshape(wa.shape)
+        return _matchPrecision(self._derY(wa.flatten(),xa.flatten(),ya.flatten(),za.flatten()).reshape(wa.shape),wa)
 
     def derivativeZ(self,w,x,y,z):
         '''
@@ -530,7 +843,7 @@ class HARKinterpolator4D(HARKobject):
         xa = np.asarray(x)
         ya = np.asarray(y)
         za = np.asarray(z)
-        return (self._derZ(wa.flatten(),xa.flatten(),ya.flatten(),za.flatten())).reshape(wa.shape)
+        return _matchPrecision(self._derZ(wa.flatten(),xa.flatten(),ya.flatten(),za.flatten()).reshape(wa.shape),wa)
 
     def _evaluate(self,w,x,y,z):
         '''
@@ -724,6 +1037,65 @@ class ConstantFunction(HARKobject):
     derivativeXX= derivative
 
 
+def _flatBuffer(out,size):
+    '''
+    Returns a flat float view of a preallocated output array, or a new array of
+    the requested size if out is None.
+    '''
+    if out is None:
+        return np.empty(size)
+    if out.size != size or not out.flags.c_contiguous:
+        raise Exception('Output buffers must be contiguous with one element per query point!')
+    return out.reshape(size)
+
+
+class InterpBrackets(HARKobject):
+    '''
+    The result of searching for a set of query points on a 1D grid: the grid
+    segment that brackets each point, the interpolation weight within it, and
+    which points lie below or above the grid.  Made by LinearInterp.findBrackets
+    and reusable by every LinearInterp with the same x_list.
+    '''
+    def __init__(self,x_list,x,xSearchFunc=None):
+        '''
+        Make a new set of brackets.
+
+        Parameters
+        ----------
+        x_list : np.array
+            Sorted grid of x values on which to search.
+        x : np.array or float
+            Query points.
+        xSearchFunc : function
+            An optional function that returns the reference location for x values:
+            indices = xSearchFunc(x_list,x).  Default is np.searchsorted
+
+        Returns
+        -------
+        None
+        '''
+        z = np.asarray(x,dtype=float)
+        self.shape  = z.shape
+        self.x_list = x_list
+        self.x      = z.reshape(-1)
+        if xSearchFunc is None:
+            self.hi = np.searchsorted(x_list[:-1],self.x)
+        else:
+            self.hi = np.minimum(xSearchFunc(x_list,self.x),x_list.size-1)
+        self.hi     = np.maximum(self.hi,1)
+        self.lo     = self.hi - 1
+        self.alpha  = self.x - np.take(x_list,self.lo)
+        self.alpha /= np.take(np.diff(x_list),self.lo)
+        self.below  = np.flatnonzero(self.x < x_list[0])
+        self.above  = np.flatnonzero(self.x > x_list[-1])
+
+    def matches(self,x_list):
+        '''
+        Checks whether these brackets can be used on the grid x_list.
+        '''
+        return (x_list is self.x_list) or np.array_equal(x_list,self.x_list)
+
+
 class LinearInterp(HARKinterpolator1D):
     '''
     A "from scratch" 1D linear interpolation class.  Allows for linear or decay
@@ -731,14 +1103,14 @@ class LinearInterp(HARKinterpolator1D):
     '''
     distance_criteria = ['x_list','y_list']
 
-    def __init__(self,x_list,y_list,intercept_limit=None,slope_limit=None,lower_extrap=False):
+    def __init__(self,x_list,y_list,intercept_limit=None,slope_limit=None,lower_extrap=False,xSearchFunc=None):
         '''
         The interpolation constructor to make a new linear spline interpolation.
 
         Parameters
         ----------
-        x_list : np.array
-            List of x values composing the grid.
+        x_list : np.array or UniformGrid
+            List of x values composing the grid, or a grid descriptor.
         y_list : np.array
             List of y values, representing f(x) at the points in x_list.
         intercept_limit : float
@@ -748,6 +1120,10 @@ class LinearInterp(HARKinterpolator1D):
         lower_extrap : boolean
             Indicator for whether lower extrapolation is allowed.  False means
             f(x) = NaN for x < min(x_list); True means linear extrapolation.
+        xSearchFunc : function
+            An optional function that returns the reference location for x values:
+            indices = xSearchFunc(x_list,x).  Default is np.searchsorted, or the
+            closed form search of x_list if it is a grid descriptor.
 
         Returns
         -------
@@ -757,6 +1133,7 @@ class LinearInterp(HARKinterpolator1D):
         extrapolation is used above the highest gridpoint.
         '''
         # Make the basic linear spline interpolation
+        x_list, self.xSearchFunc = _gridAndSearch(x_list,xSearchFunc)
         self.x_list = np.array(x_list) if _check_flatten(1, x_list) else np.array(x_list).flatten()
         self.y_list = np.array(y_list) if _check_flatten(1, y_list) else np.array(y_list).flatten()
         _check_grid_dimensions(1, self.y_list, self.x_list)
@@ -778,7 +1155,74 @@ class LinearInterp(HARKinterpolator1D):
             self.decay_extrap = False
 
 
-    def _evalOrDer(self,x,_eval,_Der):
+    def findBrackets(self,x):
+        '''
+        Locates each value of x on this interpolator's grid.  The result can be
+        passed to evaluateInto for this or any other LinearInterp with the same
+        x_list, so that the search is done only once when several functions
+        are evaluated at the same points (e.g. cFunc and vFunc on one m grid).
+
+        Parameters
+        ----------
+        x : np.array or float
+            Real values at which the interpolated function(s) will be evaluated.
+
+        Returns
+        -------
+        brackets : InterpBrackets
+            Bracketing indices, interpolation weights and out-of-bounds indices
+            for the query points.
+        '''
+        return InterpBrackets(self.x_list,x,self._bracketSearchFunc())
+
+    def _bracketSearchFunc(self):
+        '''
+        Returns the search function for InterpBrackets, or None for the default.
+        Instances saved before xSearchFunc existed fall back to the default.
+        '''
+        xSearchFunc = getattr(self,'xSearchFunc',np.searchsorted)
+        return None if xSearchFunc is np.searchsorted else xSearchFunc
+
+    def evaluateInto(self,x,out=None,der_out=None,with_derivative=False):
+        '''
+        Evaluates the level (and optionally the first derivative) of the
+        interpolated function in a single pass, writing into preallocated
+        arrays when they are given.
+
+        Parameters
+        ----------
+        x : np.array or float or InterpBrackets
+            Real values to be evaluated in the interpolated function, or the
+            output of findBrackets for those values.
+        out : np.array or None
+            Contiguous float array with as many elements as x to hold the level
+            of the function.  A new array is made if None.
+        der_out : np.array or None
+            Contiguous float array with as many elements as x to hold the first
+            derivative of the function.  Passing it implies with_derivative.
+        with_derivative : boolean
+            Indicator for whether to also return the first derivative.
+
+        Returns
+        -------
+        y : np.array
+            The interpolated function evaluated at x, with the same shape as x.
+        dydx : np.array
+            The first derivative of the function at x, only returned when
+            with_derivative is True or der_out is given.
+        '''
+        if isinstance(x,InterpBrackets):
+            brackets = x
+        else:
+            brackets = self.findBrackets(x)
+        _Der = with_derivative or (der_out is not None)
+        output = self._evalOrDer(None,True,_Der,out=out,der_out=der_out,brackets=brackets)
+        output = [val.reshape(brackets.shape) for val in output]
+        if _Der:
+            return output[0], output[1]
+        return output[0]
+
+    def _evalOrDer(self,x,_eval,_Der,out=None,der_out=None,brackets=None):
         '''
         Returns the level and/or first derivative of the function at each value in
         x.  Only called internally by HARKinterpolator1D.eval_and_der (etc).
@@ -791,49 +1235,55 @@ class LinearInterp(HARKinterpolator1D):
             Indicator for whether to evalute the level of the interpolated function.
         _Der : boolean
             Indicator for whether to evaluate the derivative of the interpolated function.
+        out : np.array or None
+            Optional buffer for the level of the function.
+        der_out : np.array or None
+            Optional buffer for the derivative of the function.
+        brackets : InterpBrackets or None
+            Precomputed search results for x; x is ignored when they are given.
 
         Returns
         -------
         A list including the level and/or derivative of the interpolated function where requested.
         '''
-
-
-
-        i      = np.maximum(np.searchsorted(self.x_list[:-1],x),1)
-        alpha  = (x-self.x_list[i-1])/(self.x_list[i]-self.x_list[i-1])
+        if brackets is None:
+            brackets = InterpBrackets(self.x_list,x,self._bracketSearchFunc())
+        elif not brackets.matches(self.x_list):
+            raise Exception('The brackets were found on a different grid than this interpolator\'s x_list!')
+        lo     = brackets.lo
+        alpha  = brackets.alpha
+        output = []
 
         if _eval:
-                y = (1.-alpha)*self.y_list[i-1] + alpha*self.y_list[i]
+            # Same arithmetic as (1-alpha)*y[i-1] + alpha*y[i], without temporaries
+            y_list = self.y_list.astype(float,copy=False)
+            y = np.subtract(1.,alpha,out=_flatBuffer(out,alpha.size))
+            temp = np.take(y_list,lo)
+            y *= temp
+            np.take(y_list,brackets.hi,out=temp)
+            temp *= alpha
+            y += temp
+            output += [y,]
         if _Der:
-                dydx = (self.y_list[i] - self.y_list[i-1])/(self.x_list[i] - self.x_list[i-1])
-
-        if not self.lower_extrap:
-            below_lower_bound = x < self.x_list[0]
-
-            if _eval:
-                y[below_lower_bound] = np.nan
-            if _Der:
-                dydx[below_lower_bound] = np.nan
+            # One slope per segment, then gather the segment of each query
+            slopes = np.diff(self.y_list)/np.diff(self.x_list)
+            dydx = np.take(slopes,lo,out=_flatBuffer(der_out,alpha.size))
+            output += [dydx,]
 
-        if self.decay_extrap:
-            above_upper_bound = x > self.x_list[-1]
-            x_temp = x[above_upper_bound] - self.x_list[-1]
+        if not self.lower_extrap and brackets.below.size > 0:
+            for val in output:
+                val[brackets.below] = np.nan
 
+        if self.decay_extrap and brackets.above.size > 0:
+            x_above = brackets.x[brackets.above]
+            decay   = np.exp(-self.decay_extrap_B*(x_above - self.x_list[-1]))
             if _eval:
-                y[above_upper_bound] = self.intercept_limit + \
-                                       self.slope_limit*x[above_upper_bound] - \
-                                       self.decay_extrap_A*np.exp(-self.decay_extrap_B*x_temp)
-
+                y[brackets.above] = self.intercept_limit + \
+                                    self.slope_limit*x_above - \
+                                    self.decay_extrap_A*decay
             if _Der:
-                dydx[above_upper_bound] = self.slope_limit + \
-                                          self.decay_extrap_B*self.decay_extrap_A*\
-                                          np.exp(-self.decay_extrap_B*x_temp)
-
-        output = []
-        if _eval:
-            output += [y,]
-        if _Der:
-            output += [dydx,]
+                dydx[brackets.above] = self.slope_limit + \
+                                       self.decay_extrap_B*self.decay_extrap_A*decay
 
         return output
 
@@ -872,14 +1322,14 @@ class CubicInterp(HARKinterpolator1D):
     '''
     distance_criteria = ['x_list','y_list','dydx_list']
 
-    def __init__(self,x_list,y_list,dydx_list,intercept_limit=None,slope_limit=None,lower_extrap=False):
+    def __init__(self,x_list,y_list,dydx_list,intercept_limit=None,slope_limit=None,lower_extrap=False,xSearchFunc=None):
         '''
         The interpolation constructor to make a new cubic spline interpolation.
 
         Parameters
         ----------
-        x_list : np.array
-            List of x values composing the grid.
+        x_list : np.array or UniformGrid
+            List of x values composing the grid, or a grid descriptor.
         y_list : np.array
             List of y values, representing f(x) at the points in x_list.
         dydx_list : np.array
@@ -891,6 +1341,10 @@ class CubicInterp(HARKinterpolator1D):
         lower_extrap : boolean
             Indicator for whether lower extrapolation is allowed.  False means
             f(x) = NaN for x < min(x_list); True means linear extrapolation.
+        xSearchFunc : function
+            An optional function that returns the reference location for x values:
+            indices = xSearchFunc(x_list,x).  Default is np.searchsorted, or the
+            closed form search of x_list if it is a grid descriptor.
 
         Returns
         -------
@@ -899,6 +1353,7 @@ class CubicInterp(HARKinterpolator1D):
         NOTE: When no input is given for the limiting linear function, linear
         extrapolation is used above the highest gridpoint.
         '''
+        x_list, self.xSearchFunc = _gridAndSearch(x_list,xSearchFunc)
         self.x_list = np.asarray(x_list) if _check_flatten(1, x_list) else np.array(x_list).flatten()
         self.y_list = np.asarray(y_list) if _check_flatten(1, y_list) else np.array(y_list).flatten()
         self.dydx_list = np.asarray(dydx_list) if _check_flatten(1, dydx_list) else np.array(dydx_list).flatten()
@@ -947,7 +1402,7 @@ class CubicInterp(HARKinterpolator1D):
         called internally by HARKinterpolator1D.__call__ (etc).
         '''
         if _isscalar(x):
-            pos = np.searchsorted(self.x_list,x)
+            pos = getattr(self,'xSearchFunc',np.searchsorted)(self.x_list,x)
             if pos == 0:
                 y = self.coeffs[0,0] + self.coeffs[0,1]*(x - self.x_list[0])
             elif (pos < self.n):
@@ -958,7 +1413,7 @@ class CubicInterp(HARKinterpolator1D):
                 y = self.coeffs[pos,0] + x*self.coeffs[pos,1] - self.coeffs[pos,2]*np.exp(alpha*self.coeffs[pos,3])
         else:
             m = len(x)
-            pos = np.searchsorted(self.x_list,x)
+            pos = getattr(self,'xSearchFunc',np.searchsorted)(self.x_list,x)
             y = np.zeros(m)
             if y.size > 0:
                 out_bot   = pos == 0
@@ -983,7 +1438,7 @@ class CubicInterp(HARKinterpolator1D):
         in x. Only called internally by HARKinterpolator1D.derivative (etc).
         '''
         if _isscalar(x):
-            pos = np.searchsorted(self.x_list,x)
+            pos = getattr(self,'xSearchFunc',np.searchsorted)(self.x_list,x)
             if pos == 0:
                 dydx = self.coeffs[0,1]
             elif (pos < self.n):
@@ -994,7 +1449,7 @@ class CubicInterp(HARKinterpolator1D):
                 dydx = self.coeffs[pos,1] - self.coeffs[pos,2]*self.coeffs[pos,3]*np.exp(alpha*self.coeffs[pos,3])
         else:
             m = len(x)
-            pos = np.searchsorted(self.x_list,x)
+            pos = getattr(self,'xSearchFunc',np.searchsorted)(self.x_list,x)
             dydx = np.zeros(m)
             if dydx.size > 0:
                 out_bot   = pos == 0
@@ -1020,7 +1475,7 @@ class CubicInterp(HARKinterpolator1D):
         x.  Only called internally by HARKinterpolator1D.eval_and_der (etc).
         '''
         if _isscalar(x):
-            pos = np.searchsorted(self.x_list,x)
+            pos = getattr(self,'xSearchFunc',np.searchsorted)(self.x_list,x)
             if pos == 0:
                 y = self.coeffs[0,0] + self.coeffs[0,1]*(x - self.x_list[0])
                 dydx = self.coeffs[0,1]
@@ -1034,7 +1489,7 @@ class CubicInterp(HARKinterpolator1D):
                 dydx = self.coeffs[pos,1] - self.coeffs[pos,2]*self.coeffs[pos,3]*np.exp(alpha*self.coeffs[pos,3])
         else:
             m = len(x)
-            pos = np.searchsorted(self.x_list,x)
+            pos = getattr(self,'xSearchFunc',np.searchsorted)(self.x_list,x)
             y = np.zeros(m)
             dydx = np.zeros(m)
             if y.size > 0:
@@ -1073,31 +1528,31 @@ class BilinearInterp(HARKinterpolator2D):
         ----------
         f_values : numpy.array
             An array of size (x_n,y_n) such that f_values[i,j] = f(x_list[i],y_list[j])
-        x_list : numpy.array
+        x_list : numpy.array or UniformGrid
             An array of x values, with length designated x_n.
-        y_list : numpy.array
+        y_list : numpy.array or UniformGrid
             An array of y values, with length designated y_n.
         xSearchFunc : function
             An optional function that returns the reference location for x values:
-            indices = xSearchFunc(x_list,x).  Default is np.searchsorted
+            indices = xSearchFunc(x_list,x).  Default is np.searchsorted, or the
+            closed form search of x_list if it is a grid descriptor.
         ySearchFunc : function
             An optional function that returns the reference location for y values:
-            indices = ySearchFunc(y_list,y).  Default is np.searchsorted
+            indices = ySearchFunc(y_list,y).  Default is np.searchsorted, or the
+            closed form search of y_list if it is a grid descriptor.
 
         Returns
         -------
         new instance of BilinearInterp
         '''
         self.f_values = f_values
+        x_list, xSearchFunc = _gridAndSearch(x_list,xSearchFunc)
         self.x_list = np.array(x_list) if _check_flatten(1, x_list) else np.array(x_list).flatten()
+        y_list, ySearchFunc = _gridAndSearch(y_list,ySearchFunc)
         self.y_list = np.array(y_list) if _check_flatten(1, y_list) else np.array(y_list).flatten()
         _check_grid_dimensions(2, self.f_values, self.x_list, self.y_list)
         self.x_n = x_list.size
         self.y_n = y_list.size
-        if xSearchFunc is None:
-            xSearchFunc = np.searchsorted
-        if ySearchFunc is None:
-            ySearchFunc = np.searchsorted
         self.xSearchFunc = xSearchFunc
         self.ySearchFunc = ySearchFunc
 
@@ -1107,13 +1562,13 @@ class BilinearInterp(HARKinterpolator2D):
         Only called internally by HARKinterpolator2D.__call__ (etc).
         '''
         if _isscalar(x):
-            x_pos = max(min(self.xSearchFunc(self.x_list,x),self.x_n-1),1)
-            y_pos = max(min(self.ySearchFunc(self.y_list,y),self.y_n-1),1)
+            x_pos = max(min(getattr(self,'xSearchFunc',np.searchsorted)(self.x_list,x),self.x_n-1),1)
+            y_pos = max(min(getattr(self,'ySearchFunc',np.searchsorted)(self.y_list,y),self.y_n-1),1)
         else:
-            x_pos = self.xSearchFunc(self.x_list,x)
+            x_pos = getattr(self,'xSearchFunc',np.searchsorted)(self.x_list,x)
             x_pos[x_pos < 1] = 1
             x_pos[x_pos > self.x_n-1] = self.x_n-1
-            y_pos = self.ySearchFunc(self.y_list,y)
+            y_pos = getattr(self,'ySearchFunc',np.searchsorted)(self.y_list,y)
             y_pos[y_pos < 1] = 1
             y_pos[y_pos > self.y_n-1] = self.y_n-1
         alpha = (x - self.x_list[x_pos-1])/(self.x_list[x_pos] - self.x_list[x_pos-1])
@@ -1131,13 +1586,13 @@ class BilinearInterp(HARKinterpolator2D):
         at each value in x,y. Only called internally by HARKinterpolator2D.derivativeX.
         '''
         if _isscalar(x):
-            x_pos = max(min(self.xSearchFunc(self.x_list,x),self.x_n-1),1)
-            y_pos = max(min(self.ySearchFunc(self.y_list,y),self.y_n-1),1)
+            x_pos = max(min(getattr(self,'xSearchFunc',np.searchsorted)(self.x_list,x),self.x_n-1),1)
+            y_pos = max(min(getattr(self,'ySearchFunc',np.searchsorted)(self.y_list,y),self.y_n-1),1)
         else:
-            x_pos = self.xSearchFunc(self.x_list,x)
+            x_pos = getattr(self,'xSearchFunc',np.searchsorted)(self.x_list,x)
             x_pos[x_pos < 1] = 1
             x_pos[x_pos > self.x_n-1] = self.x_n-1
-            y_pos = self.ySearchFunc(self.y_list,y)
+            y_pos = getattr(self,'ySearchFunc',np.searchsorted)(self.y_list,y)
             y_pos[y_pos < 1] = 1
             y_pos[y_pos > self.y_n-1] = self.y_n-1
         beta = (y - self.y_list[y_pos-1])/(self.y_list[y_pos] - self.y_list[y_pos-1])
@@ -1154,13 +1609,13 @@ class BilinearInterp(HARKinterpolator2D):
         at each value in x,y. Only called internally by HARKinterpolator2D.derivativeY.
         '''
         if _isscalar(x):
-            x_pos = max(min(self.xSearchFunc(self.x_list,x),self.x_n-1),1)
-            y_pos = max(min(self.ySearchFunc(self.y_list,y),self.y_n-1),1)
+            x_pos = max(min(getattr(self,'xSearchFunc',np.searchsorted)(self.x_list,x),self.x_n-1),1)
+            y_pos = max(min(getattr(self,'ySearchFunc',np.searchsorted)(self.y_list,y),self.y_n-1),1)
         else:
-            x_pos = self.xSearchFunc(self.x_list,x)
+            x_pos = getattr(self,'xSearchFunc',np.searchsorted)(self.x_list,x)
             x_pos[x_pos < 1] = 1
             x_pos[x_pos > self.x_n-1] = self.x_n-1
-            y_pos = self.ySearchFunc(self.y_list,y)
+            y_pos = getattr(self,'ySearchFunc',np.searchsorted)(self.y_list,y)
             y_pos[y_pos < 1] = 1
             y_pos[y_pos > self.y_n-1] = self.y_n-1
         alpha = (x - self.x_list[x_pos-1])/(self.x_list[x_pos] - self.x_list[x_pos-1])
@@ -1187,40 +1642,40 @@ class TrilinearInterp(HARKinterpolator3D):
         f_values : numpy.array
             An array of size (x_n,y_n,z_n) such that f_values[i,j,k] =
             f(x_list[i],y_list[j],z_list[k])
-        x_list : numpy.array
+        x_list : numpy.array or UniformGrid
             An array of x values, with length designated x_n.
-        y_list : numpy.array
+        y_list : numpy.array or UniformGrid
             An array of y values, with length designated y_n.
-        z_list : numpy.array
+        z_list : numpy.array or UniformGrid
             An array of z values, with length designated z_n.
         xSearchFunc : function
             An optional function that returns the reference location for x values:
-            indices = xSearchFunc(x_list,x).  Default is np.searchsorted
+            indices = xSearchFunc(x_list,x).  Default is np.searchsorted, or the
+            closed form search of x_list if it is a grid descriptor.
         ySearchFunc : function
             An optional function that returns the reference location for y values:
-            indices = ySearchFunc(y_list,y).  Default is np.searchsorted
+            indices = ySearchFunc(y_list,y).  Default is np.searchsorted, or the
+            closed form search of y_list if it is a grid descriptor.
         zSearchFunc : function
             An optional function that returns the reference location for z values:
-            indices = zSearchFunc(z_list,z).  Default is np.searchsorted
+            indices = zSearchFunc(z_list,z).  Default is np.searchsorted, or the
+            closed form search of z_list if it is a grid descriptor.
 
         Returns
         -------
         new instance of TrilinearInterp
         '''
         self.f_values = f_values
+        x_list, xSearchFunc = _gridAndSearch(x_list,xSearchFunc)
         self.x_list = np.array(x_list) if _check_flatten(1, x_list) else np.array(x_list).flatten()
+        y_list, ySearchFunc = _gridAndSearch(y_list,ySearchFunc)
         self.y_list = np.array(y_list) if _check_flatten(1, y_list) else np.array(y_list).flatten()
+        z_list, zSearchFunc = _gridAndSearch(z_list,zSearchFunc)
         self.z_list = np.array(z_list) if _check_flatten(1, z_list) else np.array(z_list).flatten()
         _check_grid_dimensions(3, self.f_values, self.x_list, self.y_list, self.z_list)
         self.x_n = x_list.size
         self.y_n = y_list.size
         self.z_n = z_list.size
-        if xSearchFunc is None:
-            xSearchFunc = np.searchsorted
-        if ySearchFunc is None:
-            ySearchFunc = np.searchsorted
-        if zSearchFunc is None:
-            zSearchFunc = np.searchsorted
         self.xSearchFunc = xSearchFunc
         self.ySearchFunc = ySearchFunc
         self.zSearchFunc = zSearchFunc
@@ -1370,49 +1825,49 @@ class QuadlinearInterp(HARKinterpolator4D):
         f_values : numpy.array
             An array of size (w_n,x_n,y_n,z_n) such that f_values[i,j,k,l] =
             f(w_list[i],x_list[j],y_list[k],z_list[l])
-        w_list : numpy.array
+        w_list : numpy.array or UniformGrid
             An array of x values, with length designated w_n.
-        x_list : numpy.array
+        x_list : numpy.array or UniformGrid
             An array of x values, with length designated x_n.
-        y_list : numpy.array
+        y_list : numpy.array or UniformGrid
             An array of y values, with length designated y_n.
-        z_list : numpy.array
+        z_list : numpy.array or UniformGrid
             An array of z values, with length designated z_n.
         wSearchFunc : function
             An optional function that returns the reference location for w values:
-            indices = wSearchFunc(w_list,w).  Default is np.searchsorted
+            indices = wSearchFunc(w_list,w).  Default is np.searchsorted, or the
+            closed form search of w_list if it is a grid descriptor.
         xSearchFunc : function
             An optional function that returns the reference location for x values:
-            indices = xSearchFunc(x_list,x).  Default is np.searchsorted
+            indices = xSearchFunc(x_list,x).  Default is np.searchsorted, or the
+            closed form search of x_list if it is a grid descriptor.
         ySearchFunc : function
             An optional function that returns the reference location for y values:
-            indices = ySearchFunc(y_list,y).  Default is np.searchsorted
+            indices = ySearchFunc(y_list,y).  Default is np.searchsorted, or the
+            closed form search of y_list if it is a grid descriptor.
         zSearchFunc : function
             An optional function that returns the reference location for z values:
-            indices = zSearchFunc(z_list,z).  Default is np.searchsorted
+            indices = zSearchFunc(z_list,z).  Default is np.searchsorted, or the
+            closed form search of z_list if it is a grid descriptor.
 
         Returns
         -------
         new instance of QuadlinearInterp
         '''
         self.f_values = f_values
+        w_list, wSearchFunc = _gridAndSearch(w_list,wSearchFunc)
         self.w_list = np.array(w_list) if _check_flatten(1, w_list) else np.array(w_list).flatten()
+        x_list, xSearchFunc = _gridAndSearch(x_list,xSearchFunc)
         self.x_list = np.array(x_list) if _check_flatten(1, x_list) else np.array(x_list).flatten()
+        y_list, ySearchFunc = _gridAndSearch(y_list,ySearchFunc)
         self.y_list = np.array(y_list) if _check_flatten(1, y_list) else np.array(y_list).flatten()
+        z_list, zSearchFunc = _gridAndSearch(z_list,zSearchFunc)
         self.z_list = np.array(z_list) if _check_flatten(1, z_list) else np.array(z_list).flatten()
         _check_grid_dimensions(4, self.f_values, self.w_list, self.x_list, self.y_list, self.z_list)
         self.w_n = w_list.size
         self.x_n = x_list.size
         self.y_n = y_list.size
         self.z_n = z_list.size
-        if wSearchFunc is None:
-            wSearchFunc = np.searchsorted
-        if xSearchFunc is None:
-            xSearchFunc = np.searchsorted
-        if ySearchFunc is None:
-            ySearchFunc = np.searchsorted
-        if zSearchFunc is None:
-            zSearchFunc = np.searchsorted
         self.wSearchFunc = wSearchFunc
         self.xSearchFunc = xSearchFunc
         self.ySearchFunc = ySearchFunc
@@ -1805,6 +2260,299 @@ class UpperEnvelope(HARKinterpolator1D):
         return y,dydx
 
 
+class LinearInterpPack(HARKobject):
+    '''
+    A compact, array-backed collection of piecewise linear 1D functions, such as
+    the consumption functions for every period of a lifecycle.  Each function
+    is a LinearInterp or the LowerEnvelope of several LinearInterps; the knots
+    of all of them are stored back to back in one contiguous array, with an
+    offset and size for each piece.  The functions are evaluated together: the
+    j-th query point is evaluated with function number idx[j], in one array pass,
+    locating every query in its own piece with one PackedSearch.  That search
+    is over the knots of all pieces, so this only beats evaluating the functions
+    one at a time when there are not too many query points per function.
+    '''
+    distance_criteria = ['x_packed','y_packed']
+
+    def __init__(self,functions):
+        '''
+        Make a new pack of piecewise linear functions from existing interpolators.
+
+        Parameters
+        ----------
+        functions : [LinearInterp or LowerEnvelope]
+            A list of piecewise linear functions; each must be a LinearInterp
+            or a LowerEnvelope whose component functions are (recursively)
+            LinearInterps.
+
+        Returns
+        -------
+        new instance of LinearInterpPack
+        '''
+        pieces_by_func = []
+        self.envelope = np.zeros(len(functions),dtype=bool)
+        for j in range(len(functions)):
+            pieces_by_func.append(self._getPieces(functions[j]))
+            self.envelope[j] = isinstance(functions[j],LowerEnvelope)
+        pieces = [piece for these in pieces_by_func for piece in these]
+
+        # Stack all of the knots and record where each piece lives
+        sizes = np.array([piece.x_n for piece in pieces],dtype=int)
+        self.piece_start = np.concatenate(([0],np.cumsum(sizes)[:-1])).astype(int)
+        self.piece_size  = sizes
+        self.x_packed    = np.concatenate([piece.x_list for piece in pieces]).astype(float)
+        self.y_packed    = np.concatenate([piece.y_list for piece in pieces]).astype(float)
+        self.x_search    = PackedSearch(self.x_packed,np.append(self.piece_start,self.x_packed.size))
+
+        # Record extrapolation behavior for each piece
+        self.lower_extrap    = np.array([piece.lower_extrap for piece in pieces],dtype=bool)
+        self.decay_extrap    = np.array([piece.decay_extrap for piece in pieces],dtype=bool)
+        self.intercept_limit = np.array([piece.intercept_limit if piece.decay_extrap else 0.0 for piece in pieces])
+        self.slope_limit     = np.array([piece.slope_limit if piece.decay_extrap else 0.0 for piece in pieces])
+        self.decay_extrap_A  = np.array([piece.decay_extrap_A if piece.decay_extrap else 0.0 for piece in pieces])
+        self.decay_extrap_B  = np.array([piece.decay_extrap_B if piece.decay_extrap else 0.0 for piece in pieces])
+
+        # Make a (functions x max pieces) table of piece indices, padded with -1
+        piece_count = max([len(these) for these in pieces_by_func])
+        self.func_pieces = -np.ones((len(functions),piece_count),dtype=int)
+        j = 0
+        for f in range(len(functions)):
+            n = len(pieces_by_func[f])
+            self.func_pieces[f,:n] = np.arange(j,j+n)
+            j += n
+
+    def _getPieces(self,function):
+        '''
+        Returns a list of the LinearInterps whose lower envelope is function.
+        '''
+        if isinstance(function,LinearInterp):
+            return [function]
+        elif isinstance(function,LowerEnvelope):
+            pieces = []
+            for f in function.functions:
+                pieces += self._getPieces(f)
+            return pieces
+        else:
+            raise ValueError('LinearInterpPack can only hold LinearInterp and LowerEnvelope ' +
+                             'objects, not ' + function.__class__.__name__ + '.')
+
+    def unpack(self):
+        '''
+        Rebuild the ordinary interpolator objects represented by this pack.
+
+        Parameters
+        ----------
+        none
+
+        Returns
+        -------
+        functions : [LinearInterp or LowerEnvelope]
+            The functions in this pack, as new interpolator instances.
+        '''
+        functions = []
+        for f in range(self.func_pieces.shape[0]):
+            pieces = []
+            for p in self.func_pieces[f]:
+                if p < 0:
+                    continue
+                these = slice(self.piece_start[p],self.piece_start[p]+self.piece_size[p])
+                if self.decay_extrap[p]:
+                    pieces.append(LinearInterp(self.x_packed[these],self.y_packed[these],
+                                  self.intercept_limit[p],self.slope_limit[p],self.lower_extrap[p]))
+                else:
+                    pieces.append(LinearInterp(self.x_packed[these],self.y_packed[these],
+                                  lower_extrap=self.lower_extrap[p]))
+            if self.envelope[f]:
+                functions.append(LowerEnvelope(*pieces))
+            else:
+                functions.append(pieces[0])
+        return functions
+
+    def _evalPieces(self,p,x,_eval,_Der):
+        '''
+        Returns the level and/or derivative of piece p[j] at each x[j], with the
+        same extrapolation rules as LinearInterp.
+        '''
+        lo    = self.piece_start[p]
+        hi    = lo + self.piece_size[p] - 1
+        i     = lo + 1 # Pieces with only two knots (such as a borrowing constraint) need no search
+        long  = self.piece_size[p] > 2
+        if np.all(long):
+            i = np.minimum(np.maximum(self.x_search(p,x),i),hi)
+        elif np.any(long):
+            i[long] = np.minimum(np.maximum(self.x_search(p[long],x[long]),i[long]),hi[long])
+        x_bot = self.x_packed[i-1]
+        y_bot = self.y_packed[i-1]
+        slope = (self.y_packed[i] - y_bot)/(self.x_packed[i] - x_bot)
+        if _eval:
+            alpha = (x - x_bot)/(self.x_packed[i] - x_bot)
+            y = (1.-alpha)*y_bot + alpha*self.y_packed[i]
+        if _Der:
+            dydx = slope
+
+        below = np.logical_and(np.logical_not(self.lower_extrap[p]),x < self.x_packed[lo])
+        above = np.logical_and(self.decay_extrap[p],x > self.x_packed[hi])
+        if _eval:
+            y[below] = np.nan
+        if _Der:
+            dydx[below] = np.nan
+        if np.any(above):
+            pa     = p[above]
+            x_temp = x[above] - self.x_packed[hi[above]]
+            decay  = self.decay_extrap_A[pa]*np.exp(-self.decay_extrap_B[pa]*x_temp)
+            if _eval:
+                y[above] = self.intercept_limit[pa] + self.slope_limit[pa]*x[above] - decay
+            if _Der:
+                dydx[above] = self.slope_limit[pa] + self.decay_extrap_B[pa]*decay
+
+        output = []
+        if _eval:
+            output += [y,]
+        if _Der:
+            output += [dydx,]
+        return output
+
+    def _evalOrDer(self,idx,x,_eval,_Der):
+        '''
+        Returns the level and/or derivative of function idx[j] at each x[j],
+        taking the lower envelope across each function's pieces.
+        '''
+        x_in   = np.asarray(x)
+        idx, x = np.broadcast_arrays(np.asarray(idx,dtype=int),np.asarray(x,dtype=float))
+        shape  = x.shape
+        idx    = idx.flatten()
+        x      = x.flatten()
+        n      = x.size
+
+        # Evaluate every piece of each query's function, keeping the lowest value
+        # (the first one in case of ties, treating NaN as infinite); every
+        # function has at least one piece
+        y, d = self._evalPieces(self.func_pieces[:,0][idx],x,True,True)
+        y[np.isnan(y)] = np.inf
+        for k in range(1,self.func_pieces.shape[1]):
+            p = self.func_pieces[:,k][idx]
+            these = np.nonzero(p >= 0)[0]
+            if these.size < n:
+                y_k, d_k = self._evalPieces(p[these],x[these],True,True)
+                lower = y_k < y[these]
+                y[these[lower]] = y_k[lower]
+                d[these[lower]] = d_k[lower]
+            else:
+                y_k, d_k = self._evalPieces(p,x,True,True)
+                lower = y_k < y
+                y[lower] = y_k[lower]
+                d[lower] = d_k[lower]
+        y[np.isinf(y)] = np.nan
+
+        output = []
+        if _eval:
+            output += [_matchPrecision(y.reshape(shape),x_in),]
+        if _Der:
+            output += [_matchPrecision(d.reshape(shape),x_in),]
+        return output
+
+    def __call__(self,idx,x):
+        '''
+        Evaluates the packed functions at the given inputs.
+
+        Parameters
+        ----------
+        idx : np.array or int
+            Index of the function to be used for each point in x.
+        x : np.array or float
+            Real values to be evaluated.
+
+        Returns
+        -------
+        y : np.array
+            The functions evaluated at x: y[j] = f_{idx[j]}(x[j]), with the
+            same shape as x.
+        '''
+        return self._evalOrDer(idx,x,True,False)[0]
+
+    def derivative(self,idx,x):
+        '''
+        Evaluates the derivatives of the packed functions at the given inputs.
+
+        Parameters
+        ----------
+        idx : np.array or int
+            Index of the function to be used for each point in x.
+        x : np.array or float
+            Real values to be evaluated.
+
+        Returns
+        -------
+        dydx : np.array
+            The derivative of the functions at x: dydx[j] = f'_{idx[j]}(x[j]),
+            with the same shape as x.
+        '''
+        return self._evalOrDer(idx,x,False,True)[0]
+
+    def eval_with_derivative(self,idx,x):
+        '''
+        Evaluates the packed functions and their derivatives at the given inputs.
+
+        Parameters
+        ----------
+        idx : np.array or int
+            Index of the function to be used for each point in x.
+        x : np.array or float
+            Real values to be evaluated.
+
+        Returns
+        -------
+        y : np.array
+            The functions evaluated at x, with the same shape as x.
+        dydx : np.array
+            The derivative of the functions at x, with the same shape as x.
+        '''
+        return self._evalOrDer(idx,x,True,True)
+
+
+def _packOrNone(interpolators):
+    '''
+    Returns a LinearInterpPack of a list of 1D interpolators, or None if any of
+    them is not piecewise linear (so that it must be evaluated by itself).
+    '''
+    try:
+        return LinearInterpPack(interpolators)
+    except ValueError:
+        return None
+
+
+def _evalPackCorners(pack,corners,x,_Der=False):
+    '''
+    Evaluates a LinearInterpPack at x for each of several arrays of function
+    indices (the "corners" bracketing each query point) in a single pass.
+
+    Parameters
+    ----------
+    pack : LinearInterpPack
+        The packed 1D interpolators.
+    corners : [np.array]
+        Arrays of function indices, each with the same size as x.
+    x : np.array
+        Query points.
+    _Der : boolean
+        Indicator for whether to evaluate the derivative instead of the level.
+
+    Returns
+    -------
+    vals : [np.array]
+        The level (or derivative) of the indexed functions at x, one array for
+        each element of corners.
+    '''
+    m = x.size
+    idx = np.concatenate(corners)
+    x_all = np.tile(x,len(corners))
+    if _Der:
+        vals = pack.derivative(idx,x_all)
+    else:
+        vals = pack(idx,x_all)
+    return [vals[k*m:(k+1)*m] for k in range(len(corners))]
+
+
 class LowerEnvelope2D(HARKinterpolator2D):
     '''
     The lower envelope of a finite set of 2D functions, each of which can be of
@@ -2199,6 +2947,8 @@ class VariableLowerBoundFunc3D(HARKobject):
 class LinearInterpOnInterp1D(HARKinterpolator2D):
     '''
     A 2D interpolator that linearly interpolates among a list of 1D interpolators.
+    When the 1D interpolators are all piecewise linear, their knots are packed
+    into one LinearInterpPack so that array inputs are evaluated in one pass.
     '''
     distance_criteria = ['xInterpolators','y_list']
     def __init__(self,xInterpolators,y_values):
@@ -2222,6 +2972,7 @@ class LinearInterpOnInterp1D(HARKinterpolator2D):
         self.xInterpolators = xInterpolators
         self.y_list = y_values
         self.y_n = y_values.size
+        self.xPack = _packOrNone(xInterpolators)
 
     def _evaluate(self,x,y):
         '''
@@ -2238,7 +2989,11 @@ class LinearInterpOnInterp1D(HARKinterpolator2D):
             y_pos[y_pos > self.y_n-1] = self.y_n-1
             y_pos[y_pos < 1] = 1
             f = np.zeros(m) + np.nan
-            if y.size > 0:
+            if y.size > 0 and self.xPack is not None:
+                alpha = (y - self.y_list[y_pos-1])/(self.y_list[y_pos] - self.y_list[y_pos-1])
+                f_lo, f_hi = _evalPackCorners(self.xPack,[y_pos-1,y_pos],x)
+                f = (1-alpha)*f_lo + alpha*f_hi
+            elif y.size > 0:
                 for i in range(1,self.y_n):
                     c = y_pos == i
                     if np.any(c):
@@ -2261,7 +3016,11 @@ class LinearInterpOnInterp1D(HARKinterpolator2D):
             y_pos[y_pos > self.y_n-1] = self.y_n-1
             y_pos[y_pos < 1] = 1
             dfdx = np.zeros(m) + np.nan
-            if y.size > 0:
+            if y.size > 0 and self.xPack is not None:
+                alpha = (y - self.y_list[y_pos-1])/(self.y_list[y_pos] - self.y_list[y_pos-1])
+                dfdx_lo, dfdx_hi = _evalPackCorners(self.xPack,[y_pos-1,y_pos],x,_Der=True)
+                dfdx = (1-alpha)*dfdx_lo + alpha*dfdx_hi
+            elif y.size > 0:
                 for i in range(1,self.y_n):
                     c = y_pos == i
                     if np.any(c):
@@ -2283,7 +3042,10 @@ class LinearInterpOnInterp1D(HARKinterpolator2D):
             y_pos[y_pos > self.y_n-1] = self.y_n-1
             y_pos[y_pos < 1] = 1
             dfdy = np.zeros(m) + np.nan
-            if y.size > 0:
+            if y.size > 0 and self.xPack is not None:
+                f_lo, f_hi = _evalPackCorners(self.xPack,[y_pos-1,y_pos],x)
+                dfdy = (f_hi - f_lo)/(self.y_list[y_pos] - self.y_list[y_pos-1])
+            elif y.size > 0:
                 for i in range(1,self.y_n):
                     c = y_pos == i
                     if np.any(c):
@@ -2294,7 +3056,9 @@ class LinearInterpOnInterp1D(HARKinterpolator2D):
 class BilinearInterpOnInterp1D(HARKinterpolator3D):
     '''
     A 3D interpolator that bilinearly interpolates among a list of lists of 1D
-    interpolators.
+    interpolators.  When the 1D interpolators are all piecewise linear, their
+    knots are packed into one LinearInterpPack (in row-major order) so that
+    array inputs are evaluated in one pass.
     '''
     distance_criteria = ['xInterpolators','y_list','z_list']
 
@@ -2323,6 +3087,16 @@ class BilinearInterpOnInterp1D(HARKinterpolator3D):
         self.y_n = y_values.size
         self.z_list = z_values
         self.z_n = z_values.size
+        self.xPack = _packOrNone([f for row in xInterpolators for f in row])
+
+    def _packCorners(self,y_pos,z_pos):
+        '''
+        Returns the pack indices of the four 1D interpolators bracketing each
+        point, ordered (y-1,z-1), (y-1,z), (y,z-1), (y,z).
+        '''
+        lo = (y_pos-1)*self.z_n
+        hi = y_pos*self.z_n
+        return [lo + z_pos-1, lo + z_pos, hi + z_pos-1, hi + z_pos]
 
     def _evaluate(self,x,y,z):
         '''
@@ -2347,6 +3121,13 @@ class BilinearInterpOnInterp1D(HARKinterpolator3D):
             z_pos[z_pos > self.z_n-1] = self.z_n-1
             z_pos[z_pos < 1] = 1
             f = np.zeros(m) + np.nan
+            if self.xPack is not None:
+                alpha = (y - self.y_list[y_pos-1])/(self.y_list[y_pos] - self.y_list[y_pos-1])
+                beta = (z - self.z_list[z_pos-1])/(self.z_list[z_pos] - self.z_list[z_pos-1])
+                f00, f01, f10, f11 = _evalPackCorners(self.xPack,self._packCorners(y_pos,z_pos),x)
+                f = ((1-alpha)*(1-beta)*f00 + (1-alpha)*beta*f01
+                  + alpha*(1-beta)*f10 + alpha*beta*f11)
+                return f
             for i in range(1,self.y_n):
                 for j in range(1,self.z_n):
                     c = np.logical_and(i == y_pos, j == z_pos)
@@ -2383,6 +3164,13 @@ class BilinearInterpOnInterp1D(HARKinterpolator3D):
             z_pos[z_pos > self.z_n-1] = self.z_n-1
             z_pos[z_pos < 1] = 1
             dfdx = np.zeros(m) + np.nan
+            if self.xPack is not None:
+                alpha = (y - self.y_list[y_pos-1])/(self.y_list[y_pos] - self.y_list[y_pos-1])
+                beta = (z - self.z_list[z_pos-1])/(self.z_list[z_pos] - self.z_list[z_pos-1])
+                d00, d01, d10, d11 = _evalPackCorners(self.xPack,self._packCorners(y_pos,z_pos),x,_Der=True)
+                dfdx = ((1-alpha)*(1-beta)*d00 + (1-alpha)*beta*d01
+                     + alpha*(1-beta)*d10 + alpha*beta*d11)
+                return dfdx
             for i in range(1,self.y_n):
                 for j in range(1,self.z_n):
                     c = np.logical_and(i == y_pos, j == z_pos)
@@ -2416,6 +3204,11 @@ class BilinearInterpOnInterp1D(HARKinterpolator3D):
             z_pos[z_pos > self.z_n-1] = self.z_n-1
             z_pos[z_pos < 1] = 1
             dfdy = np.zeros(m) + np.nan
+            if self.xPack is not None:
+                beta = (z - self.z_list[z_pos-1])/(self.z_list[z_pos] - self.z_list[z_pos-1])
+                f00, f01, f10, f11 = _evalPackCorners(self.xPack,self._packCorners(y_pos,z_pos),x)
+                dfdy = (((1-beta)*f10 + beta*f11) - ((1-beta)*f00 + beta*f01))/(self.y_list[y_pos] - self.y_list[y_pos-1])
+                return dfdy
             for i in range(1,self.y_n):
                 for j in range(1,self.z_n):
                     c = np.logical_and(i == y_pos, j == z_pos)
@@ -2445,6 +3238,11 @@ class BilinearInterpOnInterp1D(HARKinterpolator3D):
             z_pos[z_pos > self.z_n-1] = self.z_n-1
             z_pos[z_pos < 1] = 1
             dfdz = np.zeros(m) + np.nan
+            if self.xPack is not None:
+                alpha = (y - self.y_list[y_pos-1])/(self.y_list[y_pos] - self.y_list[y_pos-1])
+                f00, f01, f10, f11 = _evalPackCorners(self.xPack,self._packCorners(y_pos,z_pos),x)
+                dfdz = (((1-alpha)*f01 + alpha*f11) - ((1-alpha)*f00 + alpha*f10))/(self.z_list[z_pos] - self.z_list[z_pos-1])
+                return dfdz
             for i in range(1,self.y_n):
                 for j in range(1,self.z_n):
                     c = np.logical_and(i == y_pos, j == z_pos)
@@ -3076,6 +3874,16 @@ class BilinearInterpOnInterp2D(HARKinterpolator4D):
         return dfdz
 
 
+def _violationCheck(x_check,y_check,x_bound_1,y_bound_1,x_bound_2,y_bound_2):
+    '''
+    Checks whether a set of points violates a linear boundary defined by
+    (x_bound_1,y_bound_1) and (x_bound_2,y_bound_2), where the latter is
+    *COUNTER CLOCKWISE* from the former.  Returns 1 if the point is outside the
+    boundary and 0 otherwise.
+    '''
+    return ((y_bound_2 - y_bound_1)*x_check - (x_bound_2 - x_bound_1)*y_check > x_bound_1*y_bound_2 - y_bound_1*x_bound_2) + 0
+
+
 class Curvilinear2DInterp(HARKinterpolator2D):
     '''
     A 2D interpolation method for curvilinear or "warped grid" interpolation, as
@@ -3109,6 +3917,7 @@ class Curvilinear2DInterp(HARKinterpolator2D):
         self.x_n = my_shape[0]
         self.y_n = my_shape[1]
         self.updatePolarity()
+        self.updateBuckets()
 
     def updatePolarity(self):
         '''
@@ -3145,11 +3954,67 @@ class Curvilinear2DInterp(HARKinterpolator2D):
         # sector must use the "minus" solution instead
         self.polarity = np.reshape(polarity,(self.x_n-1,self.y_n-1))
 
+    def updateBuckets(self):
+        '''
+        Fills in a uniform "bucket" grid over the bounding box of the interpolation
+        nodes, listing for each bucket the sectors whose bounding boxes overlap
+        it.  findSector uses it to test only a few candidate sectors for each
+        point.  Needs to be called in __init__, after updatePolarity.
+
+        Parameters
+        ----------
+        none
+
+        Returns
+        -------
+        none
+        '''
+        # Use about one bucket per sector, laid out like the sectors themselves
+        self.bucket_x_n = self.x_n-1
+        self.bucket_y_n = self.y_n-1
+        self.bucket_x_min = np.min(self.x_values)
+        self.bucket_x_max = np.max(self.x_values)
+        self.bucket_y_min = np.min(self.y_values)
+        self.bucket_y_max = np.max(self.y_values)
+
+        # Find the range of buckets covered by each sector's bounding box
+        corners_x = [self.x_values[:-1,:-1],self.x_values[1:,:-1],self.x_values[:-1,1:],self.x_values[1:,1:]]
+        corners_y = [self.y_values[:-1,:-1],self.y_values[1:,:-1],self.y_values[:-1,1:],self.y_values[1:,1:]]
+        x_lo, y_lo = self._bucketCoords(np.minimum.reduce(corners_x).flatten(),np.minimum.reduce(corners_y).flatten())
+        x_hi, y_hi = self._bucketCoords(np.maximum.reduce(corners_x).flatten(),np.maximum.reduce(corners_y).flatten())
+
+        # List every (bucket,sector) pair, then sort the pairs by bucket
+        width  = x_hi - x_lo + 1
+        counts = width*(y_hi - y_lo + 1)
+        sector = np.repeat(np.arange(counts.size),counts)
+        offset = np.arange(np.sum(counts)) - np.repeat(np.cumsum(counts) - counts,counts)
+        bucket = (np.repeat(x_lo,counts) + offset % np.repeat(width,counts))*self.bucket_y_n \
+               + np.repeat(y_lo,counts) + offset // np.repeat(width,counts)
+        order = np.argsort(bucket,kind='mergesort')
+        self.bucket_sectors = sector[order]
+        self.bucket_start = np.searchsorted(bucket[order],np.arange(self.bucket_x_n*self.bucket_y_n+1))
+
+    def _bucketCoords(self,x,y):
+        '''
+        Returns the (clipped) bucket coordinates of each point (x,y).
+        '''
+        x_span = max(self.bucket_x_max - self.bucket_x_min,1e-300)
+        y_span = max(self.bucket_y_max - self.bucket_y_min,1e-300)
+        x_bucket = np.floor((x - self.bucket_x_min)/x_span*self.bucket_x_n)
+        y_bucket = np.floor((y - self.bucket_y_min)/y_span*self.bucket_y_n)
+        x_bucket = np.clip(np.nan_to_num(x_bucket),0,self.bucket_x_n-1).astype(int)
+        y_bucket = np.clip(np.nan_to_num(y_bucket),0,self.bucket_y_n-1).astype(int)
+        return x_bucket, y_bucket
+
     def findSector(self,x,y):
         '''
         Finds the quadrilateral "sector" for each (x,y) point in the input.
         Only called as a subroutine of _evaluate().
 
+        Each point is tested against the few sectors listed in its bucket; any
+        point that is not found this way (e.g. because it is outside the grid)
+        is located by walking across sectors from the middle of the grid.
+
         Parameters
         ----------
         x : np.array
@@ -3164,18 +4029,63 @@ class Curvilinear2DInterp(HARKinterpolator2D):
         y_pos : np.array
             Sector y-coordinates for each point of the input, of the same size.
         '''
+        m = x.size
+        x_pos = np.zeros(m,dtype=int)
+        y_pos = np.zeros(m,dtype=int)
+        found = np.zeros(m,dtype=bool)
+
+        # Test the candidate sectors in each point's bucket, one at a time
+        in_box = np.logical_and(
+            np.logical_and(x >= self.bucket_x_min, x <= self.bucket_x_max),
+            np.logical_and(y >= self.bucket_y_min, y <= self.bucket_y_max))
+        x_bucket, y_bucket = self._bucketCoords(x,y)
+        bucket = x_bucket*self.bucket_y_n + y_bucket
+        start = self.bucket_start[bucket]
+        count = (self.bucket_start[bucket+1] - start)*in_box
+        for k in range(np.max(count) if m > 0 else 0):
+            idx = np.flatnonzero(np.logical_and(np.logical_not(found), count > k))
+            if idx.size == 0:
+                break
+            sector = self.bucket_sectors[start[idx]+k]
+            i = sector // (self.y_n-1)
+            j = sector % (self.y_n-1)
+            inside = self._inSector(x[idx],y[idx],i,j)
+            x_pos[idx[inside]] = i[inside]
+            y_pos[idx[inside]] = j[inside]
+            found[idx[inside]] = True
+
+        # Walk to the sector of any point that was not found in its bucket
+        if not np.all(found):
+            left = np.logical_not(found)
+            x_pos[left], y_pos[left] = self._walkSectors(x[left],y[left])
+        return x_pos, y_pos
+
+    def _inSector(self,x,y,x_pos,y_pos):
+        '''
+        Checks whether each point (x,y) lies in the sector (x_pos,y_pos).
+        '''
+        xA = self.x_values[x_pos,y_pos]
+        xB = self.x_values[x_pos+1,y_pos]
+        xC = self.x_values[x_pos,y_pos+1]
+        xD = self.x_values[x_pos+1,y_pos+1]
+        yA = self.y_values[x_pos,y_pos]
+        yB = self.y_values[x_pos+1,y_pos]
+        yC = self.y_values[x_pos,y_pos+1]
+        yD = self.y_values[x_pos+1,y_pos+1]
+        violations = (_violationCheck(x,y,xA,yA,xB,yB) + _violationCheck(x,y,xB,yB,xD,yD)
+                    + _violationCheck(x,y,xD,yD,xC,yC) + _violationCheck(x,y,xC,yC,xA,yA))
+        return violations == 0
+
+    def _walkSectors(self,x,y):
+        '''
+        Finds the sector for each (x,y) point by moving one sector at a time
+        from the middle of the grid toward it.  Only called by findSector.
+        '''
         # Initialize the sector guess
         m = x.size
         x_pos_guess = (np.ones(m)*self.x_n/2).astype(int)
         y_pos_guess = (np.ones(m)*self.y_n/2).astype(int)
 
-        # Define a function that checks whether a set of points violates a linear
-        # boundary defined by (x_bound_1,y_bound_1) and (x_bound_2,y_bound_2),
-        # where the latter is *COUNTER CLOCKWISE* from the former.  Returns
-        # 1 if the point is outside the boundary and 0 otherwise.
-        violationCheck = lambda x_check,y_check,x_bound_1,y_bound_1,x_bound_2,y_bound_2 : (
-            (y_bound_2 - y_bound_1)*x_check - (x_bound_2 - x_bound_1)*y_check > x_bound_1*y_bound_2 - y_bound_1*x_bound_2 ) + 0
-
         # Identify the correct sector for each point to be evaluated
         these = np.ones(m,dtype=bool)
         max_loops = self.x_n + self.y_n
@@ -3201,10 +4111,10 @@ class Curvilinear2DInterp(HARKinterpolator2D):
 
             # Check which boundaries are violated (and thus where to look next)
             c = (move_down + move_right + move_up + move_left) == 0
-            move_down[c] = violationCheck(x_temp[c],y_temp[c],xA[c],yA[c],xB[c],yB[c])
-            move_right[c] = violationCheck(x_temp[c],y_temp[c],xB[c],yB[c],xD[c],yD[c])
-            move_up[c] = violationCheck(x_temp[c],y_temp[c],xD[c],yD[c],xC[c],yC[c])
-            move_left[c] = violationCheck(x_temp[c],y_temp[c],xC[c],yC[c],xA[c],yA[c])
+            move_down[c] = _violationCheck(x_temp[c],y_temp[c],xA[c],yA[c],xB[c],yB[c])
+            move_right[c] = _violationCheck(x_temp[c],y_temp[c],xB[c],yB[c],xD[c],yD[c])
+            move_up[c] = _violationCheck(x_temp[c],y_temp[c],xD[c],yD[c],xC[c],yC[c])
+            move_left[c] = _violationCheck(x_temp[c],y_temp[c],xC[c],yC[c],xA[c],yA[c])
 
             # Update the sector guess based on the violations
             x_pos_next = x_pos_guess[these] - move_left + move_right
@@ -3398,6 +4308,112 @@ class Curvilinear2DInterp(HARKinterpolator2D):
         dfdy = y_alpha*dfda + y_beta*dfdb
         return dfdy
 
+
+class InterpolatorCache(HARKobject):
+    '''
+    A bounded, least-recently-used cache of interpolators, keyed on the class
+    and the *content* of the arguments used to make them.  Solvers that build
+    the same interpolator every period (e.g. the constrained consumption
+    function) can get one shared instance instead of a new one each time.
+    Cached instances are shared, so their array attributes are made read-only.
+    '''
+    def __init__(self,maxsize=256):
+        '''
+        Make a new, empty interpolator cache.
+
+        Parameters
+        ----------
+        maxsize : int
+            Maximum number of interpolators to keep; the least recently used
+            one is dropped when a new one would exceed it.
+
+        Returns
+        -------
+        None
+        '''
+        self.maxsize = maxsize
+        self.clear()
+
+    def clear(self):
+        '''
+        Empties the cache and resets its hit and miss counts.
+        '''
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _argKey(self,arg):
+        '''
+        Returns a hashable description of the content of one argument.
+        '''
+        if arg is None or isinstance(arg,(bool,int,float,str,np.number,np.bool_)):
+            return (type(arg).__name__,arg)
+        if isinstance(arg,(list,tuple,np.ndarray)):
+            arr = np.ascontiguousarray(arg)
+            if arr.dtype == object:
+                raise TypeError('InterpolatorCache can only hash numeric arrays!')
+            return (arr.dtype.str,arr.shape,hashlib.sha1(arr.tobytes()).hexdigest())
+        raise TypeError('InterpolatorCache cannot hash arguments of type ' + type(arg).__name__ + '!')
+
+    def get(self,cls,*args,**kwds):
+        '''
+        Returns an instance of cls made with the given arguments, reusing a
+        cached instance if one was made from arguments with the same content.
+
+        Parameters
+        ----------
+        cls : type
+            The interpolator class, e.g. LinearInterp.
+        *args, **kwds :
+            Arguments to cls; each must be None, a number, a string, or a
+            numeric array (or list).
+
+        Returns
+        -------
+        interpolator : cls
+            A shared, read-only instance of cls.
+        '''
+        key = (cls,tuple(self._argKey(arg) for arg in args),
+               tuple((name,self._argKey(kwds[name])) for name in sorted(kwds)))
+        if key in self.entries:
+            self.hits += 1
+            interpolator = self.entries.pop(key)
+            self.entries[key] = interpolator
+            return interpolator
+
+        # Copy the array arguments so that later changes to them can't leak in
+        self.misses += 1
+        args = [np.array(arg) if isinstance(arg,np.ndarray) else arg for arg in args]
+        kwds = dict((name,np.array(arg) if isinstance(arg,np.ndarray) else arg) for name, arg in kwds.items())
+        interpolator = cls(*args,**kwds)
+        for value in vars(interpolator).values():
+            if isinstance(value,np.ndarray):
+                value.setflags(write=False)
+        self.entries[key] = interpolator
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return interpolator
+
+    def hitRate(self):
+        '''
+        Returns the share of requests that were served from the cache, or
+        np.nan if there have been no requests.
+        '''
+        requests = self.hits + self.misses
+        return self.hits/requests if requests > 0 else np.nan
+
+
+# The cache shared by the solvers in HARK.ConsumptionSaving
+interpolatorCache = InterpolatorCache()
+
+
+def cachedInterpolator(cls,*args,**kwds):
+    '''
+    Returns an interpolator of class cls made with the given arguments, shared
+    through the module-level interpolatorCache.  See InterpolatorCache.get.
+    '''
+    return interpolatorCache.get(cls,*args,**kwds)
+
 ###############################################################################
 ## Functions used in discrete choice models with T1EV taste shocks ############
 ###############################################################################
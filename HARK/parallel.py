@@ -9,6 +9,7 @@ from builtins import zip
 from builtins import str
 from builtins import range
 import multiprocessing
+import traceback
 import numpy as np
 from time import time
 import csv
@@ -129,6 +130,213 @@ def runCommands(agent, command_list):
     return agent
 
 
+class AgentPool(object):
+    """
+    A pool of persistent worker processes, each of which keeps some of the
+    AgentTypes in agent_list resident in memory.  Agents are sent to the
+    workers once, when the pool is made; after that, only commands, attribute
+    values to set (e.g. a new dynamic rule) and the requested attributes of the
+    agents are passed between processes.  Messages are serialized with dill.
+    """
+
+    def __init__(self, agent_list, num_jobs=None):
+        """
+        Make a new pool of workers and distribute the agents among them.
+
+        Parameters
+        ----------
+        agent_list : [AgentType]
+            A list of instances of AgentType to keep on the workers.
+        num_jobs : int or None
+            Number of worker processes.  Defaults to the smaller of the number
+            of AgentTypes and the number of available cores.
+
+        Returns
+        -------
+        None
+        """
+        if num_jobs is None:
+            num_jobs = min(len(agent_list), multiprocessing.cpu_count())
+        self.agent_count = len(agent_list)
+        self.connections = []
+        self.workers = []
+        for i in range(num_jobs):
+            parent_end, child_end = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=poolWorker, args=(child_end,))
+            worker.daemon = True
+            worker.start()
+            child_end.close()
+            self.connections.append(parent_end)
+            self.workers.append(worker)
+
+        # Agent j lives on worker j % num_jobs
+        self.broadcast(
+            "load",
+            [
+                dict((j, agent_list[j]) for j in range(i, self.agent_count, num_jobs))
+                for i in range(num_jobs)
+            ],
+        )
+
+    def broadcast(self, command, payloads):
+        """
+        Sends a command to every worker and collects their replies.
+
+        Parameters
+        ----------
+        command : string
+            Name of the command for the workers; see poolWorker.
+        payloads : [object]
+            The data sent with the command to each worker.
+
+        Returns
+        -------
+        replies : [object]
+            The reply from each worker.
+        """
+        for connection, payload in zip(self.connections, payloads):
+            connection.send_bytes(pickle.dumps((command, payload)))
+        replies = [pickle.loads(connection.recv_bytes()) for connection in self.connections]
+        for status, reply in replies:
+            if status == "error":
+                raise Exception("An AgentPool worker failed with the following error:\n" + reply)
+        return [reply for status, reply in replies]
+
+    def setAttrs(self, attr_dict):
+        """
+        Sets attributes of every AgentType in the pool.
+
+        Parameters
+        ----------
+        attr_dict : dict
+            Dictionary mapping attribute names to the values to set.
+
+        Returns
+        -------
+        None
+        """
+        self.broadcast("set", len(self.connections) * [attr_dict])
+
+    def runCommands(self, command_list, return_vars=[]):
+        """
+        Executes the list of commands in command_list for each AgentType in the
+        pool, then collects the attributes named in return_vars from each of them.
+
+        Parameters
+        ----------
+        command_list : [string]
+            A list of commands to run for each AgentType, as methods.
+        return_vars : [string]
+            Names of the attributes to collect from each AgentType.
+
+        Returns
+        -------
+        returns : [dict]
+            For each AgentType in the order of agent_list, a dictionary mapping
+            the names in return_vars to the attribute values.
+        """
+        replies = self.broadcast("run", len(self.connections) * [(command_list, return_vars)])
+        return self.inAgentOrder(replies)
+
+    def getAgents(self):
+        """
+        Collects the AgentTypes in the pool in their current state.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        agent_list : [AgentType]
+            Copies of the AgentTypes held by the workers, in the order of agent_list.
+        """
+        return self.inAgentOrder(self.broadcast("get", len(self.connections) * [None]))
+
+    def inAgentOrder(self, replies):
+        """
+        Combines dictionaries keyed by agent index, one from each worker, into a
+        list in the order of the agents.
+
+        Parameters
+        ----------
+        replies : [dict]
+            The replies from each worker.
+
+        Returns
+        -------
+        ordered : [object]
+            The values for each agent, in order.
+        """
+        combined = {}
+        for reply in replies:
+            combined.update(reply)
+        return [combined[j] for j in range(self.agent_count)]
+
+    def close(self):
+        """
+        Stops the workers.  The pool cannot be used after it is closed.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if len(self.workers) == 0:
+            return
+        self.broadcast("close", len(self.connections) * [None])
+        for connection, worker in zip(self.connections, self.workers):
+            worker.join()
+            connection.close()
+        self.connections = []
+        self.workers = []
+
+
+def poolWorker(connection):
+    """
+    The loop run by each worker process of an AgentPool.  Receives commands
+    through connection, applies them to the AgentTypes kept by this worker,
+    and sends back ("ok", reply) or ("error", traceback).
+
+    Parameters
+    ----------
+    connection : multiprocessing.Connection
+        This worker's end of the pipe to the AgentPool.
+
+    Returns
+    -------
+    None
+    """
+    agents = {}
+    while True:
+        command, payload = pickle.loads(connection.recv_bytes())
+        try:
+            reply = None
+            if command == "load":
+                agents.update(payload)
+            elif command == "set":
+                for agent in agents.values():
+                    for name, value in payload.items():
+                        setattr(agent, name, value)
+            elif command == "run":
+                command_list, return_vars = payload
+                reply = {}
+                for j in sorted(agents):
+                    runCommands(agents[j], command_list)
+                    reply[j] = dict((name, getattr(agents[j], name)) for name in return_vars)
+            elif command == "get":
+                reply = agents
+            out = ("ok", reply)
+        except Exception:
+            out = ("error", traceback.format_exc())
+        connection.send_bytes(pickle.dumps(out))
+        if command == "close":
+            break
+
+
 #=============================================================
 # ========  Define a parallel Nelder-Mead algorithm ==========
 #=============================================================
@@ -6,7 +6,97 @@ from __future__ import division
 import warnings                             # A library for runtime warnings
 import numpy as np                          # Numerical Python
 
-def drawMeanOneLognormal(N, sigma=1.0, seed=0):
+def makeRNG(seed=0, bit_generator='PCG64'):
+    '''
+    Makes a random number generator from the numpy Generator family.
+
+    Parameters
+    ----------
+    seed : int or np.random.SeedSequence
+        Seed for the generator, or a SeedSequence (e.g. one spawned by
+        spawnSeedSequences) that gives it an independent stream.
+    bit_generator : str
+        Name of the numpy bit generator to use, e.g. 'PCG64' or 'Philox'.
+
+    Returns
+    -------
+    RNG : np.random.Generator
+        A new random number generator.
+    '''
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return np.random.Generator(getattr(np.random, bit_generator)(seed))
+
+def spawnSeedSequences(seed, n):
+    '''
+    Makes n statistically independent seed sequences from one seed, for example
+    one for each AgentType in a Market or each worker in a pool.
+
+    Parameters
+    ----------
+    seed : int or np.random.SeedSequence
+        The root seed.
+    n : int
+        Number of child seed sequences to make.
+
+    Returns
+    -------
+    seed_seqs : [np.random.SeedSequence]
+        The child seed sequences.
+    '''
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return seed.spawn(n)
+
+def assignRNGStreams(agents, seed=0, bit_generator='PCG64'):
+    '''
+    Puts each AgentType in agents in 'generator' rng_mode, with its own
+    independent stream spawned from one root seed.  Because each type carries
+    its own seed sequence, the streams stay independent when the types are
+    simulated on different workers (e.g. in an AgentPool).
+
+    Parameters
+    ----------
+    agents : [AgentType]
+        The agent types to give streams to.
+    seed : int or np.random.SeedSequence
+        The root seed.
+    bit_generator : str
+        Name of the numpy bit generator to use, e.g. 'PCG64' or 'Philox'.
+
+    Returns
+    -------
+    None
+    '''
+    seed_seqs = spawnSeedSequences(seed, len(agents))
+    for agent, seed_seq in zip(agents, seed_seqs):
+        agent.rng_mode = 'generator'
+        agent.rng_bit_generator = bit_generator
+        agent.seed_seq = seed_seq
+        agent.resetRNG()
+
+def _getRNG(seed):
+    '''
+    Returns the generator to draw from: seed itself if it is already a
+    np.random.Generator or RandomState, or a new RandomState seeded with it.
+    '''
+    if isinstance(seed, (np.random.Generator, np.random.RandomState)):
+        return seed
+    return np.random.RandomState(seed)
+
+def _asDtype(draws, dtype):
+    '''
+    Casts an array of draws, or each array in a list of them, to dtype.  Draws
+    are made in float64 and only cast afterward, so that the same seed gives
+    the same (rounded) draws in any precision.
+    '''
+    if dtype is float or dtype is None:
+        return draws
+    if isinstance(draws, list):
+        return [np.asarray(d).astype(dtype, copy=False) for d in draws]
+    return np.asarray(draws).astype(dtype, copy=False)
+
+def drawMeanOneLognormal(N, sigma=1.0, seed=0, dtype=float):
     '''
     Generate arrays of mean one lognormal draws. The sigma input can be a number
     or list-like.  If a number, output is a length N array of draws from the
@@ -21,8 +111,10 @@ def drawMeanOneLognormal(N, sigma=1.0, seed=0):
     sigma : float or [float]
         One or more standard deviations. Number of elements T in sigma
         determines number of rows of output.
-    seed : int
-        Seed for random number generator.
+    seed : int or np.random.Generator
+        Seed for random number generator, or a generator to draw from directly.
+    dtype : type
+        Floating point type of the returned draws, e.g. np.float32.  Default float.
 
     Returns:
     ------------
@@ -32,9 +124,9 @@ def drawMeanOneLognormal(N, sigma=1.0, seed=0):
     '''
     mu = -0.5*sigma**2
 
-    return drawLognormal(N,mu=mu,sigma=sigma,seed=seed)
+    return drawLognormal(N,mu=mu,sigma=sigma,seed=seed,dtype=dtype)
 
-def drawLognormal(N,mu=0.0,sigma=1.0,seed=0):
+def drawLognormal(N,mu=0.0,sigma=1.0,seed=0,dtype=float):
     '''
     Generate arrays of lognormal draws. The sigma input can be a number
     or list-like.  If a number, output is a length N array of draws from the
@@ -52,8 +144,10 @@ def drawLognormal(N,mu=0.0,sigma=1.0,seed=0):
     sigma : float or [float]
         One or more standard deviations. Number of elements T in sigma
         determines number of rows of output.
-    seed : int
-        Seed for random number generator.
+    seed : int or np.random.Generator
+        Seed for random number generator, or a generator to draw from directly.
+    dtype : type
+        Floating point type of the returned draws, e.g. np.float32.  Default float.
 
     Returns:
     ------------
@@ -62,7 +156,7 @@ def drawLognormal(N,mu=0.0,sigma=1.0,seed=0):
         a single array of size N (if sigma is a scalar).
     '''
     # Set up the RNG
-    RNG = np.random.RandomState(seed)
+    RNG = _getRNG(seed)
 
     if isinstance(sigma,float): # Return a single array of length N
         if sigma == 0:
@@ -76,10 +170,10 @@ def drawLognormal(N,mu=0.0,sigma=1.0,seed=0):
                 draws.append(np.exp(mu[j])*np.ones(N))
             else:
                 draws.append(RNG.lognormal(mean=mu[j], sigma=sigma[j], size=N))
-    return draws
+    return _asDtype(draws, dtype)
 
 
-def drawNormal(N, mu=0.0, sigma=1.0, seed=0):
+def drawNormal(N, mu=0.0, sigma=1.0, seed=0, dtype=float):
     '''
     Generate arrays of normal draws.  The mu and sigma inputs can be numbers or
     list-likes.  If a number, output is a length N array of draws from the normal
@@ -97,8 +191,10 @@ def drawNormal(N, mu=0.0, sigma=1.0, seed=0):
     sigma : float or [float]
         One or more standard deviations. Number of elements T in sigma
         determines number of rows of output.
-    seed : int
-        Seed for random number generator.
+    seed : int or np.random.Generator
+        Seed for random number generator, or a generator to draw from directly.
+    dtype : type
+        Floating point type of the returned draws, e.g. np.float32.  Default float.
 
     Returns
     -------
@@ -107,17 +203,17 @@ def drawNormal(N, mu=0.0, sigma=1.0, seed=0):
         of size N (if sigma is a scalar).
     '''
     # Set up the RNG
-    RNG = np.random.RandomState(seed)
+    RNG = _getRNG(seed)
 
     if isinstance(sigma,float): # Return a single array of length N
-        draws = sigma*RNG.randn(N) + mu
+        draws = sigma*RNG.standard_normal(N) + mu
     else: # Set up empty list to populate, then loop and populate list with draws
         draws=[]
         for t in range(len(sigma)):
-            draws.append(sigma[t]*RNG.randn(N) + mu[t])
-    return draws
+            draws.append(sigma[t]*RNG.standard_normal(N) + mu[t])
+    return _asDtype(draws, dtype)
 
-def drawWeibull(N, scale=1.0, shape=1.0,  seed=0):
+def drawWeibull(N, scale=1.0, shape=1.0,  seed=0, dtype=float):
     '''
     Generate arrays of Weibull draws.  The scale and shape inputs can be
     numbers or list-likes.  If a number, output is a length N array of draws from
@@ -139,8 +235,10 @@ def drawWeibull(N, scale=1.0, shape=1.0,  seed=0):
     shape : float or [float]
         One or more shape parameters. Number of elements T in scale
         determines number of rows of output.
-    seed : int
-        Seed for random number generator.
+    seed : int or np.random.Generator
+        Seed for random number generator, or a generator to draw from directly.
+    dtype : type
+        Floating point type of the returned draws, e.g. np.float32.  Default float.
 
     Returns:
     ------------
@@ -149,19 +247,19 @@ def drawWeibull(N, scale=1.0, shape=1.0,  seed=0):
         array of size N (if sigma is a scalar).
     '''
     # Set up the RNG
-    RNG = np.random.RandomState(seed)
+    RNG = _getRNG(seed)
 
     if scale == 1:
         scale = float(scale)
     if isinstance(scale,float): # Return a single array of length N
-        draws = scale*(-np.log(1.0-RNG.rand(N)))**(1.0/shape)
+        draws = scale*(-np.log(1.0-RNG.uniform(size=N)))**(1.0/shape)
     else: # Set up empty list to populate, then loop and populate list with draws
         draws=[]
         for t in range(len(scale)):
-            draws.append(scale[t]*(-np.log(1.0-RNG.rand(N)))**(1.0/shape[t]))
-    return draws
+            draws.append(scale[t]*(-np.log(1.0-RNG.uniform(size=N)))**(1.0/shape[t]))
+    return _asDtype(draws, dtype)
 
-def drawUniform(N, bot=0.0, top=1.0, seed=0):
+def drawUniform(N, bot=0.0, top=1.0, seed=0, dtype=float):
     '''
     Generate arrays of uniform draws.  The bot and top inputs can be numbers or
     list-likes.  If a number, output is a length N array of draws from the
@@ -179,8 +277,10 @@ def drawUniform(N, bot=0.0, top=1.0, seed=0):
     top : float or [float]
         One or more top values. Number of elements T in top determines number of
         rows of output.
-    seed : int
-        Seed for random number generator.
+    seed : int or np.random.Generator
+        Seed for random number generator, or a generator to draw from directly.
+    dtype : type
+        Floating point type of the returned draws, e.g. np.float32.  Default float.
 
     Returns
     -------
@@ -189,15 +289,15 @@ def drawUniform(N, bot=0.0, top=1.0, seed=0):
         array of size N (if sigma is a scalar).
     '''
     # Set up the RNG
-    RNG = np.random.RandomState(seed)
+    RNG = _getRNG(seed)
 
     if isinstance(bot,float) or isinstance(bot,int): # Return a single array of size N
-        draws = bot + (top - bot)*RNG.rand(N)
+        draws = bot + (top - bot)*RNG.uniform(size=N)
     else: # Set up empty list to populate, then loop and populate list with draws
         draws=[]
         for t in range(len(bot)):
-            draws.append(bot[t] + (top[t] - bot[t])*RNG.rand(N))
-    return draws
+            draws.append(bot[t] + (top[t] - bot[t])*RNG.uniform(size=N))
+    return _asDtype(draws, dtype)
 
 def drawBernoulli(N,p=0.5,seed=0):
     '''
@@ -212,8 +312,8 @@ def drawBernoulli(N,p=0.5,seed=0):
         Number of draws in each row.
     p : float or [float]
         Probability or probabilities of the event occurring (True).
-    seed : int
-        Seed for random number generator.
+    seed : int or np.random.Generator
+        Seed for random number generator, or a generator to draw from directly.
 
     Returns
     -------
@@ -222,7 +322,7 @@ def drawBernoulli(N,p=0.5,seed=0):
         array of size N (if sigma is a scalar).
     '''
     # Set up the RNG
-    RNG = np.random.RandomState(seed)
+    RNG = _getRNG(seed)
 
     if isinstance(p,float):# Return a single array of size N
         draws = RNG.uniform(size=N) < p
@@ -250,8 +350,8 @@ def drawDiscrete(N,P=[1.0],X=[0.0],exact_match=False,seed=0):
         a random permutation of the N-length list that best fits the discrete
         distribution.  When False (default), each draw is independent from the
         others and the result could deviate from the input.
-    seed : int
-        Seed for random number generator.
+    seed : int or np.random.Generator
+        Seed for random number generator, or a generator to draw from directly.
 
     Returns
     -------
@@ -259,7 +359,7 @@ def drawDiscrete(N,P=[1.0],X=[0.0],exact_match=False,seed=0):
         An array draws from the discrete distribution; each element is a value in X.
     '''
     # Set up the RNG
-    RNG = np.random.RandomState(seed)
+    RNG = _getRNG(seed)
 
     if exact_match:
         events = np.arange(P.size) # just a list of integers
@@ -284,6 +384,114 @@ def drawDiscrete(N,P=[1.0],X=[0.0],exact_match=False,seed=0):
         draws = np.asarray(X)[indices]
     return draws
 
+def stackRows(rows, fill=0.0):
+    '''
+    Stacks a list of 1D arrays of possibly different lengths into one 2D array,
+    padding the end of each short row with fill.
+
+    Parameters
+    ----------
+    rows : [np.array]
+        The 1D arrays to stack.
+    fill : float
+        Value for the padding entries.
+
+    Returns
+    -------
+    table : np.array
+        Array of shape (len(rows), longest row length).
+    '''
+    rows = [np.asarray(row).flatten() for row in rows]
+    width = max([row.size for row in rows])
+    table = np.full((len(rows), width), fill, dtype=np.result_type(*rows))
+    for r, row in enumerate(rows):
+        table[r, :row.size] = row
+    return table
+
+class AliasSampler(object):
+    '''
+    A sampler for one or more discrete distributions using Walker's alias
+    method.  The alias tables are built once, after which each draw costs one
+    uniform and one table lookup, however many atoms the distribution has.
+    Distributions of different sizes are stored as rows of a padded table, so
+    agents who each need a draw from their own row (say, their own age's
+    income distribution) are all served by one vectorized gather.
+    '''
+    def __init__(self, P):
+        '''
+        Builds the alias tables.
+
+        Parameters
+        ----------
+        P : np.array or [np.array]
+            Probabilities of a single discrete distribution, or a list of them
+            (one per row).
+
+        Returns
+        -------
+        None
+        '''
+        if len(P) > 0 and np.ndim(P[0]) == 0:
+            P = [P]
+        self.size = np.array([np.asarray(P_r).size for P_r in P])
+        width = np.max(self.size)
+        self.prob = np.ones((len(P), width))
+        self.alias = np.zeros((len(P), width), dtype=int)
+        for r, P_r in enumerate(P):
+            self.prob[r, :self.size[r]], self.alias[r, :self.size[r]] = self._makeTable(P_r)
+
+    @staticmethod
+    def _makeTable(P):
+        '''
+        Builds the acceptance probabilities and aliases for one distribution
+        with Vose's version of the alias method.
+        '''
+        P = np.asarray(P, dtype=float).flatten()
+        n = P.size
+        scaled = P*n/np.sum(P)
+        prob = np.ones(n)
+        alias = np.arange(n)
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] = scaled[l] + scaled[s] - 1.0
+            if scaled[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+        # Whatever is left over is 1 up to rounding error
+        return prob, alias
+
+    def draw(self, N=None, rows=None, seed=0):
+        '''
+        Draws event indices.
+
+        Parameters
+        ----------
+        N : int
+            Number of draws from row 0; ignored if rows is given.
+        rows : np.array
+            Integer array with the row to draw from for each draw.
+        seed : int or np.random.Generator
+            Seed for random number generator, or a generator to draw from directly.
+
+        Returns
+        -------
+        events : np.array
+            Event index of each draw within its row.
+        '''
+        if rows is None:
+            rows = np.zeros(N, dtype=int)
+        RNG = _getRNG(seed)
+        base_draws = RNG.uniform(size=rows.size)*self.size[rows]
+        slots = np.minimum(base_draws.astype(int), self.size[rows] - 1)
+        accept = (base_draws - slots) < self.prob[rows, slots]
+        return np.where(accept, slots, self.alias[rows, slots])
+
 def main():
     print("Sorry, HARK.simulation doesn't actually do anything on its own.")
     print("To see some examples of its functions in action, look at any")
@@ -0,0 +1,93 @@
+"""
+This file implements unit tests for MarkovConsumerType.
+"""
+
+# Bring in modules we need
+import unittest
+from copy import deepcopy
+import numpy as np
+
+from HARK.simulation import drawDiscrete
+from HARK.ConsumptionSaving.ConsMarkovModel import MarkovConsumerType
+import HARK.ConsumptionSaving.ConsumerParameters as Params
+
+
+class testsForMarkovShocks(unittest.TestCase):
+    """
+    Check that drawing all agents' Markov transitions and income shocks at once
+    gives the same shocks as drawing them one (period, state) pair at a time.
+    """
+
+    def setUp(self):
+        Markov_dictionary = deepcopy(Params.init_idiosyncratic_shocks)
+        Markov_dictionary['MrkvArray'] = [np.array([[0.7, 0.2, 0.1], [0.3, 0.6, 0.1], [0.2, 0.2, 0.6]])]
+        Markov_dictionary['Rfree'] = np.array(3*[Params.init_idiosyncratic_shocks['Rfree']])
+        Markov_dictionary['LivPrb'] = [np.array(3*Params.init_idiosyncratic_shocks['LivPrb'])]
+        Markov_dictionary['PermGroFac'] = [np.array([1.0, 1.01, 1.02])]
+        Markov_dictionary['MrkvPrbsInit'] = np.array([0.5, 0.3, 0.2])
+        self.agent = MarkovConsumerType(**Markov_dictionary)
+        self.agent.cycles = 0
+        IncomeDstn = self.agent.IncomeDstn[0]
+        self.agent.IncomeDstn = [[IncomeDstn, IncomeDstn, IncomeDstn]]
+        self.agent.AgentCount = 1000
+        self.agent.T_sim = 10
+        self.agent.solve()
+        self.agent.initializeSim()
+        self.agent.simulate()
+
+    def drawByPair(self, agent):
+        base_draws = agent.RNG.permutation(np.arange(agent.AgentCount, dtype=float)/agent.AgentCount
+                                           + 1.0/(2*agent.AgentCount))
+        newborn = agent.t_age == 0
+        MrkvPrev = agent.MrkvNow
+        MrkvNow = np.zeros(agent.AgentCount, dtype=int)
+        for t in range(agent.T_cycle):
+            Cutoffs = np.cumsum(agent.MrkvArray[t], axis=1)
+            for j in range(agent.MrkvArray[t].shape[0]):
+                these = np.logical_and(agent.t_cycle == t, MrkvPrev == j)
+                MrkvNow[these] = np.searchsorted(Cutoffs[j, :], base_draws[these])
+        MrkvNow[newborn] = MrkvPrev[newborn]
+
+        PermShkNow = np.zeros(agent.AgentCount)
+        TranShkNow = np.zeros(agent.AgentCount)
+        for t in range(agent.T_cycle):
+            for j in range(agent.MrkvArray[t].shape[0]):
+                these = np.logical_and(t == agent.t_cycle, j == MrkvNow)
+                if np.sum(these) > 0:
+                    Dstn = agent.IncomeDstn[t-1][j]
+                    events = drawDiscrete(np.sum(these), X=np.arange(Dstn[0].size), P=Dstn[0], seed=agent.drawSeed())
+                    PermShkNow[these] = Dstn[1][events]*agent.PermGroFac[t-1][j]
+                    TranShkNow[these] = Dstn[2][events]
+        PermShkNow[newborn] = 1.0
+        TranShkNow[newborn] = 1.0
+        return MrkvNow, PermShkNow, TranShkNow
+
+    def test_getShocks(self):
+        self.agent.t_age[:50] = 0
+        other = deepcopy(self.agent)
+        self.agent.getShocks()
+        MrkvNow, PermShkNow, TranShkNow = self.drawByPair(other)
+        self.assertTrue(np.array_equal(self.agent.MrkvNow, MrkvNow))
+        self.assertTrue(np.array_equal(self.agent.PermShkNow, PermShkNow))
+        self.assertTrue(np.array_equal(self.agent.TranShkNow, TranShkNow))
+
+    def test_edit_IncomeDstn(self):
+        # Replacing one state's transitory shocks takes effect in the next draws
+        self.agent.IncomeDstn[0][1] = list(self.agent.IncomeDstn[0][1])
+        self.agent.IncomeDstn[0][1][2] = 5.0*np.ones(self.agent.IncomeDstn[0][1][2].size)
+        self.agent.getShocks()
+        these = np.logical_and(self.agent.MrkvNow == 1, self.agent.t_age > 0)
+        self.assertTrue(np.any(these))
+        self.assertTrue(np.all(self.agent.TranShkNow[these] == 5.0))
+
+    def test_generator_mode(self):
+        self.agent.rng_mode = 'generator'
+        self.agent.initializeSim()
+        self.agent.simulate()
+        self.agent.getShocks()
+        self.assertTrue(np.all(self.agent.MrkvNow < 3))
+        alive = self.agent.t_age > 0
+        PermGroFac = self.agent.PermGroFac[0][self.agent.MrkvNow[alive]]
+        PermShkVals = self.agent.IncomeDstn[0][0][1]
+        self.assertTrue(np.all(np.isclose(self.agent.PermShkNow[alive][:, np.newaxis],
+                                          np.outer(PermGroFac, PermShkVals)).any(axis=1)))
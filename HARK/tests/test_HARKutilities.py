@@ -58,3 +58,10 @@ class testsForHARKutilities(unittest.TestCase):
     def test_CRRAutilityPPPP(self):
         # Test the fourth derivative of the utility function
         self.derivative_func_comparison(HARK.utilities.CRRAutilityPPPP, HARK.utilities.CRRAutilityPPP)
+
+    def test_getGroupIndices(self):
+        group = np.array([2, 0, 1, 2, 2, 0])
+        indices = HARK.utilities.getGroupIndices(group, 4)
+        self.assertEqual(len(indices), 4)
+        for j in range(4):
+            self.assertTrue(np.array_equal(indices[j], np.where(group == j)[0]))
@@ -0,0 +1,434 @@
+"""
+This file implements unit tests for IndShockConsumerType.
+"""
+
+# Bring in modules we need
+import unittest
+from copy import deepcopy
+import numpy as np
+
+from HARK.core import CrossSectionReducer
+from HARK.utilities import getPercentiles, getLorenzShares
+from HARK.simulation import assignRNGStreams, drawDiscrete
+from HARK.ConsumptionSaving.ConsIndShockModel import IndShockConsumerType, KinkedRconsumerType
+from HARK.ConsumptionSaving.ConsPrefShockModel import PrefShockConsumerType
+from HARK.ConsumptionSaving.ConsMarkovModel import MarkovConsumerType
+import HARK.ConsumptionSaving.ConsumerParameters as Params
+
+
+class testsForSolveBatch(unittest.TestCase):
+    """
+    Check that solving many parameterizations at once gives the same solutions
+    as solving them one at a time.
+    """
+
+    def setUp(self):
+        self.DiscFac = np.array([0.90, 0.94, 0.96])
+        self.CRRA = np.array([2.0, 3.0, 4.0])
+        self.mGrid = np.linspace(0.0, 20.0, 200)
+
+    def compareToSolve(self, agent):
+        solutions = agent.solveBatch(DiscFac=self.DiscFac, CRRA=self.CRRA)
+        self.assertEqual(len(solutions), self.DiscFac.size)
+        for k in range(self.DiscFac.size):
+            single = deepcopy(agent)
+            single(DiscFac=self.DiscFac[k], CRRA=self.CRRA[k])
+            single.solve()
+            self.assertEqual(len(single.solution), len(solutions[k]))
+            for solution_a, solution_b in zip(single.solution, solutions[k]):
+                self.assertTrue(np.allclose(solution_a.cFunc(self.mGrid),
+                                            solution_b.cFunc(self.mGrid), equal_nan=True))
+                self.assertAlmostEqual(solution_a.MPCmin, solution_b.MPCmin)
+                self.assertAlmostEqual(solution_a.hNrm, solution_b.hNrm)
+
+    def test_infinite_horizon(self):
+        agent = IndShockConsumerType(quiet=True, **Params.init_idiosyncratic_shocks)
+        agent.cycles = 0
+        self.compareToSolve(agent)
+
+    def test_lifecycle(self):
+        agent = IndShockConsumerType(quiet=True, **Params.init_lifecycle)
+        self.compareToSolve(agent)
+
+    def test_cubic_not_supported(self):
+        agent = IndShockConsumerType(quiet=True, **Params.init_idiosyncratic_shocks)
+        agent.CubicBool = True
+        self.assertRaises(Exception, agent.solveBatch, DiscFac=self.DiscFac)
+
+
+class testsForPackSolution(unittest.TestCase):
+    """
+    Check that simulating with packed consumption functions gives the same
+    results as simulating with the ordinary solution.
+    """
+
+    def test_simulate_packed(self):
+        agent = IndShockConsumerType(quiet=True, **Params.init_lifecycle)
+        agent.AgentCount = 500
+        agent.T_sim = 15
+        agent.track_vars = ['cNrmNow', 'MPCnow']
+        agent.solve()
+        agent.initializeSim()
+        agent.simulate()
+        cNrm_hist = agent.cNrmNow_hist.copy()
+        MPC_hist = agent.MPCnow_hist.copy()
+
+        agent.packSolution()
+        agent.initializeSim()
+        agent.simulate()
+        self.assertTrue(np.allclose(cNrm_hist, agent.cNrmNow_hist))
+        self.assertTrue(np.allclose(MPC_hist, agent.MPCnow_hist))
+
+        # Solving again throws away the stale pack
+        agent.solve()
+        self.assertTrue(agent.cFuncPack is None)
+
+
+class testsForStreamingSimulation(unittest.TestCase):
+    """
+    Check that streaming the simulated cross-sections gives the same values
+    as recording the full histories.
+    """
+
+    def setUp(self):
+        self.agent = IndShockConsumerType(quiet=True, **Params.init_idiosyncratic_shocks)
+        self.agent.AgentCount = 200
+        self.agent.T_sim = 10
+        self.agent.track_vars = ['aNrmNow']
+        self.agent.solve()
+
+    def test_simulateIter(self):
+        self.agent.initializeSim()
+        self.agent.simulate()
+        aNrm_hist = self.agent.aNrmNow_hist.copy()
+
+        self.agent.initializeSim()
+        periods = []
+        for t_sim, cross_section in self.agent.simulateIter():
+            periods.append(t_sim)
+            self.assertTrue(np.array_equal(cross_section['aNrmNow'], aNrm_hist[t_sim]))
+        self.assertEqual(periods, list(range(10)))
+        # Nothing was recorded while streaming
+        self.assertTrue(np.all(np.isnan(self.agent.aNrmNow_hist)))
+
+    def test_reducer(self):
+        self.agent.initializeSim()
+        reducer = CrossSectionReducer(['aNrmNow'], percentiles=[0.5], lorenz=[0.2, 0.8])
+        self.agent.simulate(callback=reducer)
+        results = reducer.getResults('aNrmNow')
+        self.assertTrue(np.allclose(results['mean'], np.mean(self.agent.aNrmNow_hist, axis=1)))
+        for t in range(10):
+            aNrm = self.agent.aNrmNow_hist[t]
+            self.assertTrue(np.allclose(results['pctl'][t], getPercentiles(aNrm, percentiles=[0.5])))
+            self.assertTrue(np.allclose(results['lorenz'][t], getLorenzShares(aNrm, percentiles=[0.2, 0.8])))
+
+
+class testsForSinglePrecision(unittest.TestCase):
+    """
+    Check that simulating in float32 keeps the states in float32 and stays
+    close to the float64 simulation.
+    """
+
+    def setUp(self):
+        self.agent = IndShockConsumerType(quiet=True, **Params.init_idiosyncratic_shocks)
+        self.agent.AgentCount = 200
+        self.agent.T_sim = 10
+        self.agent.solve()
+
+    def test_float32(self):
+        self.agent.sim_dtype = np.float32
+        self.agent.initializeSim()
+        self.agent.simulate()
+        for name in ['aNrmNow', 'pLvlNow', 'mNrmNow', 'cNrmNow', 'MPCnow', 'PermShkNow']:
+            self.assertEqual(getattr(self.agent, name).dtype, np.float32)
+
+    def test_checkSimPrecision(self):
+        report = self.agent.checkSimPrecision(['aNrmNow', 'cNrmNow'])
+        for name in ['aNrmNow', 'cNrmNow']:
+            self.assertLess(report[name]['mean'], 1e-4)
+            self.assertLess(report[name]['p50'], 1e-4)
+
+    def test_markov_float32(self):
+        Markov_dictionary = deepcopy(Params.init_idiosyncratic_shocks)
+        Markov_dictionary['MrkvArray'] = [np.array([[0.9, 0.1], [0.2, 0.8]])]
+        Markov_dictionary['Rfree'] = np.array([1.03, 1.02])
+        Markov_dictionary['LivPrb'] = [np.array(2*Params.init_idiosyncratic_shocks['LivPrb'])]
+        Markov_dictionary['PermGroFac'] = [np.array([1.01, 1.02])]
+        Markov_dictionary['MrkvPrbsInit'] = np.array([0.5, 0.5])
+        agent = MarkovConsumerType(**Markov_dictionary)
+        agent.cycles = 0
+        IncomeDstn = agent.IncomeDstn[0]
+        agent.IncomeDstn = [[IncomeDstn, IncomeDstn]]
+        agent.AgentCount = 200
+        agent.T_sim = 10
+        agent.solve()
+        agent.sim_dtype = np.float32
+        agent.initializeSim()
+        agent.simulate()
+        for name in ['aNrmNow', 'pLvlNow', 'mNrmNow', 'cNrmNow', 'PermShkNow', 'TranShkNow']:
+            self.assertEqual(getattr(agent, name).dtype, np.float32)
+        self.assertEqual(agent.getRfree().dtype, np.float32)
+
+
+class testsForRNGModes(unittest.TestCase):
+    """
+    Check the legacy and Generator based random number modes.
+    """
+
+    def setUp(self):
+        self.agent = IndShockConsumerType(quiet=True, **Params.init_idiosyncratic_shocks)
+        self.agent.AgentCount = 100
+        self.agent.T_sim = 5
+        self.agent.track_vars = ['aNrmNow']
+        self.agent.solve()
+
+    def simulate(self, agent):
+        agent.initializeSim()
+        agent.simulate()
+        return agent.aNrmNow_hist.copy()
+
+    def test_generator_mode(self):
+        legacy = self.simulate(self.agent)
+        self.agent.rng_mode = 'generator'
+        first = self.simulate(self.agent)
+        self.assertTrue(np.array_equal(first, self.simulate(self.agent)))
+        self.assertFalse(np.array_equal(first, legacy))
+        self.agent.rng_mode = 'legacy'
+        self.assertTrue(np.array_equal(legacy, self.simulate(self.agent)))
+
+    def test_alias_shocks(self):
+        agent = IndShockConsumerType(quiet=True, **Params.init_lifecycle)
+        agent.AgentCount = 500
+        agent.T_sim = 12
+        agent.rng_mode = 'generator'
+        agent.solve()
+        agent.initializeSim()
+        agent.simulate()
+        agent.getShocks()
+        rows = (agent.t_cycle - 1) % agent.T_cycle
+        for i in np.where(agent.t_age > 0)[0]:
+            self.assertTrue(np.any(np.isclose(agent.TranShkNow[i], agent.IncomeDstn[rows[i]][2])))
+        # In place edits of IncomeDstn are picked up by updateIncomeSampler; the
+        # alias tables are only rebuilt when the probabilities change
+        sampler = agent.IncomeSampler
+        TranShkTable = agent.IncomeTranShkTable
+        TranShkVals = agent.IncomeDstn[3][2]
+        TranShkVals *= 2.0
+        agent.getShocks()
+        self.assertTrue(agent.IncomeTranShkTable is TranShkTable)
+        agent.updateIncomeSampler()
+        self.assertTrue(agent.IncomeSampler is sampler)
+        self.assertTrue(np.array_equal(agent.IncomeTranShkTable[3, :TranShkVals.size], TranShkVals))
+        # Replacing a period's distribution is picked up by getShocks
+        agent.IncomeDstn[3] = [np.array([1.0]), np.array([1.0]), np.array([2.0])]
+        agent.getShocks()
+        self.assertFalse(agent.IncomeSampler is sampler)
+        self.assertEqual(agent.IncomeTranShkTable[3, 0], 2.0)
+
+    def test_streams(self):
+        other = deepcopy(self.agent)
+        assignRNGStreams([self.agent, other], seed=1)
+        self.assertFalse(np.array_equal(self.simulate(self.agent), self.simulate(other)))
+
+
+class testsForJointShocks(unittest.TestCase):
+    """
+    Check that drawing all ages' income shocks at once gives the same shocks as
+    drawing them period by period.
+    """
+
+    def drawByPeriod(self, agent):
+        PermShkNow = np.zeros(agent.AgentCount)
+        TranShkNow = np.zeros(agent.AgentCount)
+        newborn = agent.t_age == 0
+        for t in range(agent.T_cycle):
+            these = t == agent.t_cycle
+            if np.sum(these) > 0:
+                Dstn = agent.IncomeDstn[t-1]
+                events = drawDiscrete(np.sum(these), X=np.arange(Dstn[0].size), P=Dstn[0], seed=agent.drawSeed())
+                PermShkNow[these] = Dstn[1][events]*agent.PermGroFac[t-1]
+                TranShkNow[these] = Dstn[2][events]
+        if np.sum(newborn) > 0:
+            Dstn = agent.IncomeDstn[0]
+            events = drawDiscrete(np.sum(newborn), X=np.arange(Dstn[0].size), P=Dstn[0], seed=agent.drawSeed())
+            PermShkNow[newborn] = Dstn[1][events]*agent.PermGroFac[0]
+            TranShkNow[newborn] = Dstn[2][events]
+        TranShkNow[newborn] = 1.0
+        return PermShkNow, TranShkNow
+
+    def test_lifecycle(self):
+        agent = IndShockConsumerType(quiet=True, **Params.init_lifecycle)
+        agent.AgentCount = 1000
+        agent.T_sim = 7
+        agent.solve()
+        agent.initializeSim()
+        agent.simulate()
+        agent.t_age[:50] = 0
+        other = deepcopy(agent)
+        agent.getShocks()
+        PermShkNow, TranShkNow = self.drawByPeriod(other)
+        self.assertTrue(np.array_equal(agent.PermShkNow, PermShkNow))
+        self.assertTrue(np.array_equal(agent.TranShkNow, TranShkNow))
+
+
+class testsForShockTape(unittest.TestCase):
+    """
+    Check that simulating from a compact shock tape gives the same results as
+    simulating from a full shock history.
+    """
+
+    def test_compact(self):
+        agent = IndShockConsumerType(quiet=True, **Params.init_lifecycle)
+        agent.AgentCount = 200
+        agent.T_sim = 20
+        agent.track_vars = ['aNrmNow']
+        agent.solve()
+        agent.makeShockHistory()
+        agent.initializeSim()
+        agent.simulate()
+        aNrm_hist = agent.aNrmNow_hist.copy()
+        PermShk_hist = agent.PermShkNow_hist.copy()
+
+        other = deepcopy(agent)
+        other.makeShockHistory(compact=True)
+        self.assertTrue(np.array_equal(other.shock_tape.decode('PermShkNow'), PermShk_hist))
+        self.assertEqual(other.shock_tape.codes['TranShkNow'].dtype, np.int8)
+        other.initializeSim()
+        other.simulate()
+        self.assertTrue(np.array_equal(other.aNrmNow_hist, aNrm_hist))
+
+        # A tape can be used by another instance
+        fresh = deepcopy(agent)
+        fresh.useShockTape(other.shock_tape)
+        fresh.initializeSim()
+        fresh.simulate()
+        self.assertTrue(np.array_equal(fresh.aNrmNow_hist, aNrm_hist))
+        fresh.T_sim = 30
+        self.assertRaises(ValueError, fresh.useShockTape, other.shock_tape)
+
+
+class testsForErgodicDist(unittest.TestCase):
+    """
+    Check that the histogram method's ergodic distribution agrees with a long
+    simulation.
+    """
+
+    def test_histogram(self):
+        agent = IndShockConsumerType(quiet=True, **Params.init_idiosyncratic_shocks)
+        agent.cycles = 0
+        agent.solve()
+        dist = agent.calcErgodicDist()
+        self.assertAlmostEqual(np.sum(dist), 1.0)
+        self.assertTrue(np.all(dist >= 0.0))
+        stats = agent.getErgodicStats(percentiles=[0.2, 0.5, 0.8])
+        self.assertTrue(np.all(np.diff(stats['aNrmLorenz']) > 0.0))
+
+        agent.AgentCount = 5000
+        agent.T_sim = 300
+        agent.initializeSim()
+        agent.simulate()
+        self.assertAlmostEqual(stats['aNrm'], np.mean(agent.aNrmNow), delta=0.05*stats['aNrm'])
+        self.assertAlmostEqual(stats['cNrm'], np.mean(agent.cNrmNow), delta=0.05*stats['cNrm'])
+
+    def test_kinked_R(self):
+        agent = KinkedRconsumerType(quiet=True, **Params.init_kinked_R)
+        agent.cycles = 0
+        agent.solve()
+        stats = agent.getErgodicStats()
+        agent.AgentCount = 10000
+        agent.T_sim = 300
+        agent.initializeSim()
+        agent.simulate()
+        self.assertAlmostEqual(stats['aNrm'], np.mean(agent.aNrmNow), delta=0.03*stats['aNrm'])
+
+    def test_other_models_not_supported(self):
+        agent = PrefShockConsumerType(**Params.init_preference_shocks)
+        agent.cycles = 0
+        self.assertRaises(ValueError, agent.calcErgodicDist)
+
+    def test_lifecycle_not_supported(self):
+        agent = IndShockConsumerType(quiet=True, **Params.init_lifecycle)
+        agent.solve()
+        self.assertRaises(ValueError, agent.calcErgodicDist)
+
+
+class testsForProfiling(unittest.TestCase):
+    """
+    Check that profiling records the solver and simulation stages.
+    """
+
+    def test_stages(self):
+        agent = IndShockConsumerType(quiet=True, **Params.init_lifecycle)
+        agent.AgentCount = 100
+        agent.T_sim = 5
+        agent.startProfiling()
+        agent.solve()
+        agent.initializeSim()
+        agent.simulate()
+        report = dict((entry['name'], entry) for entry in agent.stopProfiling())
+        self.assertEqual(report['solveOnePeriod']['calls'], agent.T_cycle)
+        self.assertEqual(report['calcEndOfPrdvP']['calls'], agent.T_cycle)
+        for name in ['getMortality', 'getShocks', 'getStates', 'getControls', 'getPostStates']:
+            self.assertEqual(report[name]['calls'], 5)
+        self.assertTrue(agent.profiler is None)
+
+
+class testsForAcceleration(unittest.TestCase):
+    """
+    Check that accelerated infinite horizon solution takes fewer cycles and
+    finds the same consumption function.
+    """
+
+    def test_accelerate(self):
+        plain = IndShockConsumerType(quiet=True, **Params.init_idiosyncratic_shocks)
+        plain.cycles = 0
+        plain.DiscFac = 0.99
+        plain.solve()
+
+        fast = deepcopy(plain)
+        fast.accelerate = True
+        fast.solve()
+        self.assertTrue(fast.completed_cycles < plain.completed_cycles)
+        self.assertTrue(fast.accel_steps > 0)
+        mGrid = np.linspace(0.0, 20.0, 200)
+        self.assertTrue(np.allclose(plain.solution[0].cFunc(mGrid), fast.solution[0].cFunc(mGrid), atol=1e-3))
+
+
+class testsForWarmStart(unittest.TestCase):
+    """
+    Check that re-solving from the previous solution converges quickly to the
+    same solution.
+    """
+
+    def test_warm_start(self):
+        agent = IndShockConsumerType(quiet=True, **Params.init_idiosyncratic_shocks)
+        agent.cycles = 0
+        agent.solve()
+        agent.DiscFac = agent.DiscFac + 0.001
+        cold = deepcopy(agent)
+        cold.solve()
+        agent.solve(warm_start=True)
+
+        cold_log, warm_log = cold.convergence_log[-1], agent.convergence_log[-1]
+        self.assertFalse(cold_log['warm_start'])
+        self.assertTrue(warm_log['warm_start'])
+        self.assertTrue(warm_log['cycles'] < cold_log['cycles'])
+        mGrid = np.linspace(0.0, 20.0, 200)
+        self.assertTrue(np.allclose(cold.solution[0].cFunc(mGrid), agent.solution[0].cFunc(mGrid), atol=1e-3))
+
+
+class testsForDistanceGrid(unittest.TestCase):
+    """
+    Check that convergence can be judged by consumption on a grid.
+    """
+
+    def test_distance_grid(self):
+        agent = IndShockConsumerType(quiet=True, **Params.init_idiosyncratic_shocks)
+        agent.cycles = 0
+        agent.solve()
+        on_grid = deepcopy(agent)
+        on_grid.distance_grid = np.linspace(0.0, 20.0, 200)
+        on_grid.solve()
+        self.assertTrue(on_grid.solution_distance <= on_grid.tolerance)
+        self.assertTrue(np.allclose(agent.solution[0].cFunc(on_grid.distance_grid),
+                                    on_grid.solution[0].cFunc(on_grid.distance_grid), atol=1e-4))
@@ -1,9 +1,12 @@
 """
 This file implements unit tests for interpolation methods
 """
-from HARK.core import HARKobject, distanceMetric, AgentType
+from HARK.core import HARKobject, distanceMetric, fastDistance, AgentType, HistoryRecorder, loadHistory, Market, \
+    ShockTape, loadShockTape
 
 import numpy as np
+import shutil
+import tempfile
 import unittest
 
 
@@ -55,6 +58,44 @@ class testdistanceMetric(unittest.TestCase):
         self.assertEqual(distanceMetric(self.obj_a, self.obj_a), 0.0)
 
 
+class testfastDistance(unittest.TestCase):
+    def setUp(self):
+        self.obj_a = HARKobject()
+        self.obj_b = HARKobject()
+        self.obj_a.distance_criteria = ["var_1", "var_2"]
+        self.obj_b.distance_criteria = ["var_1", "var_2"]
+
+    def test_same_as_distanceMetric(self):
+        self.obj_a.var_1, self.obj_a.var_2 = [0.1, np.array([1.0, 2.0])], 2.1
+        self.obj_b.var_1, self.obj_b.var_2 = [1.8, np.array([0.0, 0.1])], 1.1
+        self.assertEqual(fastDistance(self.obj_a, self.obj_b), distanceMetric(self.obj_a, self.obj_b))
+        self.assertEqual(fastDistance(self.obj_a, self.obj_a), 0.0)
+
+    def test_different_structure(self):
+        # Differently shaped objects fall back to distanceMetric
+        self.obj_a.var_1, self.obj_a.var_2 = [0.1], np.array([1.0, 2.0])
+        self.obj_b.var_1, self.obj_b.var_2 = [0.1], np.array([1.0, 2.0, 3.0])
+        self.assertEqual(fastDistance(self.obj_a, self.obj_b), 1.0)
+        # Missing attributes are very far apart, as in distanceMetric
+        del self.obj_b.var_2
+        self.assertEqual(fastDistance(self.obj_a, self.obj_b), 1000.0)
+
+    def test_cache(self):
+        self.obj_a.var_1, self.obj_a.var_2 = [0.1], np.array([1.0, 2.0])
+        self.obj_b.var_1, self.obj_b.var_2 = [0.1], np.array([1.0, 2.0])
+        self.assertEqual(fastDistance(self.obj_a, self.obj_b), 0.0)
+        # Without a cache, later changes to the objects are always seen
+        self.obj_b.var_2 = np.array([1.0, 9.0])
+        self.assertEqual(fastDistance(self.obj_a, self.obj_b), 7.0)
+        self.assertFalse(hasattr(self.obj_b, '_distance_flat'))
+        # With one, each object is only flattened the first time it is seen
+        cache = {}
+        self.assertEqual(fastDistance(self.obj_a, self.obj_b, cache), 7.0)
+        self.assertEqual(set(cache.keys()), set([id(self.obj_a), id(self.obj_b)]))
+        self.obj_b.var_2 = np.array([1.0, 2.0])
+        self.assertEqual(fastDistance(self.obj_a, self.obj_b, cache), 7.0)
+
+
 class testHARKobject(unittest.TestCase):
     def setUp(self):
         # similar test to distanceMetric
@@ -107,4 +148,154 @@ class testAgentType(unittest.TestCase):
         self.agent.solveOnePeriod = lambda vary_1: HARKobject()
         self.agent.solve()
         self.assertEqual(len(self.agent.solution), 4)
-        self.assertTrue(isinstance(self.agent.solution[0], HARKobject))
\ No newline at end of file
+        self.assertTrue(isinstance(self.agent.solution[0], HARKobject))
+
+
+class testHistoryRecorder(unittest.TestCase):
+    def setUp(self):
+        self.source = HARKobject()
+        self.values = [np.arange(6, dtype=float) + 10.0*t for t in range(5)]
+
+    def recordAll(self, recorder):
+        for t in range(5):
+            self.source.xNow = self.values[t]
+            recorder.record(self.source, t)
+
+    def test_full(self):
+        recorder = HistoryRecorder(['xNow'], 5, 6)
+        self.recordAll(recorder)
+        self.assertTrue(np.array_equal(recorder.hist['xNow'], np.array(self.values)))
+
+    def test_options(self):
+        recorder = HistoryRecorder(['xNow'], 5, 6, dtype=np.float32, agents=np.array([0, 5]), every=2)
+        self.recordAll(recorder)
+        hist = recorder.hist['xNow']
+        self.assertEqual(hist.dtype, np.float32)
+        self.assertEqual(hist.shape, (3, 2))
+        self.assertTrue(np.array_equal(hist, np.array([[0., 5.], [20., 25.], [40., 45.]])))
+
+    def test_summary(self):
+        recorder = HistoryRecorder(['xNow'], 5, 6, summary=True)
+        self.recordAll(recorder)
+        summary = recorder.getSummary('xNow')
+        self.assertTrue(np.allclose(summary['mean'], [2.5, 12.5, 22.5, 32.5, 42.5]))
+        self.assertTrue(np.allclose(summary['max'], [5., 15., 25., 35., 45.]))
+        self.assertTrue(np.array_equal(summary['count'], [6, 6, 6, 6, 6]))
+
+        # Summaries computed from a full history are the same
+        full = HistoryRecorder(['xNow'], 5, 6)
+        self.recordAll(full)
+        for stat in ['mean', 'std', 'min', 'max', 'count']:
+            self.assertTrue(np.allclose(full.getSummary('xNow')[stat], summary[stat]))
+
+    def test_memmap(self):
+        path = tempfile.mkdtemp()
+        try:
+            recorder = HistoryRecorder(['xNow'], 5, 6, path=path)
+            self.recordAll(recorder)
+            recorder.flush()
+            self.assertTrue(isinstance(recorder.hist['xNow'], np.memmap))
+            history = loadHistory(path, ['xNow'])
+            self.assertTrue(np.array_equal(history['xNow'], np.array(self.values)))
+            del recorder, history
+        finally:
+            shutil.rmtree(path)
+
+
+class testShockTape(unittest.TestCase):
+    def setUp(self):
+        self.source = HARKobject()
+        RNG = np.random.RandomState(0)
+        self.atoms = np.array([0.3, 1.0, 1.7])
+        self.shocks = self.atoms[RNG.randint(0, 3, size=(4, 50))]
+        self.draws = RNG.uniform(size=(4, 50))
+
+    def recordAll(self):
+        tape = ShockTape(['ShkNow', 'DrawNow'], 4, 50)
+        tape.max_codes = 100
+        for t in range(4):
+            self.source.ShkNow = self.shocks[t]
+            self.source.DrawNow = self.draws[t]
+            tape.record(self.source, t)
+        tape.shrink()
+        return tape
+
+    def test_record(self):
+        tape = self.recordAll()
+        self.assertEqual(tape.codes['ShkNow'].dtype, np.int8)
+        self.assertEqual(tape.tables['ShkNow'].size, 3)
+        self.assertTrue(np.array_equal(tape.decode('ShkNow'), self.shocks))
+        self.assertTrue(np.array_equal(tape.read('ShkNow', 2), self.shocks[2]))
+        # Too many distinct values to code, so stored in full
+        self.assertTrue('DrawNow' in tape.raw)
+        self.assertTrue(np.array_equal(tape.decode('DrawNow'), self.draws))
+
+    def test_save(self):
+        tape = self.recordAll()
+        path = tempfile.mkdtemp()
+        try:
+            tape.save(path + '/tape.npz')
+            loaded = loadShockTape(path + '/tape.npz')
+            for var_name in ['ShkNow', 'DrawNow']:
+                self.assertTrue(np.array_equal(loaded.decode(var_name), tape.decode(var_name)))
+        finally:
+            shutil.rmtree(path)
+
+
+class DummyAgent(AgentType):
+    """
+    A trivial AgentType for testing Market: its "solution" is a number that
+    depends on the dynamic rule A, and its market action is to report it.
+    """
+    def solve(self):
+        self.solution = [0.5*self.scale*self.A + 1.0]
+
+    def reset(self):
+        self.xNow = np.zeros(3)
+
+    def marketAction(self):
+        self.xNow = self.solution[0]*np.ones(3)
+
+
+class DummyDynamics(HARKobject):
+    distance_criteria = ['A']
+
+    def __init__(self, A=None, XNow=None):
+        self.A = A
+        self.XNow = XNow
+
+
+def makeDummyMarket():
+    agents = [DummyAgent(scale=scale, A=1.0) for scale in [0.8, 1.0, 1.2]]
+    market = Market(agents=agents, sow_vars=['XNow'], reap_vars=['xNow'], track_vars=['XNow'],
+                    dyn_vars=['A'], millRule=lambda xNow: DummyDynamics(XNow=np.mean(xNow)),
+                    calcDynamics=lambda XNow: DummyDynamics(A=np.mean(XNow)), act_T=5)
+    market.XNow_init = 1.0
+    return market
+
+
+class testMarket(unittest.TestCase):
+    def test_solve(self):
+        market = makeDummyMarket()
+        market.solve()
+        # The fixed point of A = 0.5*A + 1
+        self.assertAlmostEqual(market.dynamics.A, 2.0, places=4)
+
+    def test_pool(self):
+        serial = makeDummyMarket()
+        serial.solve()
+        pooled = makeDummyMarket()
+        pooled.use_pool = True
+        originals = list(pooled.agents)
+        pooled.solve()
+        self.assertTrue(pooled.agent_pool is None)
+        # The caller's agent objects are updated in place, not replaced, so the
+        # checks below on pooled.agents apply to them
+        for agent, original in zip(pooled.agents, originals):
+            self.assertTrue(agent is original)
+        self.assertEqual(serial.dynamics.A, pooled.dynamics.A)
+        for agent_a, agent_b in zip(serial.agents, pooled.agents):
+            self.assertEqual(agent_a.solution, agent_b.solution)
+            # Agents simulated on the workers come back in their final state
+            self.assertTrue(np.array_equal(agent_a.xNow, agent_b.xNow))
+        self.assertTrue(np.array_equal(serial.XNow_hist, pooled.XNow_hist))
@@ -7,6 +7,16 @@ from HARK.interpolation import (
     BilinearInterp,
     TrilinearInterp,
     QuadlinearInterp,
+    LowerEnvelope,
+    LinearInterpPack,
+    UniformGrid,
+    LogUniformGrid,
+    ExpMultGrid,
+    LinearInterpOnInterp1D,
+    BilinearInterpOnInterp1D,
+    Curvilinear2DInterp,
+    InterpolatorCache,
+    PackedSearch,
 )
 
 import numpy as np
@@ -202,3 +212,238 @@ class testsQuadlinearInterp(unittest.TestCase):
             self.f_array, self.w_array, self.x_array, self.y_array_t, self.z_array
         )
         self.assertEqual(bilinear(1, 2, 1, 2), 6.0)
+
+
+class testsLinearInterpPack(unittest.TestCase):
+    """ tests for LinearInterpPack, checking that packed functions evaluate
+    the same as the interpolators they were made from
+    """
+
+    def setUp(self):
+        self.functions = [
+            LinearInterp([0.0, 1.0, 3.0], [0.0, 0.8, 2.0], 1.0, 0.5),
+            LowerEnvelope(
+                LinearInterp([-1.0, 0.0, 2.0, 5.0], [0.0, 0.5, 1.5, 2.5]),
+                LinearInterp([-0.5, 0.5], [0.0, 1.0]),
+            ),
+            LinearInterp([0.0, 1.0], [0.0, 1.0]),
+        ]
+        self.pack = LinearInterpPack(self.functions)
+        self.x = np.linspace(-2.0, 10.0, 61)
+
+    def test_evaluation(self):
+        for j in range(len(self.functions)):
+            idx = np.zeros_like(self.x, dtype=int) + j
+            y, dydx = self.pack.eval_with_derivative(idx, self.x)
+            y_check = self.functions[j](self.x)
+            self.assertTrue(np.allclose(y, y_check, equal_nan=True))
+            dydx_check = self.functions[j].derivative(self.x)
+            these = np.logical_not(np.isnan(y_check))
+            self.assertTrue(np.allclose(dydx[these], dydx_check[these]))
+
+    def test_unpack(self):
+        unpacked = self.pack.unpack()
+        for f, g in zip(self.functions, unpacked):
+            self.assertEqual(f.distance(g), 0.0)
+
+    def test_bad_function(self):
+        self.assertRaises(ValueError, LinearInterpPack, [CubicInterp([0, 1], [0, 1], [1, 1])])
+
+
+class testsLinearInterpEvaluateInto(unittest.TestCase):
+    """ tests for LinearInterp.evaluateInto, checking that the fused kernel
+    matches the ordinary evaluation methods and reuses shared brackets
+    """
+
+    def setUp(self):
+        self.cFunc = LinearInterp([0.0, 1.0, 3.0], [0.0, 0.8, 2.0], 1.0, 0.5)
+        self.vFunc = LinearInterp([0.0, 1.0, 3.0], [-3.0, -1.0, -0.5], lower_extrap=True)
+        self.x = np.linspace(-1.0, 6.0, 36).reshape((6, 6))
+
+    def test_matches_call(self):
+        y, dydx = self.cFunc.evaluateInto(self.x, with_derivative=True)
+        self.assertTrue(np.allclose(y, self.cFunc(self.x), equal_nan=True))
+        self.assertTrue(np.allclose(dydx, self.cFunc.derivative(self.x), equal_nan=True))
+
+    def test_buffers_and_shared_brackets(self):
+        brackets = self.cFunc.findBrackets(self.x)
+        out = np.empty(self.x.shape)
+        der_out = np.empty(self.x.shape)
+        self.cFunc.evaluateInto(brackets, out=out, der_out=der_out)
+        self.assertTrue(np.allclose(out, self.cFunc(self.x), equal_nan=True))
+        v = self.vFunc.evaluateInto(brackets)
+        self.assertTrue(np.allclose(v, self.vFunc(self.x)))
+
+    def test_wrong_grid(self):
+        other = LinearInterp([0.0, 2.0], [0.0, 1.0])
+        brackets = other.findBrackets(self.x)
+        self.assertRaises(Exception, self.cFunc.evaluateInto, brackets)
+
+
+class testsGridDescriptors(unittest.TestCase):
+    """ tests for the closed form search of grid descriptors, checking that it
+    agrees with np.searchsorted and that interpolators use it
+    """
+
+    def setUp(self):
+        self.grids = [
+            UniformGrid(0.0, 10.0, 11),
+            LogUniformGrid(0.01, 50.0, 48),
+            ExpMultGrid(0.001, 20.0, 64, timestonest=3),
+            ExpMultGrid(0.5, 20.0, 30, timestonest=0),
+        ]
+
+    def test_searchsorted(self):
+        for desc in self.grids:
+            grid = desc.grid
+            x = np.concatenate((grid, np.linspace(grid[0] - 1.0, grid[-1] + 1.0, 501)))
+            self.assertTrue(np.array_equal(desc.searchsorted(grid, x), np.searchsorted(grid, x)))
+            self.assertEqual(desc.searchsorted(grid, grid[3]), 3)
+
+    def test_interpolators(self):
+        desc = self.grids[2]
+        x = np.linspace(-1.0, 25.0, 200)
+        linear = LinearInterp(desc, desc.grid ** 0.5)
+        check = LinearInterp(desc.grid, desc.grid ** 0.5)
+        self.assertTrue(np.allclose(linear(x), check(x), equal_nan=True))
+        f_values = np.outer(desc.grid, np.arange(5.0))
+        bilinear = BilinearInterp(f_values, desc, np.arange(5.0))
+        self.assertTrue(np.allclose(bilinear(x, 2.5 * np.ones_like(x)), 2.5 * x))
+
+    def test_missing_search_func(self):
+        # Instances saved before the search functions were stored still evaluate
+        x = np.linspace(-1.0, 25.0, 200)
+        grid = self.grids[0].grid
+        cubic = CubicInterp(grid, grid ** 2, 2.0 * grid)
+        check = CubicInterp(grid, grid ** 2, 2.0 * grid)
+        del cubic.xSearchFunc
+        self.assertTrue(np.allclose(cubic(x), check(x), equal_nan=True))
+        self.assertTrue(np.allclose(cubic.derivative(x), check.derivative(x), equal_nan=True))
+        self.assertEqual(cubic(3.5), check(3.5))
+        bilinear = BilinearInterp(np.outer(grid, np.arange(5.0)), grid, np.arange(5.0))
+        del bilinear.xSearchFunc, bilinear.ySearchFunc
+        self.assertTrue(np.allclose(bilinear(x, 2.5 * np.ones_like(x)), 2.5 * x))
+
+
+class testsPackedSearch(unittest.TestCase):
+    """ tests for PackedSearch, checking both the shifted search and the guide
+    table against np.searchsorted on each segment
+    """
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.segments = [np.cumsum(rng.dirichlet(np.ones(n))) for n in [1, 7, 56, 3]]
+        self.segments[2][10:14] = self.segments[2][10]  # repeated gridpoints
+        self.bounds = np.cumsum([0] + [seg.size for seg in self.segments])
+        self.seg = rng.randint(0, 4, size=2000)
+        self.x = rng.uniform(size=2000)
+        self.x[:20] = np.concatenate(self.segments)[:20]  # queries on gridpoints
+
+    def test_search(self):
+        check = np.array([np.searchsorted(self.segments[s], x) for s, x in zip(self.seg, self.x)])
+        for buckets in [0, 16, 112]:
+            search = PackedSearch(np.concatenate(self.segments), self.bounds, buckets=buckets)
+            self.assertEqual(search.guide is None, buckets == 0)
+            pos = search(self.seg, self.x) - self.bounds[self.seg]
+            self.assertTrue(np.array_equal(pos, check))
+        # Queries outside the range of the gridpoints stay in their own segment
+        search = PackedSearch(np.concatenate(self.segments), self.bounds)
+        pos = search(self.seg, 10.0 * self.x - 5.0)
+        self.assertTrue(np.all(pos >= self.bounds[self.seg]))
+        self.assertTrue(np.all(pos <= self.bounds[self.seg + 1]))
+
+
+class testsInterpOnInterp1DPacked(unittest.TestCase):
+    """ tests for the packed evaluation of LinearInterpOnInterp1D and
+    BilinearInterpOnInterp1D, checking it against the per-node loops
+    """
+
+    def setUp(self):
+        x_grid = np.array([0.0, 0.5, 1.5, 3.0])
+        self.y_grid = np.array([1.0, 2.0, 4.0])
+        self.z_grid = np.array([0.0, 1.0])
+        self.xInterpolators = [
+            [LinearInterp(x_grid, (y + z) * np.sqrt(x_grid), y + z, 0.1) for z in self.z_grid]
+            for y in self.y_grid
+        ]
+        self.x = np.linspace(-0.5, 5.0, 40)
+        self.y = np.linspace(0.5, 5.0, 40)[::-1]
+        self.z = np.linspace(-0.2, 1.2, 40)
+
+    def test_2D(self):
+        packed = LinearInterpOnInterp1D([row[0] for row in self.xInterpolators], self.y_grid)
+        looped = LinearInterpOnInterp1D([row[0] for row in self.xInterpolators], self.y_grid)
+        looped.xPack = None
+        self.assertTrue(packed.xPack is not None)
+        for method in ["__call__", "derivativeX", "derivativeY"]:
+            a = getattr(packed, method)(self.x, self.y)
+            b = getattr(looped, method)(self.x, self.y)
+            self.assertTrue(np.allclose(a, b, equal_nan=True))
+
+    def test_3D(self):
+        packed = BilinearInterpOnInterp1D(self.xInterpolators, self.y_grid, self.z_grid)
+        looped = BilinearInterpOnInterp1D(self.xInterpolators, self.y_grid, self.z_grid)
+        looped.xPack = None
+        for method in ["__call__", "derivativeX", "derivativeY", "derivativeZ"]:
+            a = getattr(packed, method)(self.x, self.y, self.z)
+            b = getattr(looped, method)(self.x, self.y, self.z)
+            self.assertTrue(np.allclose(a, b, equal_nan=True))
+
+    def test_fallback(self):
+        cubic = [CubicInterp([0.0, 1.0], [0.0, y], [y, y]) for y in self.y_grid]
+        self.assertTrue(LinearInterpOnInterp1D(cubic, self.y_grid).xPack is None)
+
+
+class testsCurvilinear2DInterp(unittest.TestCase):
+    """ tests for Curvilinear2DInterp, checking that the bucket lookup in
+    findSector agrees with walking across sectors
+    """
+
+    def setUp(self):
+        a, b = np.meshgrid(np.linspace(0.0, 1.0, 12), np.linspace(0.0, 1.0, 9), indexing="ij")
+        self.x_values = a + 0.15 * np.sin(3.0 * b)
+        self.y_values = b + 0.1 * a ** 2
+        self.interp = Curvilinear2DInterp(self.x_values + 2 * self.y_values, self.x_values, self.y_values)
+        self.x = np.linspace(0.05, 1.05, 201)
+        self.y = np.linspace(0.02, 1.0, 201)[np.random.RandomState(0).permutation(201)]
+
+    def test_findSector(self):
+        x_pos, y_pos = self.interp.findSector(self.x, self.y)
+        x_walk, y_walk = self.interp._walkSectors(self.x, self.y)
+        self.assertTrue(np.array_equal(x_pos, x_walk))
+        self.assertTrue(np.array_equal(y_pos, y_walk))
+
+    def test_evaluation(self):
+        f = self.interp(self.x, self.y)
+        these = np.isfinite(f)
+        self.assertTrue(np.allclose(f[these], self.x[these] + 2 * self.y[these]))
+
+
+class testsInterpolatorCache(unittest.TestCase):
+    """ tests for InterpolatorCache, checking content keyed sharing, eviction
+    and hit rates
+    """
+
+    def setUp(self):
+        self.cache = InterpolatorCache(maxsize=2)
+
+    def test_sharing(self):
+        x = np.array([0.0, 1.0])
+        f = self.cache.get(LinearInterp, x, np.array([0.0, 1.0]))
+        x[1] = 2.0  # must not affect the cached instance
+        g = self.cache.get(LinearInterp, np.array([0.0, 1.0]), [0.0, 1.0])
+        self.assertTrue(f is g)
+        self.assertEqual(f.x_list[1], 1.0)
+        self.assertFalse(f.x_list.flags.writeable)
+        h = self.cache.get(LinearInterp, np.array([0.0, 1.0]), np.array([0.0, 1.0]), lower_extrap=True)
+        self.assertFalse(f is h)
+        self.assertEqual(self.cache.hitRate(), 1.0 / 3.0)
+
+    def test_eviction(self):
+        f = self.cache.get(LinearInterp, np.array([0.0, 1.0]), np.array([0.0, 1.0]))
+        for top in [2.0, 3.0]:
+            self.cache.get(LinearInterp, np.array([0.0, top]), np.array([0.0, 1.0]))
+        self.assertEqual(len(self.cache.entries), 2)
+        g = self.cache.get(LinearInterp, np.array([0.0, 1.0]), np.array([0.0, 1.0]))
+        self.assertFalse(f is g)
+        self.assertEqual(self.cache.hits, 0)
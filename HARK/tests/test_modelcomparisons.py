@@ -152,6 +152,42 @@ class Compare_TBS_and_Markov(unittest.TestCase):
         self.assertLess(max_difference, 0.01)
 
 
+class Compare_Ergodic_Infinite_and_Markov(unittest.TestCase):
+    """
+    A Markov model whose states are all identical is the same as the infinite
+    horizon model, so the histogram method should find the same ergodic
+    distribution for both.
+    """
+    def setUp(self):
+        import HARK.ConsumptionSaving.ConsumerParameters as Params
+
+        InfiniteType = IndShockConsumerType(quiet=True, **Params.init_idiosyncratic_shocks)
+        InfiniteType.cycles = 0
+        InfiniteType.solve()
+
+        Markov_dictionary = deepcopy(Params.init_idiosyncratic_shocks)
+        Markov_dictionary['MrkvArray'] = [np.array([[0.7, 0.3], [0.4, 0.6]])]
+        Markov_dictionary['Rfree'] = np.array(2*[Params.init_idiosyncratic_shocks['Rfree']])
+        Markov_dictionary['LivPrb'] = [np.array(2*Params.init_idiosyncratic_shocks['LivPrb'])]
+        Markov_dictionary['PermGroFac'] = [np.array(2*Params.init_idiosyncratic_shocks['PermGroFac'])]
+        Markov_dictionary['MrkvPrbsInit'] = np.array([0.5, 0.5])
+        MarkovType = MarkovConsumerType(**Markov_dictionary)
+        MarkovType.cycles = 0
+        MarkovType.IncomeDstn = [[InfiniteType.IncomeDstn[0], InfiniteType.IncomeDstn[0]]]
+        MarkovType.solve()
+
+        self.InfiniteType = InfiniteType
+        self.MarkovType = MarkovType
+
+    def test_ergodic_stats(self):
+        stats = self.InfiniteType.getErgodicStats()
+        MarkovStats = self.MarkovType.getErgodicStats()
+        self.assertAlmostEqual(np.sum(self.MarkovType.ergodic_dist), 1.0)
+        for name in ['mNrm', 'cNrm', 'aNrm']:
+            self.assertAlmostEqual(stats[name], MarkovStats[name], places=3)
+        self.assertTrue(np.allclose(stats['aNrmLorenz'], MarkovStats['aNrmLorenz'], atol=1e-3))
+
+
 if __name__ == '__main__':
     # Run all the tests
     unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+import numpy as np
 
 import HARK.simulation as simulation
 
@@ -44,3 +45,37 @@ class SimulationTests(unittest.TestCase):
             simulation.drawDiscrete(1)[0],
             0)
 
+
+    def test_dtype(self):
+        draws = simulation.drawLognormal(5, dtype=np.float32)
+        self.assertEqual(draws.dtype, np.float32)
+        self.assertTrue(np.allclose(draws, simulation.drawLognormal(5), rtol=1e-6))
+        draws = simulation.drawUniform(5, bot=[0.0, 1.0], top=[1.0, 2.0], dtype=np.float32)
+        self.assertEqual(draws[1].dtype, np.float32)
+
+    def test_generator(self):
+        draws = simulation.drawUniform(3, seed=simulation.makeRNG(0))
+        self.assertTrue(np.array_equal(draws, simulation.makeRNG(0).uniform(size=3)))
+        # Drawing from one generator advances it instead of reseeding
+        RNG = simulation.makeRNG(0, bit_generator='Philox')
+        first = simulation.drawNormal(3, seed=RNG)
+        self.assertFalse(np.array_equal(first, simulation.drawNormal(3, seed=RNG)))
+
+    def test_spawnSeedSequences(self):
+        streams = [simulation.makeRNG(ss) for ss in simulation.spawnSeedSequences(5, 2)]
+        self.assertFalse(np.array_equal(streams[0].uniform(size=4), streams[1].uniform(size=4)))
+
+    def test_AliasSampler(self):
+        P = [np.array([0.1, 0.6, 0.3]), np.array([0.5, 0.0, 0.25, 0.25]), np.array([1.0])]
+        sampler = simulation.AliasSampler(P)
+        rows = np.repeat(np.arange(3), 100000)
+        events = sampler.draw(rows=rows, seed=simulation.makeRNG(0))
+        for r in range(3):
+            freq = np.bincount(events[rows == r], minlength=P[r].size)/100000.
+            self.assertTrue(np.allclose(freq, P[r], atol=0.01))
+        self.assertEqual(np.sum(events[rows == 1] == 1), 0)
+        self.assertTrue(np.all(sampler.draw(N=10) < 3))
+
+    def test_stackRows(self):
+        table = simulation.stackRows([np.array([1.0, 2.0]), np.array([3.0])], fill=-1.0)
+        self.assertTrue(np.array_equal(table, np.array([[1.0, 2.0], [3.0, -1.0]])))
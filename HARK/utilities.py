@@ -22,6 +22,8 @@ import math
 import scipy.stats as stats         # Python's statistics library
 from scipy.interpolate import interp1d
 from scipy.special import erf, erfc
+import scipy.sparse as sparse
+from scipy.sparse.linalg import spsolve
 
 def memoize(obj):
    '''
@@ -1004,6 +1006,32 @@ def calcWeightedAvg(data,weights):
     weighted_sum = np.dot(data_avg,weights)
     return weighted_sum
 
+def getGroupIndices(group,count):
+    '''
+    Splits agent indices into groups by an integer label, such as t_cycle, with
+    a single sort rather than one boolean mask per label.  Element j of the
+    output lists (in increasing order) the indices i such that group[i] == j.
+
+    Parameters
+    ----------
+    group : np.array
+        Integer array of labels, each between 0 and count-1.
+    count : int
+        The number of possible labels.
+
+    Returns
+    -------
+    indices : [np.array]
+        List of length count with integer index arrays, one for each label.
+    '''
+    group = np.asarray(group)
+    if count <= np.iinfo(np.int16).max: # Stable sorts of 16 bit integers are radix sorts
+        order = np.argsort(group.astype(np.int16),kind='stable')
+    else:
+        order = np.argsort(group,kind='stable')
+    bounds = np.concatenate(([0],np.cumsum(np.bincount(group,minlength=count))))
+    return [order[bounds[j]:bounds[j+1]] for j in range(count)]
+
 def getPercentiles(data,weights=None,percentiles=[0.5],presorted=False):
     '''
     Calculates the requested percentiles of (weighted) data.  Median by default.
@@ -1090,6 +1118,120 @@ def getLorenzShares(data,weights=None,percentiles=[0.5],presorted=False):
     lorenz_out = lorenzFunc(percentiles)
     return lorenz_out
 
+def gridLottery(grid,x):
+    '''
+    Splits each point x between the two gridpoints that bracket it, with weights
+    that preserve its mean (the "lottery" used by the histogram method of
+    simulating a distribution).  Points off the grid are put on the nearest end.
+
+    Parameters
+    ----------
+    grid : np.array
+        Increasing array of gridpoints, at least two.
+    x : np.array
+        Points to place on the grid.
+
+    Returns
+    -------
+    idx : np.array
+        Index of the lower bracketing gridpoint of each point.
+    weight : np.array
+        Weight each point puts on its lower gridpoint; the rest goes on idx+1.
+    '''
+    x = np.minimum(np.maximum(x,grid[0]),grid[-1])
+    idx = np.minimum(np.maximum(np.searchsorted(grid,x,side='right')-1,0),grid.size-2)
+    weight = (grid[idx+1]-x)/(grid[idx+1]-grid[idx])
+    return idx, weight
+
+def makeLotteryMatrix(grid,x,prob,source,source_count,dest_offset=0,dest_count=None):
+    '''
+    Builds a sparse transition matrix from outcomes placed on a grid by lottery.
+    Column j of the matrix is the distribution of the outcomes x[source == j],
+    each with probability prob, over the destination points.  There may be more
+    destination points than gridpoints (e.g. one copy of the grid per discrete
+    state), in which case outcome i is placed on points dest_offset[i] + idx.
+
+    Parameters
+    ----------
+    grid : np.array
+        Increasing array of gridpoints.
+    x : np.array
+        Outcomes to place on the grid.
+    prob : np.array
+        Probability of each outcome.
+    source : np.array
+        Integer array with the column (origin point) of each outcome.
+    source_count : int
+        Number of origin points.
+    dest_offset : int or np.array
+        Index of the first destination point of the copy of grid used by each outcome.
+    dest_count : int or None
+        Number of destination points; grid.size if None.
+
+    Returns
+    -------
+    TranMatrix : scipy.sparse.csr_matrix
+        Array of shape (dest_count,source_count) whose columns each sum to the
+        total probability of outcomes from that origin point.
+    '''
+    if dest_count is None:
+        dest_count = grid.size
+    idx, weight = gridLottery(grid,x)
+    idx = idx + dest_offset
+    rows = np.concatenate((idx,idx+1))
+    cols = np.concatenate((source,source))
+    vals = np.concatenate((prob*weight,prob*(1.0-weight)))
+    return sparse.csr_matrix((vals,(rows,cols)),shape=(dest_count,source_count))
+
+def findErgodicDist(TranMatrix,LivPrb=1.0,birth_dist=None,tol=1e-12,max_iter=100000):
+    '''
+    Finds the ergodic distribution of a population over the points of a sparse
+    transition matrix.  Each period, agents at point j survive with probability
+    LivPrb[j] and move according to column j of TranMatrix, and those who die
+    are replaced by newborns distributed as birth_dist:
+
+        dist_next = TranMatrix*(LivPrb*dist) + sum((1-LivPrb)*dist)*birth_dist
+
+    If every point has some mortality, the fixed point is found with one sparse
+    linear solve; otherwise the map is iterated until it converges.
+
+    Parameters
+    ----------
+    TranMatrix : scipy.sparse matrix
+        Square matrix whose columns are each a probability distribution.
+    LivPrb : float or np.array
+        Survival probability at each point.
+    birth_dist : np.array or None
+        Distribution of newborns over the points, needed if any LivPrb < 1.
+        Also the starting point for iteration; uniform if None.
+    tol : float
+        Convergence tolerance (maximum absolute change) for iteration.
+    max_iter : int
+        Maximum number of iterations.
+
+    Returns
+    -------
+    dist : np.array
+        The ergodic distribution, summing to one.
+    '''
+    n = TranMatrix.shape[0]
+    LivPrb = LivPrb*np.ones(n)
+    if birth_dist is not None and np.max(LivPrb) < 1.0:
+        # dist is proportional to (I - TranMatrix*diag(LivPrb))^-1 birth_dist
+        A = sparse.identity(n,format='csc') - TranMatrix.dot(sparse.diags(LivPrb)).tocsc()
+        dist = np.maximum(spsolve(A,birth_dist),0.0)
+        return dist/np.sum(dist)
+
+    dist = np.ones(n)/n if birth_dist is None else birth_dist
+    for j in range(max_iter):
+        dist_new = TranMatrix.dot(LivPrb*dist)
+        if birth_dist is not None:
+            dist_new = dist_new + np.dot(1.0-LivPrb,dist)*birth_dist
+        if np.max(np.abs(dist_new-dist)) < tol:
+            break
+        dist = dist_new
+    return dist_new/np.sum(dist_new)
+
 def calcSubpopAvg(data,reference,cutoffs,weights=None):
     '''
     Calculates the average of (weighted) data between cutoff percentiles of a
@@ -0,0 +1,279 @@
+"""
+Benchmarks for solving and simulating the models in HARK.ConsumptionSaving.
+
+The classes here follow the conventions of airspeed velocity (asv): methods
+named time_* are timed and methods named peakmem_* have their peak memory
+recorded, once for each combination of the class's params.  Run them with
+"asv run" from the repository root (see asv.conf.json), or without asv with
+
+    python -m benchmarks.consumption_saving [--quick]
+
+which times each benchmark once and measures its peak memory with tracemalloc
+in a second run.
+"""
+from __future__ import division, print_function
+from copy import copy
+import argparse
+import tracemalloc
+from time import time
+import numpy as np
+
+import HARK.ConsumptionSaving.ConsumerParameters as Params
+from HARK.ConsumptionSaving.ConsIndShockModel import IndShockConsumerType
+from HARK.ConsumptionSaving.ConsMarkovModel import MarkovConsumerType
+from HARK.ConsumptionSaving.ConsAggShockModel import AggShockConsumerType, CobbDouglasEconomy
+from HARK.ConsumptionSaving.ConsMedModel import MedShockConsumerType
+from HARK.ConsumptionSaving.ConsPortfolioModel import LogNormalPortfolioConsumerType
+from HARK.ConsumptionSaving.ConsPrefShockModel import PrefShockConsumerType
+from HARK.ConsumptionSaving.ConsGenIncProcessModel import PersistentShockConsumerType
+
+grid_sizes = [24, 48, 96]        # Values of aXtraCount for solution benchmarks
+agent_counts = [1000, 10000]     # Values of AgentCount for simulation benchmarks
+sim_periods = 100                # Number of periods in simulation benchmarks
+
+
+def makeIndShock(aXtraCount):
+    agent = IndShockConsumerType(quiet=True, **Params.init_idiosyncratic_shocks)
+    agent(aXtraCount=aXtraCount, cycles=0)
+    agent.updateAssetsGrid()
+    return agent
+
+
+def makeMarkov(aXtraCount):
+    # Two state model of unemployment, with persistent unemployment spells
+    MrkvArray = np.array([[0.95, 0.05], [0.25, 0.75]])
+    params = copy(Params.init_idiosyncratic_shocks)
+    params.update({'MrkvArray': [MrkvArray], 'UnempPrb': 0.0, 'global_markov': False,
+                   'aXtraCount': aXtraCount})
+    agent = MarkovConsumerType(quiet=True, **params)
+    agent.cycles = 0
+    agent.vFuncBool = False
+    employed_income_dist = [np.ones(1), np.ones(1), np.ones(1)]
+    unemployed_income_dist = [np.ones(1), np.ones(1), np.zeros(1)]
+    agent.IncomeDstn = [[employed_income_dist, unemployed_income_dist]]
+    agent.Rfree = np.array(2*[agent.Rfree])
+    agent.PermGroFac = [np.array(2*agent.PermGroFac)]
+    agent.LivPrb = [agent.LivPrb*np.ones(2)]
+    agent.MrkvPrbsInit = np.array([1.0, 0.0])
+    return agent
+
+
+def makeMedShock(aXtraCount):
+    params = copy(Params.init_medical_shocks)
+    params['aXtraCount'] = aXtraCount
+    agent = MedShockConsumerType(**params)
+    agent.cycles = 0
+    return agent
+
+
+def makePortfolio(aXtraCount):
+    params = copy(Params.init_idiosyncratic_shocks)
+    params.update({'RiskyAvg': 1.08, 'RiskyStd': 0.20, 'RiskyCount': 5, 'RiskyShareCount': 25,
+                   'Rfree': 1.0, 'CRRA': 6.0, 'BoroCnstArt': 0.0, 'DiscFac': 0.90,
+                   'aXtraCount': aXtraCount})
+    agent = LogNormalPortfolioConsumerType(**params)
+    agent.cycles = 0
+    return agent
+
+
+def makePrefShock(aXtraCount):
+    params = copy(Params.init_preference_shocks)
+    params['aXtraCount'] = aXtraCount
+    agent = PrefShockConsumerType(**params)
+    agent.cycles = 0
+    return agent
+
+
+def makeGenIncProcess(aXtraCount):
+    params = copy(Params.init_persistent_shocks)
+    params['aXtraCount'] = aXtraCount
+    agent = PersistentShockConsumerType(**params)
+    agent.cycles = 0
+    return agent
+
+
+class SolveBenchmark(object):
+    """
+    Times and measures the memory of solve() for one model at each grid size.
+    Subclasses set makeAgent to a function of aXtraCount that returns an
+    unsolved AgentType.
+    """
+    params = grid_sizes
+    param_names = ['aXtraCount']
+    timeout = 600
+
+    def setup(self, aXtraCount):
+        self.agent = self.makeAgent(aXtraCount)
+
+    def time_solve(self, aXtraCount):
+        self.agent.solve()
+
+    def peakmem_solve(self, aXtraCount):
+        self.agent.solve()
+
+
+class SimulateBenchmark(object):
+    """
+    Times and measures the memory of simulating one model for sim_periods
+    periods at each number of agents.  The model is solved at the smallest
+    grid size in setup, which is not timed.  The history of the variables in
+    track_vars is recorded.
+    """
+    params = agent_counts
+    param_names = ['AgentCount']
+    timeout = 600
+    track_vars = ['aNrmNow']
+
+    def setup(self, AgentCount):
+        self.agent = self.makeAgent(grid_sizes[0])
+        self.agent.solve()
+        self.agent.AgentCount = AgentCount
+        self.agent.T_sim = sim_periods
+        self.agent.track_vars = self.track_vars
+        self.agent.initializeSim()
+
+    def time_simulate(self, AgentCount):
+        self.agent.simulate()
+
+    def peakmem_simulate(self, AgentCount):
+        self.agent.simulate()
+
+
+class IndShockSolve(SolveBenchmark):
+    makeAgent = staticmethod(makeIndShock)
+
+
+class IndShockSimulate(SimulateBenchmark):
+    makeAgent = staticmethod(makeIndShock)
+
+
+class MarkovSolve(SolveBenchmark):
+    makeAgent = staticmethod(makeMarkov)
+
+
+class MarkovSimulate(SimulateBenchmark):
+    makeAgent = staticmethod(makeMarkov)
+
+
+class MedShockSolve(SolveBenchmark):
+    makeAgent = staticmethod(makeMedShock)
+
+
+class MedShockSimulate(SimulateBenchmark):
+    makeAgent = staticmethod(makeMedShock)
+    track_vars = ['aLvlNow']
+
+
+class PortfolioSolve(SolveBenchmark):
+    makeAgent = staticmethod(makePortfolio)
+
+
+class PortfolioSimulate(SimulateBenchmark):
+    makeAgent = staticmethod(makePortfolio)
+
+
+class PrefShockSolve(SolveBenchmark):
+    makeAgent = staticmethod(makePrefShock)
+
+
+class PrefShockSimulate(SimulateBenchmark):
+    makeAgent = staticmethod(makePrefShock)
+
+
+class GenIncProcessSolve(SolveBenchmark):
+    makeAgent = staticmethod(makeGenIncProcess)
+
+
+class GenIncProcessSimulate(SimulateBenchmark):
+    makeAgent = staticmethod(makeGenIncProcess)
+    track_vars = ['aLvlNow']
+
+
+class CobbDouglasSolve(object):
+    """
+    Times and measures the memory of finding the equilibrium aggregate saving
+    rule of a CobbDouglasEconomy with one AggShockConsumerType, at each number
+    of agents.
+    """
+    params = agent_counts
+    param_names = ['AgentCount']
+    timeout = 1800
+
+    def setup(self, AgentCount):
+        agent = AggShockConsumerType(quiet=True)
+        agent.cycles = 0
+        agent.AgentCount = AgentCount
+        self.economy = CobbDouglasEconomy(agents=[agent], act_T=400, verbose=False)
+        self.economy.max_loops = 10
+        self.economy.makeAggShkHist()
+        agent.getEconomyData(self.economy)
+
+    def time_solve(self, AgentCount):
+        self.economy.solve()
+
+    def peakmem_solve(self, AgentCount):
+        self.economy.solve()
+
+
+all_benchmarks = [IndShockSolve, IndShockSimulate, MarkovSolve, MarkovSimulate,
+                  MedShockSolve, MedShockSimulate, PortfolioSolve, PortfolioSimulate,
+                  PrefShockSolve, PrefShockSimulate, GenIncProcessSolve, GenIncProcessSimulate,
+                  CobbDouglasSolve]
+
+
+def runBenchmark(benchmark_class, param):
+    '''
+    Runs each benchmark of a benchmark class once at the given parameter.  As
+    in asv, time_* methods are timed and peakmem_* methods are run separately
+    while tracing memory, so that tracing does not distort the timings.
+
+    Parameters
+    ----------
+    benchmark_class : class
+        A benchmark class from this module.
+    param : int
+        The value of the class's parameter to run at.
+
+    Returns
+    -------
+    results : [(string, float, float)]
+        For each benchmark, its name, its time in seconds and its peak memory
+        in megabytes.
+    '''
+    results = []
+    for name in sorted(dir(benchmark_class)):
+        if not name.startswith('time_'):
+            continue
+        benchmark = benchmark_class()
+        benchmark.setup(param)
+        t_start = time()
+        getattr(benchmark, name)(param)
+        run_time = time() - t_start
+
+        peak = np.nan
+        if hasattr(benchmark_class, 'peakmem_' + name[5:]):
+            benchmark = benchmark_class()
+            benchmark.setup(param)
+            tracemalloc.start()
+            getattr(benchmark, 'peakmem_' + name[5:])(param)
+            peak = tracemalloc.get_traced_memory()[1]/2.0**20
+            tracemalloc.stop()
+        results.append((benchmark_class.__name__ + '.' + name[5:], run_time, peak))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the models in HARK.ConsumptionSaving.')
+    parser.add_argument('--quick', action='store_true', help='only run at the smallest parameter value')
+    args = parser.parse_args()
+
+    print('{:<32}{:>12}{:>12}{:>14}'.format('benchmark', 'param', 'time (s)', 'peak mem (MB)'))
+    for benchmark_class in all_benchmarks:
+        params = benchmark_class.params[:1] if args.quick else benchmark_class.params
+        for param in params:
+            for name, run_time, peak in runBenchmark(benchmark_class, param):
+                print('{:<32}{:>12}{:>12.3f}{:>14.1f}'.format(name, param, run_time, peak))
+
+
+if __name__ == '__main__':
+    main()
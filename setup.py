@@ -137,7 +137,7 @@ setup(
     #
     #   py_modules=["my_module"],
     #
-    packages=find_packages(exclude=['Testing', 'Documentation']),  # Required
+    packages=find_packages(exclude=['Testing', 'Documentation', 'benchmarks']),  # Required
 
     # This field lists other packages that your project depends on to run.
     # Any package you put here will be installed by pip when your project is